@@ -75,6 +75,13 @@ setup(
     tests_require=tests_require,
     extras_require={
         'test': tests_require,
+        'export': [
+            'pyarrow',
+            'zstandard',
+        ],
+        'standards': [
+            'numpy',
+        ],
     },
     entry_points='''
         [console_scripts]
@@ -84,10 +91,13 @@ setup(
         es-index-listener = snovault.elasticsearch.es_index_listener:main
 
         add-date-created = encoded.commands.add_date_created:main
+        backfill-lot-reviews = encoded.commands.backfill_lot_reviews:main
+        bulk-audit = encoded.commands.bulk_audit:main
         check-rendering = encoded.commands.check_rendering:main
         deploy = encoded.commands.deploy:main
         extract_test_data = encoded.commands.extract_test_data:main
         es-index-data = encoded.commands.es_index_data:main
+        export-worker = encoded.commands.export_worker:main
         generate-ontology = encoded.commands.generate_ontology:main
         import-data = encoded.commands.import_data:main
         jsonld-rdf = encoded.commands.jsonld_rdf:main
@@ -107,6 +117,7 @@ setup(
         indexer = snovault.elasticsearch.es_index_listener:composite
         visindexer = snovault.elasticsearch.es_index_listener:composite
         regionindexer = snovault.elasticsearch.es_index_listener:composite
+        auditindexer = snovault.elasticsearch.es_index_listener:composite
 
         [paste.filter_app_factory]
         memlimit = encoded.memlimit:filter_app
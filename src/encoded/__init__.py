@@ -28,6 +28,10 @@ from snovault.elasticsearch import (
 )
 from snovault.json_renderer import json_renderer
 from elasticsearch import Elasticsearch
+from .ontology_closure import (
+    ONTOLOGY_CLOSURE,
+    OntologyClosure,
+)
 STATIC_MAX_AGE = 0
 
 
@@ -221,16 +225,26 @@ def main(global_config, **local_config):
     config.include('.renderers')
     config.include('.authentication')
     config.include('.server_defaults')
+    config.include('.property_cache')
+    config.include('.reference_cache')
+    config.include('.audit_cache')
+    config.include('.audit_profiler')
+    config.include('.schema_cache')
+    config.include('.property_profiler')
     config.include('.types')
     config.include('.root')
+    config.include('.export_cache')
+    config.include('.export_jobs')
     config.include('.batch_download')
     config.include('.visualization')
 
     if 'elasticsearch.server' in config.registry.settings:
         config.include('snovault.elasticsearch')
         config.include('.vis_indexer')
+        config.include('.audit_indexer')
         config.include('.cart_view')
         config.include('encoded.search_views')
+        config.include('.standards_dashboard')
 
     if 'snp_search.server' in config.registry.settings:
         addresses = aslist(config.registry.settings['snp_search.server'])
@@ -247,6 +261,7 @@ def main(global_config, **local_config):
     config.include(static_resources)
     config.include(changelogs)
     config.registry['ontology'] = json_from_path(settings.get('ontology_path'), {})
+    config.registry[ONTOLOGY_CLOSURE] = OntologyClosure(config.registry['ontology'])
     aws_ip_ranges = json_from_path(settings.get('aws_ip_ranges_path'), {'prefixes': []})
     config.registry['aws_ipset'] = netaddr.IPSet(
         record['ip_prefix'] for record in aws_ip_ranges['prefixes'] if record['service'] == 'AMAZON')
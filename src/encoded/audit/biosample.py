@@ -2,6 +2,10 @@ from snovault import (
     AuditFailure,
     audit_checker,
 )
+from ..ontology_closure import (
+    ancestors,
+    ontology_closure,
+)
 from .formatter import (
     audit_link,
     path_to_text,
@@ -150,7 +154,8 @@ def audit_biosample_part_of_consistency(value, system):
 
         ontology = system['registry']['ontology']
         if (term_id in ontology) and (part_of_term_id in ontology):
-            if is_part_of(term_id, part_of_term_id, ontology) is True:
+            closure = ontology_closure(system['registry'])
+            if closure.is_ancestor(term_id, part_of_term_id):
                 return
 
         detail = ('Biosample {} with biosample term {} '
@@ -230,14 +235,15 @@ def audit_biosample_depleted_in_term_name(value, system):
 
 # utility functions
 
-def is_part_of(term_id, part_of_term_id, ontology, parent_term_id=None):
+def is_part_of(term_id, part_of_term_id, ontology):
     """
     Given the term_ids for a child and parent biosample pair as obtained from the
     portal, check that the part_of relationship is reflected in the ontology as
     well. While the portal model insinuates a direct parent-child relation, in
     the ontology the relationship may traverse several levels of inheritance.
-    As such, this function traverses up the ontology tree until it has found the
-    ancestor node with the matching term_id.
+    As such, this function searches the ontology tree above term_id, visiting
+    each ancestor once, until it has found the node with the matching term_id.
+    The audit uses the closure precomputed in ontology_closure.py instead.
 
     Parameters
     ----------
@@ -248,17 +254,13 @@ def is_part_of(term_id, part_of_term_id, ontology, parent_term_id=None):
         "part_of" property, i.e. the biosample_term_id of the parent biosample
     ontology : dict
         The ontology generated by ontology.py, from system['registry']['ontology']
-    parent_term_id : str, optional
-        The term id of the previous node in the traversal. This argument is passed
-        for recursive is_part_of calls to ensure that the search does not bounce
-        between two ontology terms pointing to each other.
 
     Returns
     -------
     bool
         Returns True if the ontology term of any ancestor of the term_id in the
-        ontology, or the term_id itself, matches part_of_term_id. Otherwise,
-        returns False after the search over all ancestor nodes has been exhausted.
+        ontology matches part_of_term_id. Otherwise, returns False after the
+        search over all ancestor nodes has been exhausted.
 
     Examples
     --------
@@ -268,18 +270,7 @@ def is_part_of(term_id, part_of_term_id, ontology, parent_term_id=None):
     >>> is_part_of('CL:0000121', 'UBERON:0002037', ontology)
     True
     """
-    if 'part_of' not in ontology[term_id] or ontology[term_id]['part_of'] == []:
-        return False
-    if part_of_term_id in ontology[term_id]['part_of']:
-        return True
-    else:
-        parents = []
-        for x in ontology[term_id]['part_of']:
-            if not parent_term_id == x:
-                parents.append(
-                    is_part_of(x, part_of_term_id, ontology, parent_term_id=term_id)
-                )
-        return any(parents)
+    return part_of_term_id in ancestors(ontology, term_id, 'part_of')
 
 
 def audit_biosample_post_differentiation_time(value, system):
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from ..property_cache import item_property
 
 @lru_cache()
 def assay_term_name(*assay_names):
@@ -25,14 +26,10 @@ def rfa(*rfa_names):
     return rfa_condition
 
 
-@lru_cache()
 def _award_rfa(award_uuid, root):
-    award = root.get_by_uuid(award_uuid)
-    return award.upgrade_properties().get('rfa')
+    return item_property(root, award_uuid, 'rfa')
 
 
-@lru_cache()
 def _assay_name(assay_uuid, root):
-    assay = root.get_by_uuid(assay_uuid)
-    return assay.upgrade_properties().get('assay_term_name')
+    return item_property(root, assay_uuid, 'assay_term_name')
 
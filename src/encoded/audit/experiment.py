@@ -1,13 +1,34 @@
+from collections import defaultdict
 from snovault import (
     AuditFailure,
     audit_checker,
 )
+from ..audit_cache import (
+    audit_frame,
+    dispatch_framed,
+)
 from .formatter import (
     audit_link,
     path_to_text,
 )
 from .gtex_data import gtexDonorsList
-from .standards_data import pipelines_with_read_depth, minimal_read_depth_requirements
+from .standards_data import (
+    idr_thresholds,
+    minimal_read_depth_requirements,
+    pipelines_with_read_depth,
+    replicate_metric_thresholds,
+    spearman_thresholds,
+)
+from .thresholds import (
+    NOT_COMPLIANT,
+    READ_DEPTH_CATEGORIES,
+    WARNING,
+    dual_threshold_level,
+    idr_level,
+    mad_level,
+    read_depth_level,
+    spearman_level,
+)
 
 
 targetBasedAssayList = [
@@ -56,7 +77,73 @@ seq_assays = [
     'long read RNA-seq',
 ]
 
+# Frames read by the audit functions of audit_experiment, see audit_frame.
+BASE_FRAME = [
+    'biosample_ontology',
+    'award',
+    'target',
+    'replicates',
+]
+
+REPLICATES_FRAME = BASE_FRAME + [
+    'replicates.library',
+    'replicates.library.spikeins_used',
+    'replicates.library.biosample',
+    'replicates.library.biosample.biosample_ontology',
+    'replicates.library.biosample.applied_modifications',
+    'replicates.library.biosample.applied_modifications.modified_site_by_target_id',
+    'replicates.library.biosample.donor',
+    'replicates.libraries',
+    'replicates.libraries.spikeins_used',
+    'replicates.libraries.biosample',
+    'replicates.libraries.biosample.applied_modifications',
+    'replicates.libraries.biosample.applied_modifications.modified_site_by_target_id',
+    'replicates.libraries.biosample.donor',
+]
+
+ANTIBODY_FRAME = REPLICATES_FRAME + [
+    'replicates.antibody',
+    'replicates.antibody.targets',
+    'replicates.antibody.lot_reviews',
+]
+
+CONTROLS_FRAME = BASE_FRAME + [
+    'possible_controls',
+    'possible_controls.biosample_ontology',
+    'possible_controls.original_files',
+    'possible_controls.original_files.quality_metrics',
+    'possible_controls.original_files.platform',
+    'possible_controls.original_files.analysis_step_version',
+    'possible_controls.original_files.analysis_step_version.analysis_step',
+    'possible_controls.original_files.analysis_step_version.analysis_step.pipelines',
+    'possible_controls.target',
+    'possible_controls.replicates',
+    'possible_controls.replicates.antibody',
+]
+
+FILES_FRAME = BASE_FRAME + [
+    'contributing_files',
+    'contributing_files.quality_metrics',
+    'original_files',
+    'original_files.award',
+    'original_files.quality_metrics',
+    'original_files.platform',
+    'original_files.replicate',
+    'original_files.analysis_step_version',
+    'original_files.analysis_step_version.analysis_step',
+    'original_files.analysis_step_version.analysis_step.pipelines',
+    'original_files.analysis_step_version.software_versions',
+    'original_files.analysis_step_version.software_versions.software',
+]
 
+# Files with their controls and the libraries of the replicates, for the
+# standards audits.
+STANDARDS_FRAME = sorted(set(FILES_FRAME + REPLICATES_FRAME + CONTROLS_FRAME))
+
+EXPERIMENT_FRAME = sorted(set(STANDARDS_FRAME + ANTIBODY_FRAME))
+
+
+@audit_frame(REPLICATES_FRAME)
 def audit_hic_restriction_enzyme_in_libaries(value, system, excluded_types):
     '''
     Libraries for HiC experiments should use the same restriction enzymes
@@ -113,6 +200,7 @@ def audit_hic_restriction_enzyme_in_libaries(value, system, excluded_types):
             yield AuditFailure('inconsistent fragmentation method', detail, level='ERROR')       
 
 
+@audit_frame(STANDARDS_FRAME)
 def audit_experiment_chipseq_control_read_depth(value, system, files_structure):
     # relevant only for ChIP-seq
     if value.get('assay_term_id') != 'OBI:0000716':
@@ -136,9 +224,8 @@ def audit_experiment_chipseq_control_read_depth(value, system, files_structure):
         control_objects = {}
         for control_experiment in controls:
             control_objects[control_experiment.get('@id')] = control_experiment
-            controls_files_structures[control_experiment.get('@id')] = create_files_mapping(
-                control_experiment.get('original_files'),
-                files_structure.get('excluded_types'))
+            controls_files_structures[control_experiment.get('@id')] = \
+                files_structure.control(control_experiment)
         awards_to_be_checked = [
                         'ENCODE3',
                         'ENCODE4',
@@ -400,6 +487,7 @@ def check_control_read_depth_standards(peaks_file_id,
             yield AuditFailure('control extremely low read depth', detail, level='ERROR')
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_mixed_libraries(value, system, excluded_types):
     '''
     Experiments should not have mixed libraries nucleic acids
@@ -429,6 +517,7 @@ def audit_experiment_mixed_libraries(value, system, excluded_types):
     return
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_pipeline_assay_details(value, system, files_structure):
     for pipeline in get_pipeline_objects(files_structure.get('original_files').values()):
         pipeline_assays = pipeline.get('assay_term_names')
@@ -447,6 +536,7 @@ def audit_experiment_pipeline_assay_details(value, system, files_structure):
 # def audit_experiment_missing_processed_files(value, system): removed from v54
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_missing_unfiltered_bams(value, system, files_structure):
     if value.get('assay_term_id') != 'OBI:0000716':  # not a ChIP-seq
         return
@@ -478,6 +568,7 @@ def audit_experiment_missing_unfiltered_bams(value, system, files_structure):
     return
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_with_uploading_files(value, system, files_structure):
     if files_structure.get('original_files'):
         for file_object in files_structure.get('original_files').values():
@@ -498,6 +589,7 @@ def audit_experiment_with_uploading_files(value, system, files_structure):
     return
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_out_of_date_analysis(value, system, files_structure):
     valid_assay_term_names = [
         'ChIP-seq',
@@ -536,6 +628,7 @@ def audit_experiment_out_of_date_analysis(value, system, files_structure):
     return
 
 
+@audit_frame(STANDARDS_FRAME)
 def audit_experiment_standards_dispatcher(value, system, files_structure):
     if not check_award_condition(value, ['ENCODE4',
                                          'ENCODE3',
@@ -630,6 +723,7 @@ def audit_experiment_standards_dispatcher(value, system, files_structure):
         return
 
 
+@audit_frame(STANDARDS_FRAME)
 def audit_modERN_experiment_standards_dispatcher(value, system, files_structure):
 
     if not check_award_condition(value, ['modERN']):
@@ -966,12 +1060,7 @@ def check_experiment_rna_seq_standards(value,
             gene_quantifications,
             desired_assembly,
             desired_annotation,
-            upper_limit_reads_mapped=5000000,
-            lower_limit_reads_mapped=3000000,
-            upper_limit_spearman=0.85,
-            lower_limit_spearman=0.8,
-            upper_limit_expressed_mirnas=300,
-            lower_limit_expressed_mirnas=200,
+            **replicate_metric_thresholds[pipeline_title]
         )
     elif pipeline_title == 'Long read RNA-seq pipeline':
         yield from check_experiment_long_read_rna_standards(
@@ -980,14 +1069,7 @@ def check_experiment_rna_seq_standards(value,
             transcript_quantifications,
             desired_assembly,
             desired_annotation,
-            upper_limit_flnc=600000,
-            lower_limit_flnc=400000,
-            upper_limit_mapping_rate=0.9,
-            lower_limit_mapping_rate=0.6,
-            upper_limit_spearman=0.8,
-            lower_limit_spearman=0.6,
-            upper_limit_genes_detected=8000,
-            lower_limit_genes_detected=4000,
+            **replicate_metric_thresholds[pipeline_title]
         )
     return
 
@@ -1128,7 +1210,10 @@ def check_experiment_chip_seq_standards(
         return
 
     idr_metrics = get_metrics(idr_peaks_files, 'IDRQualityMetric')
-    yield from check_idr(idr_metrics, 2, 2)
+    yield from check_idr(
+        idr_metrics,
+        idr_thresholds['rescue_ratio'],
+        idr_thresholds['self_consistency_ratio'])
     return
 
 
@@ -1196,7 +1281,8 @@ def check_experiment_long_rna_standards(experiment,
     if experiment['assay_term_name'] != 'single cell isolation followed by RNA-seq':
         yield from check_spearman(
             mad_metrics, experiment['replication_type'],
-            0.9, 0.8, pipeline_title)
+            spearman_thresholds['isogenic'], spearman_thresholds['anisogenic'],
+            pipeline_title)
     # for failure in check_mad(mad_metrics, experiment['replication_type'],
     #                         0.2, pipeline_title):
     #    yield failure
@@ -1254,7 +1340,8 @@ def check_experiment_small_rna_standards(experiment,
 
     yield from check_spearman(
         mad_metrics, experiment['replication_type'],
-        0.9, 0.8, 'Small RNA-seq single-end pipeline')
+        spearman_thresholds['isogenic'], spearman_thresholds['anisogenic'],
+        'Small RNA-seq single-end pipeline')
     return
 
 
@@ -1312,7 +1399,8 @@ def check_experiment_cage_rampage_standards(experiment,
 
     yield from check_spearman(
         mad_metrics, experiment['replication_type'],
-        0.9, 0.8, 'RAMPAGE (paired-end, stranded)')
+        spearman_thresholds['isogenic'], spearman_thresholds['anisogenic'],
+        'RAMPAGE (paired-end, stranded)')
     return
 
 
@@ -1463,12 +1551,11 @@ def check_replicate_metric_dual_threshold(
     for metric in metrics:
         metric_value = metric.get(metric_name)
         files = metric['quality_metric_of']
-        if metric_value and metric_value < upper_limit:
-            level = 'WARNING'
+        level = dual_threshold_level(metric_value, upper_limit, lower_limit)
+        if level:
             standards_severity = 'recommendations'
             audit_name_severity = 'borderline'
-            if metric_value < lower_limit:
-                level = 'NOT_COMPLIANT'
+            if level == NOT_COMPLIANT:
                 standards_severity = 'requirements'
                 audit_name_severity = 'insufficient'
             file_names_links = [audit_link(path_to_text(file), file) for file in files]
@@ -1492,7 +1579,8 @@ def check_idr(metrics, rescue, self_consistency):
         if 'rescue_ratio' in m and 'self_consistency_ratio' in m:
             rescue_r = m['rescue_ratio']
             self_r = m['self_consistency_ratio']
-            if rescue_r > rescue and self_r > self_consistency:
+            level = idr_level(rescue_r, self_r, rescue, self_consistency)
+            if level == NOT_COMPLIANT:
                 file_list = []
                 for f in m['quality_metric_of']:
                     file_list.append(f)
@@ -1512,8 +1600,7 @@ def check_idr(metrics, rescue, self_consistency):
                 )
                 yield AuditFailure('insufficient replicate concordance', detail,
                                    level='NOT_COMPLIANT')
-            elif (rescue_r <= rescue and self_r > self_consistency) or \
-                 (rescue_r > rescue and self_r <= self_consistency):
+            elif level == WARNING:
                 file_list = []
                 for f in m['quality_metric_of']:
                     file_list.append(f)
@@ -1548,6 +1635,7 @@ def check_mad(metrics, replication_type, mad_threshold, pipeline):
     for m in metrics:
         if 'MAD of log ratios' in m:
             mad_value = m['MAD of log ratios']
+            level = mad_level(mad_value, experiment_replication_type)
             if mad_value > 0.2:
                 file_list = []
                 for f in m['quality_metric_of']:
@@ -1568,13 +1656,13 @@ def check_mad(metrics, replication_type, mad_threshold, pipeline):
                     )
                 )
                 if experiment_replication_type == 'isogenic':
-                    if mad_value < 0.5:
+                    if level == WARNING:
                         yield AuditFailure('low replicate concordance', detail,
                                            level='WARNING')
                     else:
                         yield AuditFailure('insufficient replicate concordance', detail,
                                            level='NOT_COMPLIANT')
-                elif experiment_replication_type == 'anisogenic' and mad_value > 0.5:
+                elif level:
                     file_names_links = [audit_link(path_to_text(file), file) for file in file_list]
                     detail = ('ENCODE processed gene quantification files {} '
                         'has Median-Average-Deviation (MAD) '
@@ -1664,7 +1752,8 @@ def check_spearman(metrics, replication_type, isogenic_threshold,
     for m in metrics:
         if 'Spearman correlation' in m:
             spearman_correlation = m['Spearman correlation']
-            if spearman_correlation < threshold:
+            if spearman_level(spearman_correlation, replication_type,
+                              isogenic_threshold, anisogenic_threshold):
                 file_names = []
                 for f in m['quality_metric_of']:
                     file_names.append(f)
@@ -1995,14 +2084,8 @@ def check_file_chip_seq_read_depth(file_to_check,
                             audit_link('ENCODE ChIP-seq data standards', '/data-standards/chip-seq/')
                         )
                     )
-                if read_depth >= marks['narrow']['minimal']:
-                    yield AuditFailure('low read depth', detail, level='WARNING')
-                elif read_depth >= marks['narrow']['low'] and read_depth < marks['narrow']['minimal']:
-                    yield AuditFailure('insufficient read depth',
-                                       detail, level='NOT_COMPLIANT')
-                else:
-                    yield AuditFailure('extremely low read depth',
-                                       detail, level='ERROR')
+                level = read_depth_level(read_depth, marks['narrow'])
+                yield AuditFailure(READ_DEPTH_CATEGORIES[level], detail, level=level)
     elif 'broad histone mark' in target_investigated_as and \
             standards_version != 'modERN':  # target_name in broad_peaks_targets:
         pipeline_object = get_pipeline_by_name(
@@ -2046,15 +2129,8 @@ def check_file_chip_seq_read_depth(file_to_check,
                                 audit_link('ENCODE ChIP-seq data standards', '/data-standards/chip-seq/')
                             )
                         )
-                    if read_depth >= marks['broad']['minimal']:
-                        yield AuditFailure('low read depth',
-                                           detail, level='WARNING')
-                    elif read_depth >= 100 and read_depth < marks['broad']['minimal']:
-                        yield AuditFailure('insufficient read depth',
-                                           detail, level='NOT_COMPLIANT')
-                    elif read_depth < 100:
-                        yield AuditFailure('extremely low read depth',
-                                           detail, level='ERROR')
+                    level = read_depth_level(read_depth, dict(marks['broad'], low=100))
+                    yield AuditFailure(READ_DEPTH_CATEGORIES[level], detail, level=level)
             else:
                 if 'assembly' in file_to_check:
                     detail = ('Processed {} file {} produced by {} '
@@ -2093,15 +2169,9 @@ def check_file_chip_seq_read_depth(file_to_check,
                         )
                     )
 
-                if read_depth >= marks['broad']['minimal'] and read_depth < marks['broad']['recommended']:
-                    yield AuditFailure('low read depth',
-                                       detail, level='WARNING')
-                elif read_depth < marks['broad']['minimal'] and read_depth >= marks['broad']['low']:
-                    yield AuditFailure('insufficient read depth',
-                                       detail, level='NOT_COMPLIANT')
-                elif read_depth < marks['broad']['low']:
-                    yield AuditFailure('extremely low read depth',
-                                       detail, level='ERROR')
+                level = read_depth_level(read_depth, marks['broad'])
+                if level:
+                    yield AuditFailure(READ_DEPTH_CATEGORIES[level], detail, level=level)
     elif 'narrow histone mark' in target_investigated_as and \
             standards_version != 'modERN':
         pipeline_object = get_pipeline_by_name(
@@ -2143,14 +2213,9 @@ def check_file_chip_seq_read_depth(file_to_check,
                         audit_link('ENCODE ChIP-seq data standards', '/data-standards/chip-seq/')
                     )
                 )
-            if read_depth >= marks['narrow']['minimal'] and read_depth < marks['narrow']['recommended']:
-                yield AuditFailure('low read depth', detail, level='WARNING')
-            elif read_depth < marks['narrow']['minimal'] and read_depth >= marks['narrow']['low']:
-                yield AuditFailure('insufficient read depth',
-                                   detail, level='NOT_COMPLIANT')
-            elif read_depth < marks['narrow']['low']:
-                yield AuditFailure('extremely low read depth',
-                                   detail, level='ERROR')
+            level = read_depth_level(read_depth, marks['narrow'])
+            if level:
+                yield AuditFailure(READ_DEPTH_CATEGORIES[level], detail, level=level)
     else:
         if pipeline_title == 'Transcription factor ChIP-seq pipeline (modERN)':
             if read_depth < modERN_cutoff:
@@ -2208,14 +2273,9 @@ def check_file_chip_seq_read_depth(file_to_check,
                             audit_link('ENCODE ChIP-seq data standards', '/data-standards/chip-seq/')
                         )
                     )
-                if read_depth >= marks['TF']['minimal'] and read_depth < marks['TF']['recommended']:
-                    yield AuditFailure('low read depth', detail, level='WARNING')
-                elif read_depth < marks['TF']['minimal'] and read_depth >= marks['TF']['low']:
-                    yield AuditFailure('insufficient read depth',
-                                       detail, level='NOT_COMPLIANT')
-                elif read_depth < marks['TF']['low']:
-                    yield AuditFailure('extremely low read depth',
-                                       detail, level='ERROR')
+                level = read_depth_level(read_depth, marks['TF'])
+                if level:
+                    yield AuditFailure(READ_DEPTH_CATEGORIES[level], detail, level=level)
     return
 
 
@@ -2361,6 +2421,7 @@ def check_file_read_length_rna(file_to_check, threshold_length, assay_term_name,
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_internal_tag(value, system, excluded_types):
 
     if value['status'] in ['deleted', 'replaced']:
@@ -2453,6 +2514,7 @@ def audit_experiment_internal_tag(value, system, excluded_types):
     return
 
 
+@audit_frame(BASE_FRAME)
 def audit_experiment_geo_submission(value, system, excluded_types):
     if value['status'] not in ['released']:
         return
@@ -2481,6 +2543,7 @@ def audit_experiment_geo_submission(value, system, excluded_types):
     return
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_status(value, system, files_structure):
     if value['status'] not in ['in progress']:
         return
@@ -2554,6 +2617,7 @@ def audit_experiment_status(value, system, files_structure):
                                     detail, level='WARNING')
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_consistent_sequencing_runs(value, system, files_structure):
     if value['status'] in ['deleted', 'replaced', 'revoked']:
         return
@@ -2691,6 +2755,7 @@ def audit_experiment_consistent_sequencing_runs(value, system, files_structure):
                                         detail, level='WARNING')
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_replicate_with_no_files(value, system, files_structure):
     if 'internal_tags' in value and 'DREAM' in value['internal_tags']:
         return
@@ -2756,6 +2821,7 @@ def audit_experiment_replicate_with_no_files(value, system, files_structure):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_replicated(value, system, excluded_types):
     if not check_award_condition(value, [
             'ENCODE4', 'ENCODE3', 'GGR']):
@@ -2801,6 +2867,7 @@ def audit_experiment_replicated(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_replicates_with_no_libraries(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced', 'revoked']:
         return
@@ -2818,6 +2885,7 @@ def audit_experiment_replicates_with_no_libraries(value, system, excluded_types)
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_isogeneity(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced', 'revoked']:
         return
@@ -2883,6 +2951,7 @@ def audit_experiment_isogeneity(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_technical_replicates_same_library(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced', 'revoked']:
         return
@@ -2908,6 +2977,7 @@ def audit_experiment_technical_replicates_same_library(value, system, excluded_t
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_tagging_genetic_modification(value, system, excluded_types):
     if check_award_condition(value, ["ENCODE4"]):
         level = 'ERROR'
@@ -2951,6 +3021,7 @@ def is_tagging_genetic_modification(modification):
     return False
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_biosample_characterization(value, system, excluded_types):
     detail = ''
     no_characterizations = False
@@ -2998,6 +3069,7 @@ def audit_experiment_biosample_characterization(value, system, excluded_types):
             )
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_replicates_biosample(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced', 'revoked']:
         return
@@ -3041,6 +3113,7 @@ def audit_experiment_replicates_biosample(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_documents(value, system, excluded_types):
     if not check_award_condition(value, [
             "ENCODE3", "modERN", "GGR", "ENCODE4",
@@ -3075,6 +3148,7 @@ def audit_experiment_documents(value, system, excluded_types):
     return
 
 
+@audit_frame(ANTIBODY_FRAME)
 def audit_experiment_target(value, system, excluded_types):
     '''
     Certain assay types (ChIP-seq, ...) require valid targets and the replicate's
@@ -3208,6 +3282,7 @@ def audit_experiment_target(value, system, excluded_types):
     return
 
 
+@audit_frame(CONTROLS_FRAME)
 def audit_experiment_control(value, system, excluded_types):
     if not check_award_condition(value, [
             "ENCODE3", "ENCODE4", "modERN", "ENCODE2", "modENCODE",
@@ -3280,6 +3355,7 @@ def is_matching_biosample_control(dataset, biosample_term_id):
     return True
 
 
+@audit_frame(STANDARDS_FRAME)
 def audit_experiment_platforms_mismatches(value, system, files_structure):
     if value['status'] in ['deleted', 'replaced']:
         return
@@ -3305,7 +3381,7 @@ def audit_experiment_platforms_mismatches(value, system, files_structure):
             for control in value['possible_controls']:
                 if control.get('original_files'):
                     control_platforms = get_platforms_used_in_experiment(
-                        create_files_mapping(control.get('original_files'), files_structure.get('excluded_types')))
+                        files_structure.control(control))
                     if len(control_platforms) > 1:
                         control_platforms_string = str(
                             list(control_platforms)).replace('\'', '')
@@ -3338,6 +3414,7 @@ def audit_experiment_platforms_mismatches(value, system, files_structure):
     return
 
 
+@audit_frame(STANDARDS_FRAME)
 def audit_experiment_ChIP_control(value, system, files_structure):
     if not check_award_condition(value, [
             'ENCODE3', 'ENCODE4', 'Roadmap']):
@@ -3395,6 +3472,7 @@ def is_control_dataset(dataset):
     return bool(dataset.get('control_type'))
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_spikeins(value, system, excluded_types):
     if not check_award_condition(value, [
             "ENCODE3",
@@ -3439,6 +3517,7 @@ def audit_experiment_spikeins(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_biosample_term(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced']:
         return
@@ -3519,6 +3598,7 @@ def audit_experiment_biosample_term(value, system, excluded_types):
     return
 
 
+@audit_frame(ANTIBODY_FRAME)
 def audit_experiment_antibody_characterized(value, system, excluded_types):
     '''Check that biosample in the experiment has been characterized for the given antibody.'''
     if not check_award_condition(value, [
@@ -3711,6 +3791,7 @@ def audit_experiment_antibody_characterized(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_library_biosample(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced']:
         return
@@ -3731,6 +3812,7 @@ def audit_experiment_library_biosample(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_library_RNA_size_range(value, system, excluded_types):
     '''
     An RNA library should have a size_range specified.
@@ -3762,6 +3844,7 @@ def audit_library_RNA_size_range(value, system, excluded_types):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_RNA_library_RIN(value, system, excluded_types):
     '''
     An RNA library should have a RIN specified.
@@ -3798,6 +3881,7 @@ def audit_RNA_library_RIN(value, system, excluded_types):
 # if experiment target is recombinant protein, the biosamples should have at
 # least one GM in the applied_modifications that is an insert with tagging purpose
 # and a target that matches experiment target
+@audit_frame(REPLICATES_FRAME)
 def audit_missing_modification(value, system, excluded_types):
     if value['status'] in ['deleted', 'replaced', 'revoked']:
         return
@@ -3844,6 +3928,7 @@ def audit_missing_modification(value, system, excluded_types):
     return
 
 
+@audit_frame(FILES_FRAME)
 def audit_experiment_mapped_read_length(value, system, files_structure):
     if value.get('assay_term_id') != 'OBI:0000716':  # not a ChIP-seq
         return
@@ -3887,6 +3972,7 @@ def audit_experiment_mapped_read_length(value, system, files_structure):
     return
 
 
+@audit_frame(REPLICATES_FRAME)
 def audit_experiment_nih_institutional_certification(value, system, excluded_types):
     '''
     Check if ENCODE4 experiment uses biosample without NIH institutional certification.
@@ -3970,8 +4056,7 @@ def get_control_bam(experiment_bam, pipeline_name, derived_from_fastqs, files_st
             return False
 
         control_bam = False
-        control_files_structure = create_files_mapping(control_fastq['dataset'].get('original_files'),
-                                                       files_structure.get('excluded_types'))
+        control_files_structure = files_structure.control(control_fastq['dataset'])
 
         for control_file in control_files_structure.get('alignments').values():
             if 'assembly' in control_file and 'assembly' in experiment_bam and \
@@ -4198,83 +4283,117 @@ def get_chip_seq_bam_read_depth(bam_file):
     return read_depth
 
 
-def create_files_mapping(files_list, excluded):
-    to_return = {'original_files': {},
-                 'fastq_files': {},
-                 'alignments': {},
-                 'unfiltered_alignments': {},
-                 'alignments_unfiltered_alignments': {},
-                 'transcriptome_alignments': {},
-                 'peaks_files': {},
-                 'gene_quantifications_files': {},
-                 'transcript_quantifications_files': {},
-                 'signal_files': {},
-                 'preferred_default_idr_peaks': {},
-                 'cpg_quantifications': {},
-                 'contributing_files': {},
-                 'excluded_types': excluded}
-    if files_list:
-        for file_object in files_list:
+# The bucket of a files structure holding the files of each (file_format,
+# output_type), None matching any file format.
+FILE_BUCKETS = {
+    ('fastq', 'reads'): 'fastq_files',
+    ('bam', 'alignments'): 'alignments',
+    ('bam', 'redacted alignments'): 'alignments',
+    ('bam', 'unfiltered alignments'): 'unfiltered_alignments',
+    ('bam', 'redacted unfiltered alignments'): 'unfiltered_alignments',
+    ('bam', 'transcriptome alignments'): 'transcriptome_alignments',
+    ('bed', 'peaks'): 'peaks_files',
+    ('bed', 'peaks and background as input for IDR'): 'peaks_files',
+    (None, 'gene quantifications'): 'gene_quantifications_files',
+    (None, 'transcript quantifications'): 'transcript_quantifications_files',
+    (None, 'signal of unique reads'): 'signal_files',
+    (None, 'optimal IDR thresholded peaks'): 'preferred_default_idr_peaks',
+    (None, 'methylation state at CpG'): 'cpg_quantifications',
+}
+
+FILE_BUCKET_NAMES = [
+    'original_files',
+    'fastq_files',
+    'alignments',
+    'unfiltered_alignments',
+    'alignments_unfiltered_alignments',
+    'transcriptome_alignments',
+    'peaks_files',
+    'gene_quantifications_files',
+    'transcript_quantifications_files',
+    'signal_files',
+    'preferred_default_idr_peaks',
+    'cpg_quantifications',
+    'contributing_files',
+]
+
+REPLICATE_TYPES = ('biological_replicates', 'technical_replicates')
+
+
+class FilesStructure(dict):
+    """
+    The files of an experiment by bucket, shared by the experiment audits.
+
+    Files are indexed by output type, file format and, for FASTQs, replicate
+    in one pass, and the files derived_from resolves to and the structures
+    of control datasets are kept once looked up, so helpers called for every
+    BAM of a large experiment don't scan the buckets again.
+    """
+
+    def __init__(self, files_list, excluded, contributing_files=None):
+        super().__init__((name, {}) for name in FILE_BUCKET_NAMES)
+        self['excluded_types'] = excluded
+        self.by_output_type = defaultdict(dict)
+        self.by_format = defaultdict(dict)
+        self.by_replicate = defaultdict(dict)
+        self._derived_from = {}
+        self._controls = {}
+        for file_object in files_list or ():
             if file_object['status'] not in excluded:
-                to_return['original_files'][file_object['@id']] = file_object
-
-                file_format = file_object.get('file_format')
-                file_output = file_object.get('output_type')
-
-                if file_format and file_format == 'fastq' and \
-                        file_output and file_output == 'reads':
-                    to_return['fastq_files'][file_object['@id']] = file_object
-
-                if file_format and file_format == 'bam' and \
-                        file_output and (
-                            file_output == 'alignments' or
-                            file_output and file_output == 'redacted alignments'):
-                    to_return['alignments'][file_object['@id']] = file_object
-
-                if file_format and file_format == 'bam' and \
-                        file_output and (
-                            file_output == 'unfiltered alignments' or
-                            file_output == 'redacted unfiltered alignments'):
-                    to_return['unfiltered_alignments'][file_object['@id']
-                                                       ] = file_object
-
-                if file_format and file_format == 'bam' and \
-                        file_output and file_output == 'transcriptome alignments':
-                    to_return['transcriptome_alignments'][file_object['@id']
-                                                          ] = file_object
-
-                if file_format and file_format == 'bed' and \
-                        file_output and file_output in ['peaks',
-                                                        'peaks and background as input for IDR']:
-                    to_return['peaks_files'][file_object['@id']] = file_object
-
-                if file_output and file_output == 'gene quantifications':
-                    to_return['gene_quantifications_files'][file_object['@id']
-                                                            ] = file_object
-
-                if file_output and file_output == 'transcript quantifications':
-                    to_return['transcript_quantifications_files'][file_object['@id']
-                                                            ] = file_object
-
-                if file_output and file_output == 'signal of unique reads':
-                    to_return['signal_files'][file_object['@id']] = file_object
-
-                if file_output and file_output == 'optimal IDR thresholded peaks':
-                    to_return['preferred_default_idr_peaks'][
-                        file_object['@id']
-                    ] = file_object
-                if (
-                    file_object.get('preferred_default')
-                    and file_output == 'IDR thresholded peaks'
-                ):
-                    to_return['preferred_default_idr_peaks'][
-                        file_object['@id']
-                    ] = file_object
-
-                if file_output and file_output == 'methylation state at CpG':
-                    to_return['cpg_quantifications'][file_object['@id']
-                                                     ] = file_object
-    return to_return
+                self._add(file_object)
+        self['contributing_files'] = get_contributing_files(contributing_files, excluded)
+
+    def _add(self, file_object):
+        file_id = file_object['@id']
+        file_format = file_object.get('file_format')
+        output_type = file_object.get('output_type')
+        self['original_files'][file_id] = file_object
+        self.by_output_type[output_type][file_id] = file_object
+        self.by_format[file_format][file_id] = file_object
+        for key in ((file_format, output_type), (None, output_type)):
+            if key in FILE_BUCKETS:
+                self[FILE_BUCKETS[key]][file_id] = file_object
+        if file_object.get('preferred_default') and output_type == 'IDR thresholded peaks':
+            self['preferred_default_idr_peaks'][file_id] = file_object
+        if (file_format, output_type) == ('fastq', 'reads'):
+            for replicate_type in REPLICATE_TYPES:
+                for replicate in file_object.get(replicate_type, ()):
+                    self.by_replicate[replicate_type, replicate][file_id] = file_object
+
+    def file(self, file_id):
+        """The original or else contributing file with that @id."""
+        return self['original_files'].get(file_id) or self['contributing_files'].get(file_id)
+
+    def derived_from(self, file_object, file_format):
+        """The files of file_format file_object is derived from."""
+        key = (file_object['@id'], file_format)
+        derived = self._derived_from.get(key)
+        if derived is None:
+            derived = self._derived_from[key] = [
+                derived_object
+                for derived_object in map(self.file, file_object.get('derived_from', ()))
+                if derived_object and derived_object.get('file_format') == file_format
+            ]
+        return derived
+
+    def replicate_fastqs(self, replicate_type, replicates):
+        """The FASTQs belonging to any of those replicates."""
+        fastqs = {}
+        for replicate in replicates:
+            fastqs.update(self.by_replicate.get((replicate_type, replicate), {}))
+        return list(fastqs.values())
+
+    def control(self, dataset):
+        """The files structure of a control dataset."""
+        structure = self._controls.get(dataset['@id'])
+        if structure is None:
+            structure = self._controls[dataset['@id']] = FilesStructure(
+                dataset.get('original_files'), self['excluded_types'])
+        return structure
+
+
+def create_files_mapping(files_list, excluded, contributing_files=None):
+    return FilesStructure(files_list, excluded, contributing_files)
 
 
 def get_contributing_files(files_list, excluded_types):
@@ -4305,19 +4424,11 @@ def get_derived_from_files_set(list_of_files, files_structure, file_format, obje
     derived_from_set = set()
     derived_from_objects_list = []
     for file_object in list_of_files:
-        if 'derived_from' in file_object:
-            for derived_id in file_object['derived_from']:
-                derived_object = files_structure.get(
-                    'original_files').get(derived_id)
-                if not derived_object:
-                    derived_object = files_structure.get(
-                        'contributing_files').get(derived_id)
-                if derived_object and \
-                   derived_object.get('file_format') == file_format and \
-                   derived_object.get('accession') not in derived_from_set:
-                    derived_from_set.add(derived_object.get('accession'))
-                    if object_flag:
-                        derived_from_objects_list.append(derived_object)
+        for derived_object in files_structure.derived_from(file_object, file_format):
+            if derived_object.get('accession') not in derived_from_set:
+                derived_from_set.add(derived_object.get('accession'))
+                if object_flag:
+                    derived_from_objects_list.append(derived_object)
     if object_flag:
         return derived_from_objects_list
     return list(derived_from_set)
@@ -4362,15 +4473,7 @@ def is_outdated_bams_replicate(bam_file, files_structure, assay_name):
         return True
 
 
-    rep_type_fastqs = [
-        f for f in files_structure.get('fastq_files').values()
-        if replicate_type in f
-    ]
-    rep_set = set(rep)
-    rep_fastqs = [
-        f for f in rep_type_fastqs
-        if any(e in rep_set for e in set(f[replicate_type]))
-    ]
+    rep_fastqs = files_structure.replicate_fastqs(replicate_type, set(rep))
 
     replicate_fastq_accessions = get_file_accessions(rep_fastqs)
     for file_object in rep_fastqs:
@@ -4531,72 +4634,28 @@ function_dispatcher_with_files = {
 }
 
 
-@audit_checker(
-    'Experiment',
-    frame=[
-        'biosample_ontology',
-        'award',
-        'target',
-        'replicates',
-        'replicates.library',
-        'replicates.library.spikeins_used',
-        'replicates.library.biosample',
-        'replicates.library.biosample.biosample_ontology',
-        'replicates.library.biosample.applied_modifications',
-        'replicates.library.biosample.applied_modifications.modified_site_by_target_id',
-        'replicates.library.biosample.donor',
-        'replicates.libraries',
-        'replicates.libraries.spikeins_used',
-        'replicates.libraries.biosample',
-        'replicates.libraries.biosample.applied_modifications',
-        'replicates.libraries.biosample.applied_modifications.modified_site_by_target_id',
-        'replicates.libraries.biosample.donor',
-        'replicates.antibody',
-        'replicates.antibody.targets',
-        'replicates.antibody.lot_reviews',
-        'possible_controls',
-        'possible_controls.biosample_ontology',
-        'possible_controls.original_files',
-        'possible_controls.original_files.quality_metrics',
-        'possible_controls.original_files.platform',
-        'possible_controls.original_files.analysis_step_version',
-        'possible_controls.original_files.analysis_step_version.analysis_step',
-        'possible_controls.original_files.analysis_step_version.analysis_step.pipelines',
-        'possible_controls.target',
-        'possible_controls.replicates',
-        'possible_controls.replicates.antibody',
-        'contributing_files',
-        'contributing_files.quality_metrics',
-        'original_files',
-        'original_files.award',
-        'original_files.quality_metrics',
-        'original_files.platform',
-        'original_files.replicate',
-        'original_files.analysis_step_version',
-        'original_files.analysis_step_version.analysis_step',
-        'original_files.analysis_step_version.analysis_step.pipelines',
-        'original_files.analysis_step_version.software_versions',
-        'original_files.analysis_step_version.software_versions.software'
-    ])
+def excluded_file_statuses(status):
+    """Statuses of the files of an experiment with status which aren't audited."""
+    if status == 'revoked':
+        return []
+    if status == 'archived':
+        return ['revoked']
+    return ['revoked', 'archived']
+
+
+@audit_checker('Experiment', frame='object')
 def audit_experiment(value, system):
-    excluded_files = ['revoked', 'archived']
-    if value.get('status') == 'revoked':
-        excluded_files = []
-    if value.get('status') == 'archived':
-        excluded_files = ['revoked']
-    files_structure = create_files_mapping(
-        value.get('original_files'), excluded_files)
-    files_structure['contributing_files'] = get_contributing_files(
-        value.get('contributing_files'), excluded_files)
-
-    for function_name in function_dispatcher_with_files.keys():
-        yield from function_dispatcher_with_files[function_name](value, system, files_structure)
+    excluded_files = excluded_file_statuses(value.get('status'))
 
-    excluded_types = excluded_files + ['deleted', 'replaced']
-    for function_name in function_dispatcher_without_files.keys():
-        yield from function_dispatcher_without_files[function_name](value, system, excluded_types)
+    def files_structure(value):
+        return (create_files_mapping(
+            value.get('original_files'), excluded_files, value.get('contributing_files')),)
 
-    return
+    excluded_types = excluded_files + ['deleted', 'replaced']
+    yield from dispatch_framed([
+        (function_dispatcher_with_files, files_structure),
+        (function_dispatcher_without_files, lambda value: (excluded_types,)),
+    ], system, EXPERIMENT_FRAME)
 
 
 #  def audit_experiment_control_out_of_date_analysis(value, system):
@@ -6,6 +6,7 @@ from .formatter import (
     audit_link,
     path_to_text,
 )
+from ..audit_cache import audit_cache_key
 
 from .item import STATUS_LEVEL
 
@@ -523,6 +524,13 @@ function_dispatcher = {
 }
 
 
+def file_audit_cache_key(value, system):
+    # audit_paired_with looks at rev links, which aren't part of the frame.
+    if value.get('paired_end') == '1':
+        return sorted(str(uuid) for uuid in system['context'].get_rev_links('paired_with'))
+    return None
+
+
 @audit_checker('File',
                frame=['derived_from',
                       'replicate',
@@ -544,6 +552,7 @@ function_dispatcher = {
                       'matching_md5sum',
                       ]
                )
+@audit_cache_key(file_audit_cache_key)
 def audit_file(value, system):
     for function_name in function_dispatcher.keys():
         for failure in function_dispatcher[function_name](value, system):
@@ -5,8 +5,9 @@ from snovault import (
 from snovault import (
     UPGRADER,
 )
-from snovault.schema_utils import validate
 from snovault.util import simple_path_ids
+from ..audit_cache import audit_cache_key
+from ..schema_cache import SCHEMA_CACHE
 from .formatter import (
     audit_link,
     path_to_text,
@@ -14,7 +15,13 @@ from .formatter import (
 )
 
 
+def schema_audit_cache_key(value, system):
+    # linkSubmitsFor makes link errors depend on the submitter.
+    return system['request'].authenticated_userid
+
+
 @audit_checker('Item', frame='object')
+@audit_cache_key(schema_audit_cache_key)
 def audit_item_schema(value, system):
     context = system['context']
     registry = system['registry']
@@ -41,7 +48,8 @@ def audit_item_schema(value, system):
         properties['schema_version'] = target_version
 
     properties['uuid'] = str(context.uuid)
-    validated, errors = validate(context.schema, properties, properties)
+    validated, errors = registry[SCHEMA_CACHE].validate(
+        context.schema, properties, properties)
     for error in errors:
         category = 'validation error'
         path = list(error.path)
@@ -57,6 +57,43 @@ pipelines_with_read_depth = {
     }
 
 
+# Replicate concordance of the IDR thresholded peaks of ChIP-seq.
+idr_thresholds = {
+    'rescue_ratio': 2,
+    'self_consistency_ratio': 2,
+}
+
+
+# Replicate concordance of the gene quantifications of RNA-seq, by the
+# replication type of the experiment.
+spearman_thresholds = {
+    'isogenic': 0.9,
+    'anisogenic': 0.8,
+}
+
+
+replicate_metric_thresholds = {
+    'microRNA-seq pipeline': {
+        'upper_limit_reads_mapped': 5000000,
+        'lower_limit_reads_mapped': 3000000,
+        'upper_limit_spearman': 0.85,
+        'lower_limit_spearman': 0.8,
+        'upper_limit_expressed_mirnas': 300,
+        'lower_limit_expressed_mirnas': 200,
+    },
+    'Long read RNA-seq pipeline': {
+        'upper_limit_flnc': 600000,
+        'lower_limit_flnc': 400000,
+        'upper_limit_mapping_rate': 0.9,
+        'lower_limit_mapping_rate': 0.6,
+        'upper_limit_spearman': 0.8,
+        'lower_limit_spearman': 0.6,
+        'upper_limit_genes_detected': 8000,
+        'lower_limit_genes_detected': 4000,
+    },
+}
+
+
 special_assays_with_read_depth = {
     'shRNA knockdown followed by RNA-seq': 10000000,
     'siRNA knockdown followed by RNA-seq': 10000000,
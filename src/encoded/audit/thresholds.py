@@ -0,0 +1,148 @@
+"""
+Threshold rules of the data standards audits.
+
+Each rule returns the audit level of a quality metric value, or COMPLIANT.
+The scalar rules are used by the audit checkers of experiment.py and the
+rules ending in _levels apply the same thresholds to NumPy arrays of the
+values of many quality metrics at once, for the standards dashboard. Missing
+values are NaN in arrays and never fail a standard, as in the checkers.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+COMPLIANT = 0
+WARNING = 40
+NOT_COMPLIANT = 50
+ERROR = 60
+
+LEVEL_NAMES = {
+    WARNING: 'WARNING',
+    NOT_COMPLIANT: 'NOT_COMPLIANT',
+    ERROR: 'ERROR',
+}
+
+READ_DEPTH_CATEGORIES = {
+    WARNING: 'low read depth',
+    NOT_COMPLIANT: 'insufficient read depth',
+    ERROR: 'extremely low read depth',
+}
+
+
+def _array(values):
+    return numpy.asarray(values, dtype=float)
+
+
+def read_depth_level(read_depth, marks):
+    """Below marks['recommended'], ['minimal'] and ['low'] in turn."""
+    if read_depth >= marks['recommended']:
+        return COMPLIANT
+    if read_depth >= marks['minimal']:
+        return WARNING
+    if read_depth >= marks['low']:
+        return NOT_COMPLIANT
+    return ERROR
+
+
+def read_depth_levels(read_depths, marks):
+    read_depths = _array(read_depths)
+    levels = numpy.select(
+        [
+            read_depths < marks['low'],
+            read_depths < marks['minimal'],
+            read_depths < marks['recommended'],
+        ],
+        [ERROR, NOT_COMPLIANT, WARNING],
+        COMPLIANT,
+    )
+    return numpy.where(numpy.isnan(read_depths), COMPLIANT, levels)
+
+
+def dual_threshold_level(value, upper_limit, lower_limit):
+    """Below upper_limit is a warning and below lower_limit not compliant."""
+    if not value or value >= upper_limit:
+        return COMPLIANT
+    if value < lower_limit:
+        return NOT_COMPLIANT
+    return WARNING
+
+
+def dual_threshold_levels(values, upper_limit, lower_limit):
+    values = _array(values)
+    # Zero counts as missing, as in the checker.
+    failing = (values != 0) & (values < upper_limit)
+    return numpy.select(
+        [failing & (values < lower_limit), failing],
+        [NOT_COMPLIANT, WARNING],
+        COMPLIANT,
+    )
+
+
+def idr_level(rescue_ratio, self_consistency_ratio, rescue, self_consistency):
+    """Both IDR ratios above their threshold is not compliant, one a warning."""
+    above = (rescue_ratio > rescue) + (self_consistency_ratio > self_consistency)
+    return (COMPLIANT, WARNING, NOT_COMPLIANT)[above]
+
+
+def idr_levels(rescue_ratios, self_consistency_ratios, rescue, self_consistency):
+    rescue_ratios = _array(rescue_ratios)
+    self_consistency_ratios = _array(self_consistency_ratios)
+    rescue_above = rescue_ratios > rescue
+    self_above = self_consistency_ratios > self_consistency
+    levels = numpy.select(
+        [rescue_above & self_above, rescue_above ^ self_above],
+        [NOT_COMPLIANT, WARNING],
+        COMPLIANT,
+    )
+    # The checker skips metrics without both ratios.
+    missing = numpy.isnan(rescue_ratios) | numpy.isnan(self_consistency_ratios)
+    return numpy.where(missing, COMPLIANT, levels)
+
+
+def mad_level(mad, replication_type):
+    """MAD of log ratios above 0.2 for isogenic or 0.5 for anisogenic replicates."""
+    if replication_type == 'isogenic' and mad > 0.2:
+        return WARNING if mad < 0.5 else NOT_COMPLIANT
+    if replication_type == 'anisogenic' and mad > 0.5:
+        return WARNING
+    return COMPLIANT
+
+
+def mad_levels(mads, replication_types):
+    mads = _array(mads)
+    replication_types = numpy.asarray(replication_types)
+    isogenic = (replication_types == 'isogenic') & (mads > 0.2)
+    anisogenic = (replication_types == 'anisogenic') & (mads > 0.5)
+    return numpy.select(
+        [isogenic & (mads < 0.5), isogenic, anisogenic],
+        [WARNING, NOT_COMPLIANT, WARNING],
+        COMPLIANT,
+    )
+
+
+def spearman_threshold(replication_type, isogenic_threshold, anisogenic_threshold):
+    return {
+        'isogenic': isogenic_threshold,
+        'anisogenic': anisogenic_threshold,
+    }.get(replication_type)
+
+
+def spearman_level(correlation, replication_type, isogenic_threshold, anisogenic_threshold):
+    """Spearman correlation below the threshold of the replication type."""
+    threshold = spearman_threshold(replication_type, isogenic_threshold, anisogenic_threshold)
+    if threshold is not None and correlation < threshold:
+        return WARNING
+    return COMPLIANT
+
+
+def spearman_levels(correlations, replication_types, isogenic_threshold, anisogenic_threshold):
+    correlations = _array(correlations)
+    replication_types = numpy.asarray(replication_types)
+    thresholds = numpy.select(
+        [replication_types == 'isogenic', replication_types == 'anisogenic'],
+        [isogenic_threshold, anisogenic_threshold],
+        numpy.nan,
+    )
+    return numpy.where(correlations < thresholds, WARNING, COMPLIANT)
@@ -0,0 +1,347 @@
+from hashlib import sha1
+from pyramid.view import view_config
+from snovault import (
+    AUDITOR,
+    AuditFailure,
+    CONNECTION,
+    DBSESSION,
+)
+from snovault.storage import (
+    CurrentPropertySheet,
+    Link,
+)
+from sqlalchemy import func
+from sqlalchemy.util import LRUCache
+from snovault.util import get_root_request
+from .types.item_loader import recorded_dependencies
+import json
+import threading
+
+
+AUDIT_CACHE = 'audit_cache'
+
+
+def includeme(config):
+    config.add_route('_audit_cache', '/_audit_cache')
+    config.scan(__name__)
+    capacity = int(config.registry.settings.get('audit_cache.capacity', 0))
+    if not capacity:
+        return
+    cache = config.registry[AUDIT_CACHE] = AuditCache(capacity)
+    # Run after every audit checker has been registered.
+    config.action(
+        ('audit_cache',),
+        cache.instrument,
+        (config.registry[AUDITOR],),
+        order=10,
+    )
+
+
+def audit_cache_key(key):
+    """
+    Declare what else than its framed value and item an audit checker reads.
+
+    key(value, system) must return a JSON serializable value which changes
+    whenever the checker could give a different result, such as the rev
+    links it looks at.
+    """
+    def decorate(checker):
+        checker.audit_cache_key = key
+        return checker
+    return decorate
+
+
+def audit_frame(frame):
+    """
+    Declare the frame paths a dispatched audit function reads.
+
+    With the audit cache enabled, dispatch_framed remembers the failures of
+    the functions declaring the same frame together, so they are only run
+    again once an item embedded in that frame changes.
+    """
+    def decorate(function):
+        function.audit_frame = tuple(sorted(frame))
+        return function
+    return decorate
+
+
+def frame_uri(path, frame):
+    # The uri the auditor embeds for a frame list.
+    return '%s@@expand?expand=%s' % (path, '&expand='.join(frame))
+
+
+def _count(request, name, value):
+    stats = getattr(get_root_request() or request, '_stats', None)
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + value
+
+
+def _run_functions(functions, value, system, results):
+    extra = {}
+    for key, function, arguments in functions:
+        dispatcher = key[0]
+        if dispatcher not in extra:
+            extra[dispatcher] = arguments(value)
+        results[key] = failures = []
+        failures.extend(function(value, system, *extra[dispatcher]) or ())
+
+
+def dispatch_framed(dispatchers, system, frame):
+    """
+    Run the functions of function_dispatcher dictionaries on one embed.
+
+    dispatchers is a list of (dispatcher, arguments) pairs, where
+    arguments(framed_value) returns the extra arguments passed to every
+    function of the dispatcher. Without the audit cache every function runs
+    on a single embed of frame.
+
+    With the audit cache enabled, functions are grouped by the frame they
+    declare with audit_frame, or frame if they declare none, and the failures
+    of a group are reused until one of the items embedded for it changes or
+    gains or loses rev links. The union of the frames of the groups missing
+    from the cache is embedded once for all of them. audit_frame_bytes_saved
+    estimates the bytes not embedded thanks to the cache from the size of the
+    embeds the reused failures came from.
+
+    Failures are yielded in the order of the dispatchers.
+    """
+    request = system['request']
+    cache = request.registry.get(AUDIT_CACHE)
+    functions = [
+        ((i, name), function, arguments)
+        for i, (dispatcher, arguments) in enumerate(dispatchers)
+        for name, function in dispatcher.items()
+    ]
+    frame = tuple(sorted(frame))
+    results = {}
+    try:
+        if cache is None:
+            value = request.embed(frame_uri(system['path'], frame))
+            _run_functions(functions, value, system, results)
+        else:
+            groups = {}
+            for function in functions:
+                key = getattr(function[1], 'audit_frame', None) or frame
+                groups.setdefault(key, []).append(function)
+            missing = {}
+            reused = 0
+            for group_frame, group in groups.items():
+                key = (frame_uri(system['path'], group_frame), tuple(f[0] for f in group))
+                entry = cache.get(request, key)
+                if entry is None:
+                    missing[key] = (group_frame, group)
+                    continue
+                results.update(entry['failures'])
+                reused = max(reused, entry['bytes'])
+            size = 0
+            if missing:
+                union = tuple(sorted({
+                    path for group_frame, group in missing.values() for path in group_frame
+                }))
+                with recorded_dependencies(request) as (embedded, linked):
+                    value = request.embed(frame_uri(system['path'], union))
+                    _run_functions(
+                        [f for group_frame, group in missing.values() for f in group],
+                        value, system, results)
+                size = len(json.dumps(value, separators=(',', ':')))
+                cache.count_frame(request, 'audit_frame_bytes', size)
+                for key, (group_frame, group) in missing.items():
+                    failures = {f[0]: tuple(results[f[0]]) for f in group}
+                    cache.set(request, key, embedded, linked, failures=failures, bytes=size)
+            if reused > size:
+                cache.count_frame(request, 'audit_frame_bytes_saved', reused - size)
+    finally:
+        # Failures found before an error are still reported.
+        for key, function, arguments in functions:
+            yield from results.get(key, ())
+
+
+def _hash(value):
+    return sha1(
+        json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    ).hexdigest()
+
+
+def _replay(failures, error):
+    yield from failures
+    raise error
+
+
+class CachedAuditChecker(object):
+    """Wraps an audit checker to reuse its failures for unchanged input."""
+
+    def __init__(self, checker, cache):
+        self.checker = checker
+        self.cache = cache
+        self.__name__ = checker.__name__
+
+    def __call__(self, value, system):
+        return self.cache.run(self.checker, value, system)
+
+
+class AuditCache(object):
+    """
+    Process wide cache of the failures of audit checkers.
+
+    Most reindexes of an item come from edits to items embedded in it which
+    don't change anything its audit checkers look at. Failures are reused
+    when the hash of the framed value, the tid of the audited item and any
+    audit_cache_key of the checker are unchanged, and none of the items the
+    checker embedded by itself has been modified or gained or lost rev links
+    since.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.frame_bytes = {'audit_frame_bytes': 0, 'audit_frame_bytes_saved': 0}
+        self._cache = LRUCache(capacity)
+        self._lock = threading.Lock()
+
+    def instrument(self, auditor):
+        for item_type, checkers in auditor.type_checkers.items():
+            auditor.type_checkers[item_type] = [
+                (
+                    order,
+                    checker if isinstance(checker, CachedAuditChecker)
+                    else CachedAuditChecker(checker, self),
+                    condition,
+                    frame,
+                )
+                for order, checker, condition, frame in checkers
+            ]
+
+    def _key(self, checker, value, system):
+        context = system.get('context')
+        extra = None
+        key = getattr(checker, 'audit_cache_key', None)
+        if key is not None:
+            extra = key(value, system)
+        return (
+            checker.__module__,
+            checker.__name__,
+            system['path'],
+            getattr(context, 'tid', None),
+            _hash([value, extra]),
+        )
+
+    def _dependencies(self, request, uuids):
+        """
+        Return the tid of each item and the rev links to it.
+
+        Adding a file or quality metric leaves the tid of the items it links
+        to unchanged but not their calculated rev link properties. Rev links
+        are kept with the last propsheet of their source, so a linking item
+        whose status makes it filtered out is noticed once it is edited.
+        """
+        if not uuids:
+            return {}
+        conn = request.registry[CONNECTION]
+        items = ((uuid, conn.get_by_uuid(uuid)) for uuid in uuids)
+        tids = {uuid: item.tid for uuid, item in items if item is not None}
+        if not tids:
+            return {}
+        session = request.registry[DBSESSION]
+        query = session.query(
+            Link.target_rid, Link.rel, Link.source_rid, func.max(CurrentPropertySheet.sid),
+        ).join(
+            CurrentPropertySheet, CurrentPropertySheet.rid == Link.source_rid,
+        ).filter(
+            Link.target_rid.in_(list(tids)),
+        ).group_by(
+            Link.target_rid, Link.rel, Link.source_rid,
+        )
+        rev_links = {}
+        for target, rel, source, sid in query:
+            rev_links.setdefault(str(target), []).append((rel, str(source), sid))
+        return {
+            uuid: (tid, tuple(sorted(rev_links.get(str(uuid), ()))))
+            for uuid, tid in tids.items()
+        }
+
+    def get(self, request, key):
+        """Return the entry for key if none of its dependencies changed."""
+        entry = self._cache.get(key)
+        if entry is not None:
+            dependencies = entry['dependencies']
+            if self._dependencies(request, dependencies) == dependencies:
+                with self._lock:
+                    self.hits += 1
+                request._embedded_uuids.update(dependencies)
+                request._linked_uuids.update(entry['linked'])
+                return entry
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, request, key, embedded, linked, **values):
+        self._cache[key] = dict(
+            values,
+            dependencies=self._dependencies(request, embedded),
+            linked=frozenset(linked),
+        )
+
+    def count_frame(self, request, name, size):
+        with self._lock:
+            self.frame_bytes[name] += size
+        _count(request, name, size)
+
+    def run(self, checker, value, system):
+        request = system['request']
+        key = self._key(checker, value, system)
+        entry = self.get(request, key)
+        if entry is not None:
+            return list(entry['failures'])
+        failures = []
+        with recorded_dependencies(request) as (embedded, linked):
+            try:
+                result = checker(value, system)
+                if isinstance(result, AuditFailure):
+                    result = [result]
+            except AuditFailure as e:
+                # Raised by the checker itself, reported like a failure.
+                result = [e]
+            except Exception as error:
+                return _replay(failures, error)
+            try:
+                failures.extend(result or ())
+            except Exception as error:
+                # Let the auditor report the error, including an AuditFailure
+                # raised while iterating, after the failures found until
+                # then, without remembering anything.
+                return _replay(failures, error)
+        self.set(request, key, embedded, linked, failures=tuple(failures))
+        return failures
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'size': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'frame_bytes': self.frame_bytes['audit_frame_bytes'],
+                'frame_bytes_saved': self.frame_bytes['audit_frame_bytes_saved'],
+            }
+
+
+@view_config(route_name='_audit_cache', request_method='GET', permission='index')
+def audit_cache_stats(request):
+    cache = request.registry.get(AUDIT_CACHE)
+    if cache is None:
+        return {'status': 'disabled'}
+    return dict(cache.stats(), status='enabled')
+
+
+@view_config(route_name='_audit_cache', request_method='DELETE', permission='index')
+def audit_cache_clear(request):
+    cache = request.registry.get(AUDIT_CACHE)
+    if cache is not None:
+        cache.clear()
+    return {'status': 'success'}
@@ -0,0 +1,236 @@
+"""
+Second indexing pass running the audits of audit heavy item types.
+
+The primary indexer renders items of the types in audit_indexer.deferred_types
+without auditing them. Their documents keep the audits indexed before and are
+marked audit_pending. The audit indexer, a listener of its own like the region
+indexer, finds marked documents and audits them across a pool of processes
+separate from the indexing workers, sized by audit_indexer.processes and
+audit_indexer.chunk_size. Audits are written back with the uuids they embedded
+at the version the document was read at, so a document indexed again meanwhile
+is left for the next cycle.
+"""
+from elasticsearch.exceptions import (
+    ConflictError,
+    NotFoundError,
+)
+from elasticsearch.helpers import scan
+from multiprocessing import get_context
+from multiprocessing.pool import Pool
+from pyramid.decorator import reify
+from pyramid.threadlocal import get_current_request
+from pyramid.view import view_config
+from snovault import (
+    Item,
+    TYPES,
+)
+from snovault.auditor import item_view_audit
+from snovault.elasticsearch.indexer import get_current_xmin
+from snovault.elasticsearch.interfaces import (
+    APP_FACTORY,
+    ELASTIC_SEARCH,
+)
+from snovault.elasticsearch.mpindexer import (
+    initializer,
+    snapshot,
+)
+from snovault.indexing_views import item_index_data
+from .types.item_loader import recorded_dependencies
+import logging
+import time
+
+
+log = logging.getLogger(__name__)
+
+AUDIT_INDEXER = 'audit_indexer'
+DEFERRED_AUDIT_TYPES = 'deferred_audit_types'
+
+
+def includeme(config):
+    config.add_route('index_audit', '/index_audit')
+    config.scan(__name__)
+    registry = config.registry
+    registry[DEFERRED_AUDIT_TYPES] = frozenset(
+        registry.settings.get('audit_indexer.deferred_types', '').split())
+    if registry.settings.get('auditindexer') and not registry.settings.get('indexer_worker'):
+        registry[AUDIT_INDEXER] = AuditIndexer(registry)
+
+
+def is_deferred(context, request):
+    deferred = request.registry.get(DEFERRED_AUDIT_TYPES)
+    if not deferred:
+        return False
+    return not deferred.isdisjoint([context.type_info.name] + context.type_info.base_types)
+
+
+def pending_audit(request, item_type, uuid):
+    """The audit indexed for an item, kept until it is audited again."""
+    try:
+        hit = request.registry[ELASTIC_SEARCH].get(
+            index=item_type, doc_type=item_type, id=uuid, _source=['audit'])
+    except NotFoundError:
+        return {}
+    return hit['_source'].get('audit', {})
+
+
+@view_config(context=Item, name='index-data', permission='index', request_method='GET')
+def item_index_data_deferred(context, request):
+    if not is_deferred(context, request):
+        return item_index_data(context, request)
+    request._audit_deferred = True
+    document = item_index_data(context, request)
+    document['audit_pending'] = True
+    return document
+
+
+@view_config(context=Item, permission='audit', request_method='GET', name='audit')
+def item_view_audit_deferred(context, request):
+    if not getattr(request.__parent__, '_audit_deferred', False):
+        return item_view_audit(context, request)
+    return {
+        '@id': request.resource_path(context),
+        'audit': pending_audit(request, context.type_info.item_type, str(context.uuid)),
+    }
+
+
+def pending_documents(es, indices):
+    query = {'query': {'term': {'audit_pending': True}}}
+    for hit in scan(es, index=','.join(indices), query=query, _source=False, version=True):
+        yield hit['_index'], hit['_id'], hit['_version']
+
+
+def audit_object(request, item_type, uuid, version):
+    """Audit an item and write its audit into its document at version."""
+    es = request.registry[ELASTIC_SEARCH]
+    info = {'uuid': uuid, 'item_type': item_type, 'error': None, 'skipped': False}
+    start = time.time()
+    try:
+        with recorded_dependencies(request) as (embedded, linked):
+            audit = request.embed('/%s/@@audit' % uuid)['audit']
+    except Exception as e:
+        log.error('Error auditing %s', uuid, exc_info=True)
+        info['error'] = {'uuid': uuid, 'error_message': repr(e)}
+        return info
+    try:
+        hit = es.get(index=item_type, doc_type=item_type, id=uuid)
+    except NotFoundError:
+        hit = None
+    if hit is None or hit['_version'] != version:
+        info['skipped'] = True
+        return info
+    document = hit['_source']
+    document.pop('audit_pending', None)
+    document['audit'] = audit
+    document['embedded_uuids'] = sorted(set(document['embedded_uuids']) | embedded)
+    document['linked_uuids'] = sorted(set(document['linked_uuids']) | linked)
+    try:
+        es.index(
+            index=item_type, doc_type=item_type, body=document, id=uuid,
+            version=version, version_type='external_gte', request_timeout=30,
+        )
+    except ConflictError:
+        log.warning('Conflict writing audit of %s at version %d', uuid, version)
+        info['skipped'] = True
+    info['run_time'] = time.time() - start
+    return info
+
+
+def audit_object_in_snapshot(args):
+    item_type, uuid, version, xmin = args
+    with snapshot(xmin, None):
+        return audit_object(get_current_request(), item_type, uuid, version)
+
+
+class AuditIndexer(object):
+    """Audits documents marked audit_pending across a pool of processes."""
+
+    maxtasks = 100  # Recycle workers, like the indexer, to bound memory.
+
+    def __init__(self, registry):
+        settings = registry.settings
+        self.registry = registry
+        self.processes = int(settings.get('audit_indexer.processes', 0)) or None
+        self.chunk_size = int(settings.get('audit_indexer.chunk_size', 16))
+        self.batch_size = int(settings.get('audit_indexer.batch_size', 10000))
+        self.initargs = (registry[APP_FACTORY], settings)
+        # Versions of documents whose audit failed, not retried until
+        # they are indexed again.
+        self.failed = {}
+
+    @reify
+    def pool(self):
+        return Pool(
+            processes=self.processes,
+            initializer=initializer,
+            initargs=self.initargs,
+            maxtasksperchild=self.maxtasks,
+            context=get_context('forkserver'),
+        )
+
+    def indices(self):
+        types = self.registry[TYPES]
+        return sorted({
+            types[name].item_type
+            for deferred in self.registry[DEFERRED_AUDIT_TYPES]
+            for name in types[deferred].subtypes
+        })
+
+    def pending(self):
+        es = self.registry[ELASTIC_SEARCH]
+        pending = []
+        for document in pending_documents(es, self.indices()):
+            item_type, uuid, version = document
+            if self.failed.get(uuid) == version:
+                continue
+            pending.append(document)
+            if len(pending) >= self.batch_size:
+                break
+        return pending
+
+    def update_audits(self, pending, xmin):
+        tasks = [(item_type, uuid, version, xmin) for item_type, uuid, version in pending]
+        versions = {uuid: version for item_type, uuid, version in pending}
+        infos = []
+        try:
+            for i, info in enumerate(
+                    self.pool.imap_unordered(audit_object_in_snapshot, tasks, self.chunk_size)):
+                infos.append(info)
+                if info['error'] is not None:
+                    self.failed[info['uuid']] = versions[info['uuid']]
+                else:
+                    self.failed.pop(info['uuid'], None)
+                if (i + 1) % 1000 == 0:
+                    log.info('Audited %d', i + 1)
+        except:
+            self.shutdown()
+            raise
+        return infos
+
+    def shutdown(self):
+        if 'pool' in self.__dict__:
+            self.pool.terminate()
+            self.pool.join()
+            del self.pool
+
+
+@view_config(route_name='index_audit', request_method='POST', permission='index')
+def index_audit(request):
+    indexer = request.registry.get(AUDIT_INDEXER)
+    if indexer is None or not request.registry[DEFERRED_AUDIT_TYPES]:
+        return {'status': 'disabled'}
+    pending = indexer.pending()
+    result = {'status': 'waiting', 'pending': len(pending)}
+    if not pending or request.json.get('dry_run', False):
+        return result
+    start = time.time()
+    infos = indexer.update_audits(pending, get_current_xmin(request))
+    errors = [info['error'] for info in infos if info['error'] is not None]
+    result.update(
+        status='done',
+        indexed=sum(1 for info in infos if not info['error'] and not info['skipped']),
+        skipped=sum(1 for info in infos if info['skipped']),
+        cycle_took=time.time() - start,
+    )
+    if errors:
+        result['errors'] = errors
+    return result
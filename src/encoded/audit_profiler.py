@@ -0,0 +1,217 @@
+from pyramid.httpexceptions import HTTPBadRequest
+from pyramid.settings import asbool
+from pyramid.view import view_config
+from snovault import (
+    AUDITOR,
+    AuditFailure,
+)
+from snovault.util import get_root_request
+import sys
+import threading
+import time
+
+
+AUDIT_PROFILER = 'audit_profiler'
+
+# Modules holding the function_dispatcher dictionaries of the audit checkers.
+AUDIT_PACKAGE = 'encoded.audit'
+
+SORT_FIELDS = ('count', 'total_time', 'max_time', 'failures', 'errors')
+
+
+def includeme(config):
+    config.add_route('_audit_functions', '/_audit_functions')
+    config.scan(__name__)
+    settings = config.registry.settings
+    if not asbool(settings.get('audit_profiling', False)):
+        return
+    top = int(settings.get('audit_profiling.top', 10))
+    profiler = config.registry[AUDIT_PROFILER] = AuditProfiler(top)
+    config.add_request_method(lambda request: {}, '_audit_function_stats', reify=True)
+    # X-Stats is written by the stats tween once the tweens under it return.
+    config.add_tween(
+        '.audit_profiler.audit_function_stats_tween_factory',
+        under='snovault.stats.stats_tween_factory')
+    # Run after every audit checker has been registered and cached.
+    config.action(
+        ('audit_profiler',),
+        profiler.instrument,
+        (config.registry[AUDITOR],),
+        order=11,
+    )
+
+
+def _time():
+    return int(time.time() * 1e6)
+
+
+class TimedAuditFunction(object):
+    """
+    Wraps an audit checker or dispatched audit function to time it.
+
+    The profiler is looked up from the request of the audit, so functions
+    shared between applications only report to those which profile audits.
+    The function is called as soon as the wrapper is, so an AuditFailure it
+    raises reaches the auditor as a failure and one raised while iterating
+    as an error, the same as without the profiler.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.__name__ = function.__name__
+
+    def __getattr__(self, name):
+        # Attributes declared on the function, such as its audit_frame.
+        return getattr(self.function, name)
+
+    def __call__(self, value, system, *args):
+        profiler = system['request'].registry.get(AUDIT_PROFILER)
+        if profiler is None:
+            return self.function(value, system, *args)
+        begin = _time()
+        try:
+            result = self.function(value, system, *args)
+        except AuditFailure:
+            profiler.record(self.__name__, _time() - begin, failures=1)
+            raise
+        except Exception:
+            profiler.record(self.__name__, _time() - begin, error=True)
+            raise
+        return self._timed(profiler, begin, result)
+
+    def _timed(self, profiler, begin, result):
+        failures = 0
+        error = False
+        try:
+            if isinstance(result, AuditFailure):
+                result = [result]
+            for failure in result or ():
+                failures += 1
+                yield failure
+        except Exception:
+            error = True
+            raise
+        finally:
+            profiler.record(self.__name__, _time() - begin, failures, error)
+
+
+class AuditProfiler(object):
+    """
+    Call counts, latency and failure counts of every audit function.
+
+    Both audit checkers and the functions of their function_dispatcher
+    dictionaries are timed, so the time of a checker includes that of the
+    functions it dispatches to. Times are in microseconds like the other
+    X-Stats values.
+    """
+
+    def __init__(self, top=10):
+        self.top = top
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, auditor):
+        for item_type, checkers in auditor.type_checkers.items():
+            auditor.type_checkers[item_type] = [
+                (order, self._wrap(checker), condition, frame)
+                for order, checker, condition, frame in checkers
+            ]
+        for name, module in list(sys.modules.items()):
+            if module is None or not name.startswith(AUDIT_PACKAGE + '.'):
+                continue
+            for attr, dispatcher in list(vars(module).items()):
+                if attr.startswith('function_dispatcher') and isinstance(dispatcher, dict):
+                    for key, function in dispatcher.items():
+                        dispatcher[key] = self._wrap(function)
+
+    def _wrap(self, function):
+        if isinstance(function, TimedAuditFunction):
+            return function
+        return TimedAuditFunction(function)
+
+    def _add(self, timings, name, elapsed, failures, error):
+        timing = timings.setdefault(name, [0, 0, 0, 0, 0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+        timing[3] += failures
+        timing[4] += int(error)
+
+    def record(self, name, elapsed, failures=0, error=False):
+        with self._lock:
+            self._add(self.timings, name, elapsed, failures, error)
+        request = get_root_request()
+        if request is not None:
+            self._add(request._audit_function_stats, name, elapsed, failures, error)
+
+    def ranking(self, timings, sort='total_time', limit=None):
+        index = SORT_FIELDS.index(sort)
+        ranked = sorted(timings.items(), key=lambda item: item[1][index], reverse=True)
+        return [
+            dict(zip(('name',) + SORT_FIELDS, [name] + timing))
+            for name, timing in ranked[:limit]
+        ]
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(value) for key, value in self.timings.items()}
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+
+
+def add_audit_function_stats(request):
+    profiler = request.registry.get(AUDIT_PROFILER)
+    stats = getattr(request, '_stats', None)
+    if profiler is None or stats is None:
+        return
+    timings = request._audit_function_stats
+    if not timings:
+        return
+    # The index listener keeps these with the results of each indexing run.
+    for entry in profiler.ranking(timings, limit=profiler.top):
+        key = 'audit.{}'.format(entry['name'])
+        stats[key + '_count'] = entry['count']
+        stats[key + '_time'] = entry['total_time']
+        stats[key + '_max_time'] = entry['max_time']
+        stats[key + '_failures'] = entry['failures']
+        stats[key + '_errors'] = entry['errors']
+
+
+def audit_function_stats_tween_factory(handler, registry):
+
+    def audit_function_stats_tween(request):
+        response = handler(request)
+        add_audit_function_stats(request)
+        return response
+
+    return audit_function_stats_tween
+
+
+@view_config(route_name='_audit_functions', request_method='GET', permission='index')
+def audit_functions_profile(request):
+    profiler = request.registry.get(AUDIT_PROFILER)
+    if profiler is None:
+        return {'status': 'disabled'}
+    sort = request.params.get('sort', 'total_time')
+    if sort not in SORT_FIELDS:
+        sort = 'total_time'
+    try:
+        limit = int(request.params.get('limit', 100))
+    except ValueError:
+        raise HTTPBadRequest(explanation='limit must be an integer.')
+    timings = profiler.snapshot()
+    return {
+        'status': 'enabled',
+        'sort': sort,
+        '@graph': profiler.ranking(timings, sort, limit),
+    }
+
+
+@view_config(route_name='_audit_functions', request_method='DELETE', permission='index')
+def audit_functions_profile_reset(request):
+    profiler = request.registry.get(AUDIT_PROFILER)
+    if profiler is not None:
+        profiler.reset()
+    return {'status': 'success'}
@@ -10,15 +10,37 @@ from urllib.parse import (
     parse_qs,
     urlencode,
     quote,
+    unquote_plus,
 )
 from encoded.search_views import search
+from encoded.export_cache import (
+    cached_export,
+    store_export,
+)
 import csv
 import io
+import itertools
 import json
 import datetime
 import re
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 ELEMENT_CHUNK_SIZE = 1000
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
+COLUMNAR_ROW_GROUP_SIZE = 10000
 currenttime = datetime.datetime.now()
 
 
@@ -139,6 +161,18 @@ _tsv_mapping_annotation = OrderedDict([
 
 _excluded_columns = ('Restricted', 'No File Available')
 
+# Content type and filename extension for ?format= columnar exports
+_columnar_formats = OrderedDict([
+    ('parquet', ('application/vnd.apache.parquet', '.parquet')),
+    ('arrow', ('application/vnd.apache.arrow.file', '.arrow')),
+])
+
+# Content type and filename extension for downloads compressed with ?compress=
+_compression_formats = OrderedDict([
+    ('zstd', ('application/zstd', '.zst')),
+    ('gzip', ('application/gzip', '.gz')),
+])
+
 
 def get_file_uuids(result_dict):
     file_uuids = []
@@ -212,79 +246,371 @@ def make_audit_cell(header_column, experiment_json, file_json):
     return ', '.join(list(set(data)))
 
 
+def available_compressions():
+    return [
+        encoding
+        for encoding in _compression_formats
+        if encoding != 'zstd' or zstandard is not None
+    ]
+
+
+def get_compression(request):
+    """
+    Pick the compression for a download response.
+
+    An explicit ?compress= parameter wins and produces a compressed file
+    download, otherwise the client's Accept-Encoding is honoured with a
+    Content-Encoding response. Returns (encoding, explicit).
+
+    The choice is remembered on the request so views can drop the compress
+    parameter before it reaches search, where it would be taken as a filter.
+    """
+    if 'encoded.compression' not in request.environ:
+        request.environ['encoded.compression'] = _select_compression(request)
+    return request.environ['encoded.compression']
+
+
+def _select_compression(request):
+    compress = request.params.get('compress')
+    if compress is None:
+        # webob treats a missing Accept-Encoding header as accepting anything.
+        if 'Accept-Encoding' not in request.headers:
+            return None, False
+        return request.accept_encoding.best_match(available_compressions()), False
+    compress = compress.lower()
+    if compress in ('', 'none', 'identity', 'false'):
+        return None, True
+    if compress == 'gz':
+        compress = 'gzip'
+    if compress not in available_compressions():
+        msg = 'Unsupported compression {}, must be one of {}.'.format(
+            compress,
+            available_compressions()
+        )
+        raise HTTPBadRequest(explanation=msg)
+    return compress, True
+
+
+def compress_app_iter(app_iter, encoding):
+    """Compress an iterable of byte chunks one chunk at a time."""
+    if encoding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compressobj()
+    else:
+        compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in app_iter:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+
+
+def compress_response(request, response):
+    """
+    Wrap a streamed download response's app_iter with on the fly compression
+    so the full body never has to be buffered.
+    """
+    encoding, explicit = get_compression(request)
+    if encoding is None:
+        return response
+    response.app_iter = compress_app_iter(response.app_iter, encoding)
+    response.content_length = None
+    if explicit:
+        content_type, extension = _compression_formats[encoding]
+        response.headers['Content-Type'] = content_type
+        response.content_disposition = re.sub(
+            r'filename="([^"]*)"',
+            r'filename="\1{}"'.format(extension),
+            response.content_disposition
+        )
+    else:
+        response.content_encoding = encoding
+        response.vary = tuple(response.vary or ()) + ('Accept-Encoding',)
+    return response
+
+
+def iter_tsv(rows, lineterminator='\r\n'):
+    """Encode rows as tab-separated UTF-8 byte chunks, one row at a time."""
+    fout = io.StringIO()
+    writer = csv.writer(fout, delimiter='\t', lineterminator=lineterminator)
+    for row in rows:
+        writer.writerow(row)
+        yield fout.getvalue().encode('utf-8')
+        fout.seek(0)
+        fout.truncate()
+
+
+def get_columnar_format(request):
+    """Return 'parquet' or 'arrow' when a columnar export was requested."""
+    export_format = request.params.get('format', '').lower()
+    if export_format not in _columnar_formats:
+        return None
+    if pyarrow is None:
+        msg = 'The {} export format is not available on this server.'.format(export_format)
+        raise HTTPBadRequest(explanation=msg)
+    return export_format
+
+
+class _ColumnarSink(object):
+    """
+    Write-only file object that buffers output between drains.
+
+    pyarrow asks the sink for its position to record column chunk offsets,
+    so tell() keeps counting even though drained bytes have been released.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _unique_column_names(header):
+    names = []
+    for name in header:
+        candidate = name
+        count = 1
+        while candidate in names:
+            count += 1
+            candidate = '{} ({})'.format(name, count)
+        names.append(candidate)
+    return names
+
+
+def iter_columnar(rows, export_format):
+    """
+    Encode rows, header first, as Parquet or Arrow IPC byte chunks.
+
+    Rows are collected into row groups (record batches for Arrow) of
+    COLUMNAR_ROW_GROUP_SIZE and each one is written out as soon as it is
+    full, so only one group is held in memory at a time.
+    """
+    rows = iter(rows)
+    header = next(rows)
+    schema = pyarrow.schema(
+        [(name, pyarrow.string()) for name in _unique_column_names(header)]
+    )
+    sink = _ColumnarSink()
+    if export_format == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_file(sink, schema)
+
+    def write_group(group):
+        arrays = [
+            pyarrow.array(column, type=pyarrow.string())
+            for column in zip(*group)
+        ]
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+    group = []
+    for row in rows:
+        group.append(['' if value is None else str(value) for value in row])
+        if len(group) >= COLUMNAR_ROW_GROUP_SIZE:
+            write_group(group)
+            group = []
+            yield sink.drain()
+    if group:
+        write_group(group)
+    writer.close()
+    yield sink.drain()
+
+
+def export_app_iter(request, rows, lineterminator='\r\n'):
+    """
+    Encode rows, header first, in the export format asked for by request.
+
+    Returns the app_iter plus the content type and filename extension to use,
+    or None for both when the caller's default TSV encoding applies.
+    """
+    export_format = get_columnar_format(request)
+    if export_format is None:
+        return iter_tsv(rows, lineterminator=lineterminator), None, None
+    content_type, extension = _columnar_formats[export_format]
+    return iter_columnar(rows, export_format), content_type, extension
+
+
+def compile_path(path):
+    """
+    Compile a dotted path into a function returning the list of values found
+    at that path, descending through embedded lists like simple_path_ids.
+    """
+    names = tuple(path.split('.'))
+
+    def extract(obj):
+        nodes = [obj]
+        for name in names:
+            next_nodes = []
+            for node in nodes:
+                if not isinstance(node, dict) or name not in node:
+                    continue
+                value = node[name]
+                if isinstance(value, list):
+                    next_nodes.extend(value)
+                else:
+                    next_nodes.append(value)
+            nodes = next_nodes
+            if not nodes:
+                break
+        return nodes
+    return extract
+
+
+def _accession_from_path(value):
+    # /files/ENCFF000AAA/ -> ENCFF000AAA
+    return value[7:-1]
+
+
+# Per column value conversions for the annotation export, everything else is
+# rendered with str().
+_annotation_value_formatters = {
+    'Derived from': _accession_from_path,
+    'S3 URL': lambda value: value.get('url', '') if isinstance(value, dict) else value,
+}
+
+
+def compile_cell(header_column, paths, prefix=''):
+    """
+    Compile the paths of a mapping column into a function rendering the cell.
+
+    Values from all paths are rendered, de-duplicated in order and joined
+    with ', '. The prefix is stripped so file columns can be applied
+    directly to each file object.
+    """
+    extractors = [compile_path(path[len(prefix):]) for path in paths]
+    formatter = _annotation_value_formatters.get(header_column, str)
+
+    def cell(obj):
+        values = []
+        for extract in extractors:
+            for value in extract(obj):
+                value = formatter(value)
+                if value not in values:
+                    values.append(value)
+        return ', '.join(values)
+    return cell
+
+
+def iter_search_chunks(request, search_path, params, fields):
+    """
+    Yield search results for params a chunk at a time.
+
+    Only the @ids of all matching objects are fetched up front, the projected
+    fields are then fetched ELEMENT_CHUNK_SIZE objects at a time so large
+    exports never hold the complete result set in memory. Any @id filters
+    of params only apply to finding the @ids, each chunk is searched by its
+    own @ids.
+    """
+    params = [(k, v) for k, v in params if k not in ('limit', 'field')]
+    path = '{}?{}'.format(
+        search_path,
+        urlencode(params + [('field', '@id'), ('limit', 'all')])
+    )
+    ids = [result['@id'] for result in request.embed(quote(path), as_user=True)['@graph']]
+    params = [(k, v) for k, v in params if k != '@id']
+    field_params = [('field', field) for field in fields]
+    for i in range(0, len(ids), ELEMENT_CHUNK_SIZE):
+        at_id_params = [('@id', at_id) for at_id in ids[i:i + ELEMENT_CHUNK_SIZE]]
+        path = '{}?{}'.format(
+            search_path,
+            urlencode(params + field_params + at_id_params + [('limit', 'all')])
+        )
+        for result in request.embed(quote(path), as_user=True)['@graph']:
+            yield result
+
+
 def _get_annotation_metadata(request, search_path, param_list):
     """
-    Get anotation data.
+    Stream anotation data.
+
+    Columns come from _tsv_mapping_annotation: dataset columns are rendered
+    once per annotation and file columns once per file, each with an
+    extractor compiled up front from the column's paths.
 
         :param request: Pyramid request
         :param search_path: Search url
         :param param_list: Initial param_list
     """
-    header = [header for header in _tsv_mapping_annotation if header not in _excluded_columns]
-    header.extend([prop for prop in _audit_mapping])
-    fout = io.StringIO()
-    writer = csv.writer(fout, delimiter='\t')
-    writer.writerow(header)
-    param_list['limit'] = ['all']
-    fields = [''.join(['&field=', str(value[0])]) for _, value in _tsv_mapping_annotation.items()]
-    path = '{}?{}{}'.format(
-        search_path,
-        quote(urlencode(param_list, True)),
-        ''.join(fields)
-    )
-    results = request.embed(path, as_user=True)
-    for result_graph in results['@graph']:
-        result_files = result_graph.get('files', {})
-        if not result_files:
-            continue
-        software = [s for s in result_graph.get('software_used', {})]
-        software_set = ', '.join([s['software']['title'] for s in software])
-        for result_file in result_files:
-            if restricted_files_present(result_file):
-                continue
-            if is_no_file_available(result_file):
-                continue
-            if param_list.get('files.file_type') and result_file['file_type'] not in param_list['files.file_type']:
+    columns = [column for column in _tsv_mapping_annotation if column not in _excluded_columns]
+    header = columns + [prop for prop in _audit_mapping]
+    cells = []
+    for column in columns:
+        paths = _tsv_mapping_annotation[column]
+        if paths[0].startswith('files.'):
+            cells.append((True, compile_cell(column, paths, prefix='files.')))
+        else:
+            cells.append((False, compile_cell(column, paths)))
+    fields = [
+        path
+        for paths in _tsv_mapping_annotation.values()
+        for path in paths
+    ] + ['files.no_file_available']
+    params = [
+        (k, v)
+        for k, values in param_list.items()
+        for v in values
+    ]
+    file_types = param_list.get('files.file_type')
+
+    def generate_rows():
+        yield header
+        for result_graph in iter_search_chunks(request, search_path, params, fields):
+            result_files = result_graph.get('files', [])
+            if not result_files:
                 continue
-            row = [
-                result_file.get('title', ''),
-                result_file.get('file_type', ''),
-                result_file.get('output_type', ''),
-                result_graph.get('accession', ''),
-                result_graph.get('annotation_type', ''),
-                software_set,
-                result_graph.get('encyclopedia_version', ''),
-                result_graph.get('biosample_ontology', {}).get('term_id', ''),
-                result_graph.get('biosample_ontology', {}).get('term_name', ''),
-                result_graph.get('biosample_ontology', {}).get('classification', ''),
-                result_graph.get('relevant_life_stage', ''),
-                result_graph.get('relevant_timepoint', ''),
-                result_graph.get('relevant_timepoint_units', ''),
-                result_graph.get('organism', {}).get('scientific_name', ''),
-                ', '.join([target['name'] for target in result_graph.get('targets', {})]),
-                result_graph.get('date_released', ''),
-                result_graph.get('award', {}).get('project', ''),
-                result_file.get('lab', {}).get('title', ''),
-                result_file.get('md5sum', ''),
-                ', '.join(result_file.get('dbxrefs', '')),
-                ''.join([request.host_url, result_file.get('href', '')]),
-                result_file.get('assembly', ''),
-                result_file.get('controlled_by', ''),
-                result_file.get('status', ''),
-                ', '.join([derived_from[7:-1] for derived_from in result_file.get('derived_from', '')]),
-                result_file.get('cloud_metadata', {}).get('url', ''),
-                result_file.get('file_size', ''),
+            dataset_row = [
+                None if is_file_cell else cell(result_graph)
+                for is_file_cell, cell in cells
             ]
-            # make_audit_cell() was designed just for experiment, but works too for annotation
-            row.extend(
-                [make_audit_cell(audit_type, result_graph, result_file) for audit_type in _audit_mapping]
-            )
-            writer.writerow(row)
-    return Response(
-        content_type='text/tsv',
-        body=fout.getvalue(),
-        content_disposition='attachment;filename="%s"' % 'metadata.tsv'
+            for result_file in result_files:
+                if restricted_files_present(result_file):
+                    continue
+                if is_no_file_available(result_file):
+                    continue
+                if file_types and result_file.get('file_type') not in file_types:
+                    continue
+                if 'href' in result_file:
+                    result_file['href'] = request.host_url + result_file['href']
+                row = [
+                    cell(result_file) if is_file_cell else dataset_row[i]
+                    for i, (is_file_cell, cell) in enumerate(cells)
+                ]
+                # make_audit_cell() was designed just for experiment, but works too for annotation
+                row.extend(
+                    [make_audit_cell(audit_type, result_graph, result_file) for audit_type in _audit_mapping]
+                )
+                yield row
+
+    app_iter, content_type, extension = export_app_iter(request, generate_rows())
+    response = Response(
+        content_type=content_type or 'text/tsv',
+        app_iter=app_iter,
+        content_disposition='attachment;filename="%s"' % ('metadata' + (extension or '.tsv'))
     )
+    return store_export(request, compress_response(request, response))
 
 
 @view_config(route_name='peak_metadata', request_method='GET')
@@ -323,25 +649,28 @@ def peak_metadata(context, request):
                         'experiment.accession': experiment_accession
                     })
     if 'peak_metadata.json' in request.url:
-        return Response(
+        response = Response(
             content_type='text/plain',
-            body=json.dumps(json_doc),
+            app_iter=[json.dumps(json_doc).encode('utf-8')],
             content_disposition='attachment;filename="%s"' % 'peak_metadata.json'
         )
-    fout = io.StringIO()
-    writer = csv.writer(fout, delimiter='\t')
-    writer.writerow(header)
-    writer.writerows(rows)
-    return Response(
+        return compress_response(request, response)
+    response = Response(
         content_type='text/tsv',
-        body=fout.getvalue(),
+        app_iter=iter_tsv(itertools.chain([header], rows)),
         content_disposition='attachment;filename="%s"' % 'peak_metadata.tsv'
     )
+    return compress_response(request, response)
 
 
 @view_config(route_name='metadata', request_method='GET')
 def metadata_tsv(context, request):
+    # Cached compressed, so hits keep their Content-Length.
+    cached = cached_export(request, get_compression(request))
+    if cached is not None:
+        return cached
     qs = QueryString(request)
+    qs.drop('compress')
     param_list = qs.group_values_by_key()
     if 'referrer' in param_list:
         search_path = '/{}/'.format(param_list.pop('referrer')[0])
@@ -400,60 +729,68 @@ def metadata_tsv(context, request):
     )
     path = '{}?{}'.format(search_path, str(qs))
     results = request.embed(quote(path), as_user=True)
-    rows = []
-    for experiment_json in results['@graph']:
-        if experiment_json.get('files', []):
-            exp_data_row = []
-            for column in header:
-                if not _tsv_mapping[column][0].startswith('files'):
-                    make_cell(column, experiment_json, exp_data_row)
-
-            f_attributes = ['files.title', 'files.file_type',
-                            'files.output_type']
-
-            for f in experiment_json['files']:
-                # If we're looking for a file type but it doesn't match, ignore file
-                if not files_prop_param_list(f, param_list):
-                    continue
-                if restricted_files_present(f):
-                    continue
-                if is_no_file_available(f):
-                    continue
-                f['href'] = request.host_url + f['href']
-                f_row = []
-                for attr in f_attributes:
-                    f_row.append(f[attr[6:]])
-                data_row = f_row + exp_data_row
-                for prop in file_attributes:
-                    if prop in f_attributes:
+
+    def generate_rows():
+        yield header + [prop for prop in _audit_mapping]
+        for experiment_json in results['@graph']:
+            if experiment_json.get('files', []):
+                exp_data_row = []
+                for column in header:
+                    if not _tsv_mapping[column][0].startswith('files'):
+                        make_cell(column, experiment_json, exp_data_row)
+
+                f_attributes = ['files.title', 'files.file_type',
+                                'files.output_type']
+
+                for f in experiment_json['files']:
+                    # If we're looking for a file type but it doesn't match, ignore file
+                    if not files_prop_param_list(f, param_list):
                         continue
-                    path = prop[6:]
-                    temp = []
-                    for value in simple_path_ids(f, path):
-                        temp.append(str(value))
-                    if prop == 'files.replicate.rbns_protein_concentration':
-                        if 'replicate' in f and 'rbns_protein_concentration_units' in f['replicate']:
-                            temp[0] = temp[0] + ' ' + f['replicate']['rbns_protein_concentration_units']
-                    if prop in ['files.paired_with', 'files.derived_from']:
-                        # chopping of path to just accession
-                        if len(temp):
-                            new_values = [t[7:-1] for t in temp]
-                            temp = new_values
-                    data = list(set(temp))
-                    data.sort()
-                    data_row.append(', '.join(data))
-                audit_info = [make_audit_cell(audit_type, experiment_json, f) for audit_type in _audit_mapping]
-                data_row.extend(audit_info)
-                rows.append(data_row)
-    fout = io.StringIO()
-    writer = csv.writer(fout, delimiter='\t', lineterminator='\n')
-    header.extend([prop for prop in _audit_mapping])
-    writer.writerow(header)
-    writer.writerows(rows)
-    return Response(
-        content_type='text/tsv',
-        body=fout.getvalue(),
-        content_disposition='attachment;filename="%s"' % 'metadata.tsv'
+                    if restricted_files_present(f):
+                        continue
+                    if is_no_file_available(f):
+                        continue
+                    f['href'] = request.host_url + f['href']
+                    f_row = []
+                    for attr in f_attributes:
+                        f_row.append(f[attr[6:]])
+                    data_row = f_row + exp_data_row
+                    for prop in file_attributes:
+                        if prop in f_attributes:
+                            continue
+                        path = prop[6:]
+                        temp = []
+                        for value in simple_path_ids(f, path):
+                            temp.append(str(value))
+                        if prop == 'files.replicate.rbns_protein_concentration':
+                            if 'replicate' in f and 'rbns_protein_concentration_units' in f['replicate']:
+                                temp[0] = temp[0] + ' ' + f['replicate']['rbns_protein_concentration_units']
+                        if prop in ['files.paired_with', 'files.derived_from']:
+                            # chopping of path to just accession
+                            if len(temp):
+                                new_values = [t[7:-1] for t in temp]
+                                temp = new_values
+                        data = list(set(temp))
+                        data.sort()
+                        data_row.append(', '.join(data))
+                    audit_info = [make_audit_cell(audit_type, experiment_json, f) for audit_type in _audit_mapping]
+                    data_row.extend(audit_info)
+                    yield data_row
+
+    app_iter, content_type, extension = export_app_iter(request, generate_rows(), lineterminator='\n')
+    response = Response(
+        content_type=content_type or 'text/tsv',
+        app_iter=app_iter,
+        content_disposition='attachment;filename="%s"' % ('metadata' + (extension or '.tsv'))
+    )
+    return store_export(request, compress_response(request, response))
+
+
+def _metadata_query_string(request):
+    """The query string for the metadata.tsv link of files.txt, without compress."""
+    return '&'.join(
+        part for part in request.query_string.split('&')
+        if part and unquote_plus(part.split('=', 1)[0]) != 'compress'
     )
 
 
@@ -465,6 +802,8 @@ def batch_download(context, request):
         ('field', 'files.restricted')
     ]
     qs = QueryString(request)
+    get_compression(request)
+    qs.drop('compress')
     file_filters = qs.param_keys_to_list(
         params=qs.get_filters_by_condition(
             key_and_value_condition=lambda k, _: k.startswith('files.')
@@ -495,12 +834,12 @@ def batch_download(context, request):
             # metadata.tsv link includes a cart UUID
             metadata_link = '{host_url}/metadata/?{search_params}'.format(
                 host_url=request.host_url,
-                search_params=qs._get_original_query_string()
+                search_params=_metadata_query_string(request)
             )
         else:
             metadata_link = '{host_url}/metadata/?{search_params} -X GET -H "Accept: text/tsv" -H "Content-Type: application/json" --data \'{{"elements": [{elements_json}]}}\''.format(
                 host_url=request.host_url,
-                search_params=qs._get_original_query_string(),
+                search_params=_metadata_query_string(request),
                 elements_json=','.join('"{0}"'.format(element) for element in elements)
             )
 
@@ -521,7 +860,7 @@ def batch_download(context, request):
         # Regular batch download has single simple call to request.embed
         metadata_link = '{host_url}/metadata/?{search_params}'.format(
             host_url=request.host_url,
-            search_params=qs._get_original_query_string()
+            search_params=_metadata_query_string(request)
         )
         path = '/search/?{}'.format(str(qs))
         results = request.embed(quote(path), as_user=True)
@@ -533,25 +872,26 @@ def batch_download(context, request):
             for exp_file in exp.get('files', [])
     )
 
-    files = [metadata_link]
     param_list = qs.group_values_by_key()
-    for exp_file in exp_files:
-        if not files_prop_param_list(exp_file, param_list):
-            continue
-        elif restricted_files_present(exp_file):
-            continue
-        files.append(
-            '{host_url}{href}'.format(
+
+    def generate_lines():
+        yield metadata_link.encode('utf-8')
+        for exp_file in exp_files:
+            if not files_prop_param_list(exp_file, param_list):
+                continue
+            elif restricted_files_present(exp_file):
+                continue
+            yield '\n{host_url}{href}'.format(
                 host_url=request.host_url,
                 href=exp_file['href'],
-            )
-        )
+            ).encode('utf-8')
 
-    return Response(
+    response = Response(
         content_type='text/plain',
-        body='\n'.join(files),
+        app_iter=generate_lines(),
         content_disposition='attachment; filename="%s"' % 'files.txt'
     )
+    return compress_response(request, response)
 
 
 def files_prop_param_list(exp_file, param_list):
@@ -606,6 +946,16 @@ def format_row(columns):
     return b'\t'.join([bytes_(" ".join(c.strip('\t\n\r').split()), 'utf-8') for c in columns]) + b'\r\n'
 
 
+def _report_timestamp(downloadtime):
+    return '{}_{}_{}_{}h_{}m'.format(
+        downloadtime.year,
+        downloadtime.month,
+        downloadtime.day,
+        downloadtime.hour,
+        downloadtime.minute,
+    )
+
+
 def _convert_camel_to_snake(type_str):
     tmp = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', type_str)
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', tmp).lower()
@@ -614,6 +964,15 @@ def _convert_camel_to_snake(type_str):
 @view_config(route_name='report_download', request_method='GET')
 def report_download(context, request):
     downloadtime = datetime.datetime.now()
+    cached = cached_export(request, get_compression(request))
+    if cached is not None:
+        # The filename is of the time of this download, not of the cached one.
+        cached.content_disposition = re.sub(
+            r'_report_\d+_\d+_\d+_\d+h_\d+m',
+            '_report_' + _report_timestamp(downloadtime),
+            cached.content_disposition
+        )
+        return cached
 
     types = request.params.getall('type')
     if len(types) != 1:
@@ -622,6 +981,7 @@ def report_download(context, request):
 
     # Make sure we get all results
     request.GET['limit'] = 'all'
+    request.GET.pop('compress', None)
     type_str = types[0]
     schemas = [request.registry[TYPES][type_str].schema]
     columns = list_visible_columns_for_schemas(request, schemas)
@@ -638,26 +998,32 @@ def report_download(context, request):
 
     header = [column.get('title') or field for field, column in columns.items()]
 
+    def generate_values():
+        yield header
+        for item in search(context, request).json['@graph']:
+            yield [lookup_column_value(item, path) for path in columns]
+
     def generate_rows():
         yield format_header(header)
-        yield format_row(header)
-        for item in search(context, request).json['@graph']:
-            values = [lookup_column_value(item, path) for path in columns]
+        for values in generate_values():
             yield format_row(values)
 
-    
+    export_format = get_columnar_format(request)
+    extension = '.tsv'
     # Stream response using chunked encoding.
-    request.response.content_type = 'text/tsv'
-    request.response.content_disposition = 'attachment;filename="{}_report_{}_{}_{}_{}h_{}m.tsv"'.format(
+    if export_format is None:
+        request.response.content_type = 'text/tsv'
+        request.response.app_iter = generate_rows()
+    else:
+        content_type, extension = _columnar_formats[export_format]
+        request.response.content_type = content_type
+        request.response.app_iter = iter_columnar(generate_values(), export_format)
+    request.response.content_disposition = 'attachment;filename="{}_report_{}{}"'.format(
         snake_type,
-        downloadtime.year,
-        downloadtime.month,
-        downloadtime.day,
-        downloadtime.hour,
-        downloadtime.minute
+        _report_timestamp(downloadtime),
+        extension
     )
-    request.response.app_iter = generate_rows()
-    return request.response
+    return store_export(request, compress_response(request, request.response))
 
 
 def list_visible_columns_for_schemas(request, schemas):
@@ -0,0 +1,88 @@
+"""\
+Store the lot reviews of antibody lots which don't have them yet.
+
+Lot reviews are stored on an antibody lot when it, or a characterization of
+it, is created or modified. Lots left untouched since, such as those created
+before lot reviews were stored, are patched without changes to store them.
+
+Examples
+
+To backfill on the production server:
+
+    %(prog)s production.ini --app-name app
+
+To store the lot reviews of every lot again:
+
+    %(prog)s production.ini --app-name app --all
+
+"""
+from pyramid.traversal import resource_path
+from encoded.types.antibody_lot import LOT_REVIEWS_SHEET
+import logging
+
+EPILOG = __doc__
+
+logger = logging.getLogger(__name__)
+
+
+def internal_app(configfile, app_name=None, username=None):
+    from webtest import TestApp
+    from pyramid import paster
+    app = paster.get_app(configfile, app_name)
+    if not username:
+        username = 'IMPORT'
+    environ = {
+        'HTTP_ACCEPT': 'application/json',
+        'REMOTE_USER': username,
+    }
+    return TestApp(app, environ)
+
+
+def run(testapp, all_lots=False, dry_run=False):
+    """Patch the antibody lots missing stored lot reviews, return how many."""
+    root = testapp.app.root_factory(testapp.app)
+    collection = root.by_item_type['antibody_lot']
+    count = 0
+    errors = 0
+    for uuid, item in collection.items():
+        if not all_lots and item.propsheets.get(LOT_REVIEWS_SHEET):
+            continue
+        count += 1
+        if dry_run:
+            continue
+        path = resource_path(item)
+        # Modifying the lot stores its lot reviews.
+        try:
+            testapp.patch_json(path, {})
+        except Exception:
+            logger.exception('Backfill failed for (patching unvalidated): %s', path)
+            testapp.patch_json(path + '?validate=false', {})
+            errors += 1
+    logger.info('Stored lot reviews of %d antibody lots (errors: %d)', count, errors)
+    return count
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Store antibody lot reviews", epilog=EPILOG,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--app-name', help="Pyramid app name in configfile")
+    parser.add_argument(
+        '--all', action='store_true', help="Store the lot reviews of every lot again")
+    parser.add_argument(
+        '--dry-run', action='store_true', help="Only count the lots to patch")
+    parser.add_argument('config_uri', help="path to configfile")
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    testapp = internal_app(args.config_uri, args.app_name)
+
+    # Loading app will have configured from config file. Reconfigure here:
+    logging.getLogger('encoded').setLevel(logging.INFO)
+    run(testapp, args.all, args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
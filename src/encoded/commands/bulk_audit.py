@@ -0,0 +1,290 @@
+"""\
+Run the audit checkers over a snapshot of the index without writing anything.
+
+Documents are read from elasticsearch, or from a JSONL dump with one indexed
+document per line, and every item of the chosen types is audited again by
+the registered checkers across a pool of processes. Frames are built from
+the object and embedded frames of the snapshot instead of the database, so
+the effect of changing audit standards can be seen without a reindex.
+
+The report lists, per audit category, how many failures are indexed, how
+many the current checkers find and how many were added or removed. Only the
+failures of the items themselves are compared, not those inherited from
+embedded items. Checkers which need the database, such as those looking at
+the context of the audit, can't run offline and are counted as errors.
+
+Examples
+
+    %(prog)s production.ini --app-name app --item-type experiment
+
+To audit a dump and keep the full report:
+
+    %(prog)s development.ini --app-name app --dump snapshot.jsonl --json report.json
+
+"""
+from collections import Counter
+from posixpath import join
+from pyramid.paster import get_app
+from snovault import (
+    AUDITOR,
+    TYPES,
+)
+from urllib.parse import parse_qs
+import json
+import logging
+import multiprocessing
+
+EPILOG = __doc__
+
+log = logging.getLogger(__name__)
+
+OFFLINE_ERRORS = ('audit script error', 'audit condition error')
+
+# Set in the parent before forking the pool, shared by the workers.
+_registry = None
+_snapshot = None
+
+
+class Snapshot(object):
+    """
+    Indexed documents kept as JSON strings, keyed by @id.
+
+    Any of the paths of an item, such as its accession or uuid, resolve to
+    its @id.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.embedded = {}
+        self.audits = {}
+        self.item_types = {}
+        self.paths = {}
+
+    def add(self, document, audited):
+        obj = document['object']
+        path = obj['@id']
+        self.objects[path] = json.dumps(obj)
+        for alias in document.get('paths', ()):
+            self.paths[alias.rstrip('/') + '/'] = path
+        self.paths['/' + document['uuid'] + '/'] = path
+        if audited:
+            self.embedded[path] = json.dumps(document['embedded'])
+            self.audits[path] = json.dumps(document.get('audit', {}))
+            self.item_types[path] = document['item_type']
+
+    def resolve(self, path):
+        path = path.rstrip('/') + '/'
+        return self.paths.get(path, path)
+
+    def embed(self, uri):
+        path, _, view = uri.partition('@@')
+        path = self.resolve(path)
+        view, _, query = view.partition('?')
+        if view == 'object':
+            return json.loads(self.objects[path])
+        if view in ('', 'embedded', 'page'):
+            return json.loads(self.embedded[path])
+        if view == 'expand':
+            properties = json.loads(self.objects[path])
+            for expand in parse_qs(query).get('expand', ()):
+                self._expand(properties, expand.split('.'))
+            return properties
+        raise KeyError(uri)
+
+    def _expand(self, obj, names):
+        name, remaining = names[0], names[1:]
+        value = obj.get(name)
+        if value is None:
+            return
+        if isinstance(value, list):
+            obj[name] = value = [
+                self.embed(member + '@@object') if isinstance(member, str) else member
+                for member in value
+            ]
+            members = value
+        else:
+            if isinstance(value, str):
+                obj[name] = value = self.embed(value + '@@object')
+            members = [value]
+        if remaining:
+            for member in members:
+                self._expand(member, remaining)
+
+
+class SnapshotRequest(object):
+    """The parts of a request the audit checkers use, served from a snapshot."""
+
+    def __init__(self, registry, snapshot):
+        self.registry = registry
+        self.snapshot = snapshot
+        self._embedded_uuids = set()
+        self._linked_uuids = set()
+
+    def embed(self, *elements, **kw):
+        return self.snapshot.embed(join(*elements))
+
+
+def read_dump(filename):
+    with open(filename) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_elasticsearch(registry):
+    from elasticsearch.helpers import scan
+    from snovault.elasticsearch.interfaces import ELASTIC_SEARCH
+    es = registry[ELASTIC_SEARCH]
+    # Only the item indices, not those of other documents such as the
+    # indexer state or the region index.
+    index = ','.join(sorted(registry[TYPES].by_item_type))
+    query = {'query': {'match_all': {}}}
+    source = ['audit', 'embedded', 'item_type', 'object', 'paths', 'uuid']
+    for hit in scan(es, index=index, query=query, _source=source):
+        if 'object' in hit['_source']:
+            yield hit['_source']
+
+
+def load_snapshot(documents, item_types):
+    snapshot = Snapshot()
+    for document in documents:
+        snapshot.add(document, not item_types or document['item_type'] in item_types)
+    return snapshot
+
+
+def self_audits(audits, path):
+    """Flatten indexed audits, keeping only those of the item itself."""
+    return [
+        audit
+        for level in audits.values()
+        for audit in level
+        if audit.get('path') in (None, path)
+    ]
+
+
+def audit_key(audit):
+    return (audit['category'], audit['level_name'], audit['detail'])
+
+
+def audit_item(path):
+    registry = _registry
+    type_info = registry[TYPES][_snapshot.item_types[path]]
+    request = SnapshotRequest(registry, _snapshot)
+    found = registry[AUDITOR].audit(
+        request=request,
+        types=[type_info.name] + type_info.base_types,
+        path=path,
+        context=None,
+        root=None,
+        registry=registry,
+    )
+    errors = Counter(
+        audit['name'] for audit in found if audit['category'] in OFFLINE_ERRORS)
+    found = Counter(
+        audit_key(audit) for audit in found if audit['category'] not in OFFLINE_ERRORS)
+    indexed = Counter(
+        audit_key(audit)
+        for audit in self_audits(json.loads(_snapshot.audits[path]), path))
+    return path, indexed, found, errors
+
+
+def audit_chunk(paths):
+    return [audit_item(path) for path in paths]
+
+
+def chunked(paths, chunksize):
+    for start in range(0, len(paths), chunksize):
+        yield paths[start:start + chunksize]
+
+
+def run(app, documents, item_types=None, processes=None, chunksize=100):
+    global _registry, _snapshot
+    _registry = app.registry
+    _snapshot = load_snapshot(documents, item_types)
+    paths = sorted(_snapshot.item_types)
+    log.info('Auditing %d items', len(paths))
+    report = {}
+    errors = Counter()
+    items = {}
+    pool = multiprocessing.get_context('fork').Pool(processes)
+    try:
+        for results in pool.imap_unordered(audit_chunk, chunked(paths, chunksize)):
+            for path, indexed, found, checker_errors in results:
+                errors.update(checker_errors)
+                for key in set(indexed) | set(found):
+                    category = report.setdefault(key[0], {
+                        'indexed': 0, 'audited': 0, 'added': 0, 'removed': 0,
+                    })
+                    category['indexed'] += indexed[key]
+                    category['audited'] += found[key]
+                    added = max(found[key] - indexed[key], 0)
+                    removed = max(indexed[key] - found[key], 0)
+                    category['added'] += added
+                    category['removed'] += removed
+                    if added or removed:
+                        changes = items.setdefault(key[0], {'added': [], 'removed': []})
+                        if added:
+                            changes['added'].append(path)
+                        if removed:
+                            changes['removed'].append(path)
+    finally:
+        pool.close()
+        pool.join()
+    return {
+        'items': len(paths),
+        'categories': report,
+        'changed_items': items,
+        'errors': dict(errors),
+    }
+
+
+def print_report(result):
+    print('Audited {} items'.format(result['items']))
+    print('{:<60} {:>9} {:>9} {:>9} {:>9}'.format(
+        'category', 'indexed', 'audited', 'added', 'removed'))
+    for name, category in sorted(result['categories'].items()):
+        if not category['added'] and not category['removed']:
+            continue
+        print('{:<60} {indexed:>9} {audited:>9} {added:>9} {removed:>9}'.format(
+            name, **category))
+    for name, count in sorted(result['errors'].items()):
+        print('{} could not run for {} items'.format(name, count))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Audit an index snapshot without writing anything", epilog=EPILOG,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--app-name', help="Pyramid app name in configfile")
+    parser.add_argument('--item-type', action='append', help="Item type to audit, all by default")
+    parser.add_argument('--dump', help="JSONL file of indexed documents, instead of elasticsearch")
+    parser.add_argument('--processes', type=int, help="Number of processes, one per cpu by default")
+    parser.add_argument('--chunksize', type=int, default=100, help="Items audited per task")
+    parser.add_argument('--json', help="Write the full report as JSON to this file")
+    parser.add_argument('config_uri', help="path to configfile")
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    # Every checker must run on the snapshot, not on remembered failures.
+    options = {
+        'audit_cache.capacity': '0',
+        'audit_profiling': 'false',
+    }
+    app = get_app(args.config_uri, args.app_name, options)
+    logging.getLogger('encoded').setLevel(logging.INFO)
+
+    if args.dump:
+        documents = read_dump(args.dump)
+    else:
+        documents = read_elasticsearch(app.registry)
+    result = run(app, documents, args.item_type, args.processes, args.chunksize)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=4, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""\
+Run queued export jobs in the background.
+
+Jobs are created by POSTing to /export_jobs/ on the web application. This
+worker picks them up from the shared export_jobs.directory, produces the
+export through the normal download views and leaves the artifact for
+download from /export_jobs/{uuid}/download. While the queue is empty it
+removes expired jobs and reclaims those of workers which stopped.
+
+Examples
+
+    %(prog)s production.ini --app-name app
+
+To process the current queue once and exit:
+
+    %(prog)s development.ini --app-name app --once
+
+"""
+from pyramid.paster import get_app
+import logging
+import time
+
+from encoded.export_jobs import (
+    EXPORT_JOBS,
+    run_job,
+)
+
+EPILOG = __doc__
+
+log = logging.getLogger(__name__)
+
+
+def run(app, poll_interval=5, once=False):
+    store = app.registry.get(EXPORT_JOBS)
+    if store is None:
+        raise ValueError('export_jobs.directory is not configured.')
+    while True:
+        job = store.claim_next()
+        if job is None:
+            removed = store.cleanup()
+            if removed:
+                log.info('Removed %d expired export jobs', removed)
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        log.info('Running export job %s: %s', job['uuid'], job['url'])
+        job = run_job(app, store, job)
+        log.info('Export job %s %s', job['uuid'], job['status'])
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Run background export jobs", epilog=EPILOG,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--app-name', help="Pyramid app name in configfile")
+    parser.add_argument('--poll-interval', type=float, default=5, help="Seconds to wait when the queue is empty")
+    parser.add_argument('--once', default=False, action='store_true', help="Exit once the queue is empty")
+    parser.add_argument('config_uri', help="path to configfile")
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    app = get_app(args.config_uri, args.app_name)
+    logging.getLogger('encoded').setLevel(logging.INFO)
+    return run(app, args.poll_interval, args.once)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+from pyramid.response import (
+    FileIter,
+    Response,
+)
+from pyramid.settings import asbool
+from pyramid.view import view_config
+from snovault.elasticsearch.interfaces import ELASTIC_SEARCH
+from urllib.parse import parse_qsl
+import hashlib
+import humanfriendly
+import json
+import logging
+import os
+import tempfile
+import threading
+
+
+log = logging.getLogger(__name__)
+
+EXPORT_CACHE = 'export_cache'
+# Block size used when serving cached exports, matches pyramid.response.FileResponse
+_BLOCK_SIZE = 4096 * 64
+# Query parameters that only change how the export is encoded on the wire,
+# the encoding picked from them is passed to make_key as the variant
+_IGNORED_PARAMS = ('compress',)
+
+
+def includeme(config):
+    config.add_route('_export_cache', '/_export_cache')
+    config.scan(__name__)
+    settings = config.registry.settings
+    directory = settings.get('export_cache.directory')
+    if directory and asbool(settings.get('export_cache.enabled', True)):
+        max_size = humanfriendly.parse_size(settings.get('export_cache.max_size', '10GB'))
+        config.registry[EXPORT_CACHE] = ExportCache(directory, max_size)
+
+
+def last_indexed_xmin(request):
+    """
+    Return the xmin of the last completed primary indexing cycle.
+
+    Exports are only cacheable while this is known, every finished indexing
+    cycle moves it forward and so implicitly invalidates older entries.
+    """
+    es = request.registry.get(ELASTIC_SEARCH)
+    if es is None:
+        return None
+    try:
+        status = es.get(
+            index=request.registry.settings['snovault.elasticsearch.index'],
+            doc_type='meta',
+            id='indexing',
+            ignore=[400, 404]
+        )
+    except Exception:
+        log.warning('Unable to read indexing status for export cache', exc_info=True)
+        return None
+    if not status.get('found'):
+        return None
+    return status['_source'].get('xmin')
+
+
+class ExportCache(object):
+    """
+    Disk backed LRU cache of rendered export bodies.
+
+    Entries are plain files named by key so that several processes can
+    share one directory. Recency is tracked with the file mtime, which is
+    bumped on every hit, and the oldest files are evicted once the directory
+    grows beyond max_size.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def make_key(self, request, variant=None):
+        xmin = last_indexed_xmin(request)
+        if xmin is None:
+            return None
+        query = sorted(
+            (k, v)
+            for k, v in parse_qsl(request.query_string, keep_blank_values=True)
+            if k not in _IGNORED_PARAMS
+        )
+        principals = sorted(request.effective_principals)
+        body = hashlib.sha256(request.body or b'').hexdigest()
+        data = json.dumps([request.path, query, principals, xmin, body, variant], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _headers_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(self._headers_path(key)) as f:
+                headers = json.load(f)
+            # Bump recency for LRU eviction.
+            os.utime(path, None)
+            size = os.path.getsize(path)
+        except (IOError, OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += size
+        return path, size, headers
+
+    def store(self, key, app_iter, headers):
+        """
+        Yield the chunks of app_iter while copying them to disk.
+
+        The entry only becomes visible once the whole body has been written,
+        so a client disconnecting half way through never leaves a truncated
+        export in the cache.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in app_iter:
+                    f.write(chunk)
+                    yield chunk
+            with open(self._headers_path(key), 'w') as f:
+                json.dump(headers, f)
+            os.rename(tmp_path, self._path(key))
+            complete = True
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            if not complete:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+        with self._lock:
+            self.stores += 1
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('.') or name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(self._path(name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_size:
+                break
+            for path in (self._headers_path(name), self._path(name)):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'directory': self.directory,
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'bytes_served': self.bytes_served,
+            }
+
+
+def _count_stat(request, name):
+    stats = getattr(request, '_stats', None)
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + 1
+
+
+def cached_export(request, variant=None):
+    """
+    Return a response for request from the export cache, or None on a miss.
+
+    variant tells apart the encodings of one export, such as its compression,
+    each cached as it is sent. Hits are served straight from the cache file
+    with wsgi.file_wrapper where the server provides it, so the body is sent
+    with sendfile.
+    """
+    cache = request.registry.get(EXPORT_CACHE)
+    if cache is None:
+        return None
+    key = cache.make_key(request, variant)
+    if key is None:
+        return None
+    request.environ['encoded.export_cache_key'] = key
+    entry = cache.get(key)
+    if entry is None:
+        _count_stat(request, 'export_cache_miss')
+        return None
+    path, size, headers = entry
+    _count_stat(request, 'export_cache_hit')
+    response = Response()
+    f = open(path, 'rb')
+    if 'wsgi.file_wrapper' in request.environ:
+        response.app_iter = request.environ['wsgi.file_wrapper'](f, _BLOCK_SIZE)
+    else:
+        response.app_iter = FileIter(f, _BLOCK_SIZE)
+    for name, value in headers.items():
+        response.headers[name] = value
+    response.content_length = size
+    response.headers['X-Export-Cache'] = 'hit'
+    return response
+
+
+def store_export(request, response):
+    """
+    Tee the response body into the export cache while it is streamed.
+
+    Call it on the response as sent, after any compression, so hits can be
+    served as they are.
+    """
+    cache = request.registry.get(EXPORT_CACHE)
+    key = request.environ.get('encoded.export_cache_key')
+    if cache is None or key is None:
+        return response
+    headers = {
+        name: response.headers[name]
+        for name in ('Content-Type', 'Content-Disposition', 'Content-Encoding', 'Vary')
+        if name in response.headers
+    }
+    response.app_iter = cache.store(key, response.app_iter, headers)
+    response.headers['X-Export-Cache'] = 'miss'
+    return response
+
+
+@view_config(route_name='_export_cache', request_method='GET', permission='index')
+def export_cache_stats(request):
+    cache = request.registry.get(EXPORT_CACHE)
+    if cache is None:
+        return {'status': 'disabled'}
+    return dict(cache.stats(), status='enabled')
@@ -0,0 +1,390 @@
+from pyramid.httpexceptions import (
+    HTTPBadRequest,
+    HTTPConflict,
+    HTTPNotFound,
+    HTTPServiceUnavailable,
+)
+from pyramid.response import Response
+from pyramid.view import view_config
+from urllib.parse import urlsplit
+from webob.request import Request
+from webob.static import FileIter
+import datetime
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+
+
+log = logging.getLogger(__name__)
+
+EXPORT_JOBS = 'export_jobs'
+# Only the download views can be run as background jobs.
+EXPORT_JOB_PATHS = (
+    '/metadata/',
+    '/report.tsv',
+    '/batch_download/',
+)
+
+
+def includeme(config):
+    config.add_route('export_jobs', '/export_jobs{slash:/?}')
+    config.add_route('export_job', '/export_jobs/{job_id}{slash:/?}')
+    config.add_route('export_job_download', '/export_jobs/{job_id}/download')
+    config.scan(__name__)
+    settings = config.registry.settings
+    directory = settings.get('export_jobs.directory')
+    if directory:
+        config.registry[EXPORT_JOBS] = ExportJobStore(
+            directory,
+            lease=int(settings.get('export_jobs.lease', 600)),
+            expiry=int(settings.get('export_jobs.expiry', 7 * 24 * 3600)),
+        )
+
+
+class LeaseLost(Exception):
+    """The claim of a running export job was taken over by another worker."""
+
+
+def _now():
+    return datetime.datetime.utcnow().isoformat()
+
+
+class ExportJobStore(object):
+    """
+    Export jobs kept as JSON state files next to their finished artifacts.
+
+    The web processes only create jobs and read their state, the actual
+    export runs in the export-worker process, see encoded.commands.export_worker.
+    A worker claims a job by exclusively creating its lock file so several
+    workers can share one directory.
+
+    A claim is a lease of lease seconds, renewed by touching the lock file
+    while the export runs. The job of a worker which stopped renewing it is
+    claimed again, up to max_attempts times. Jobs and their artifacts are
+    removed by cleanup expiry seconds after they were last updated.
+    """
+
+    max_attempts = 3
+
+    def __init__(self, directory, lease=600, expiry=7 * 24 * 3600):
+        self.directory = directory
+        self.lease = lease
+        self.expiry = expiry
+        os.makedirs(directory, exist_ok=True)
+
+    def _state_path(self, job_id):
+        return os.path.join(self.directory, job_id + '.json')
+
+    def _lock_path(self, job_id):
+        return os.path.join(self.directory, job_id + '.lock')
+
+    def artifact_path(self, job_id):
+        return os.path.join(self.directory, job_id + '.data')
+
+    def part_path(self, job):
+        # Per claim, so a worker whose lease was broken can't clobber the next one.
+        return '{}.{}.part'.format(self.artifact_path(job['uuid']), job['claim'])
+
+    def _write(self, job):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f)
+        os.rename(tmp_path, self._state_path(job['uuid']))
+
+    def get(self, job_id):
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        try:
+            with open(self._state_path(job_id)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def create(self, url, userid=None, body=None):
+        job = {
+            'uuid': str(uuid.uuid4()),
+            'status': 'pending',
+            'url': url,
+            'userid': userid,
+            'body': body,
+            'date_created': _now(),
+        }
+        self._write(job)
+        return job
+
+    def update(self, job, **kw):
+        job.update(kw)
+        self._write(job)
+        return job
+
+    def _age(self, path):
+        try:
+            return time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def lease_expired(self, job_id):
+        age = self._age(self._lock_path(job_id))
+        return age is not None and age > self.lease
+
+    def _jobs(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name.startswith('.'):
+                continue
+            job = self.get(name[:-len('.json')])
+            if job is not None:
+                yield job
+
+    def pending(self):
+        jobs = [
+            job for job in self._jobs()
+            if job['status'] == 'pending'
+            or job['status'] == 'running' and self.lease_expired(job['uuid'])
+        ]
+        return sorted(jobs, key=lambda job: job['date_created'])
+
+    def _break_lease(self, job_id):
+        lock = self._lock_path(job_id)
+        stale = '{}.stale-{}'.format(lock, uuid.uuid4())
+        try:
+            os.rename(lock, stale)
+        except OSError:
+            return False
+        try:
+            age = self._age(stale)
+            if age is not None and age <= self.lease:
+                # Another worker reclaimed the job in the meantime.
+                os.rename(stale, lock)
+                return False
+            return True
+        finally:
+            if os.path.exists(stale):
+                os.unlink(stale)
+
+    def claim(self, job):
+        lock = self._lock_path(job['uuid'])
+        token = str(uuid.uuid4())
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            if not self.lease_expired(job['uuid']) or not self._break_lease(job['uuid']):
+                return False
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError:
+                return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(token)
+        attempts = job.get('attempts', 0)
+        if attempts >= self.max_attempts:
+            self.update(
+                job, status='failed', error='Export job was abandoned by its workers.',
+                date_finished=_now())
+            return False
+        self.update(job, status='running', claim=token, attempts=attempts + 1, date_started=_now())
+        return True
+
+    def claim_next(self):
+        for job in self.pending():
+            if self.claim(job):
+                return job
+        return None
+
+    def owns(self, job):
+        """Whether the claim of job is still held."""
+        try:
+            with open(self._lock_path(job['uuid'])) as f:
+                return f.read() == job.get('claim')
+        except (IOError, OSError):
+            return False
+
+    def renew(self, job):
+        """Extend the lease of a claimed job, returns False once it was lost."""
+        if not self.owns(job):
+            return False
+        os.utime(self._lock_path(job['uuid']), None)
+        return True
+
+    def _unlink(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def cleanup(self):
+        """
+        Remove expired jobs with their artifacts, and files left behind by
+        workers which stopped. Returns the number of jobs removed.
+        """
+        removed = 0
+        for job in self._jobs():
+            job_id = job['uuid']
+            if job['status'] == 'running' and not self.lease_expired(job_id):
+                continue
+            age = self._age(self._state_path(job_id))
+            if age is None or age <= self.expiry:
+                continue
+            # The state goes first so the job is never seen without its artifact.
+            for path in (self._state_path(job_id), self.artifact_path(job_id), self._lock_path(job_id)):
+                self._unlink(path)
+            removed += 1
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.tmp-') or name.endswith('.part'):
+                age = self._age(path)
+                if age is not None and age > self.lease:
+                    self._unlink(path)
+        return removed
+
+
+def run_job(app, store, job):
+    """
+    Produce the artifact for job by calling the export view through app.
+
+    The request is made as the user who created the job so it sees exactly
+    what they would have seen, and the body is streamed straight to disk.
+    The lease of the job is renewed while it runs, and nothing is recorded
+    once it was lost to another worker.
+    """
+    environ = {'HTTP_ACCEPT': 'text/tsv'}
+    if job.get('userid'):
+        environ['REMOTE_USER'] = job['userid']
+    request = Request.blank(job['url'], environ=environ)
+    if job.get('body') is not None:
+        request.method = 'POST' if job['url'].startswith('/batch_download') else 'GET'
+        request.content_type = 'application/json'
+        request.body = json.dumps(job['body']).encode('utf-8')
+    part = store.part_path(job)
+    try:
+        response = request.get_response(app)
+        if response.status_int != 200:
+            raise ValueError('Export failed with {}'.format(response.status))
+        size = 0
+        renewed = time.time()
+        with open(part, 'wb') as f:
+            for chunk in response.app_iter:
+                f.write(chunk)
+                size += len(chunk)
+                if time.time() - renewed > store.lease / 4:
+                    if not store.renew(job):
+                        raise LeaseLost()
+                    renewed = time.time()
+        if hasattr(response.app_iter, 'close'):
+            response.app_iter.close()
+        if not store.owns(job):
+            raise LeaseLost()
+        os.rename(part, store.artifact_path(job['uuid']))
+    except LeaseLost:
+        log.warning('Export job %s was claimed by another worker', job['uuid'])
+        if os.path.exists(part):
+            os.unlink(part)
+        return job
+    except Exception as e:
+        log.exception('Export job %s failed', job['uuid'])
+        if os.path.exists(part):
+            os.unlink(part)
+        return store.update(job, status='failed', error=str(e), date_finished=_now())
+    return store.update(
+        job,
+        status='done',
+        content_type=response.headers.get('Content-Type'),
+        content_disposition=response.headers.get('Content-Disposition'),
+        content_encoding=response.headers.get('Content-Encoding'),
+        size=size,
+        date_finished=_now(),
+    )
+
+
+def _request_userid(request):
+    for principal in request.effective_principals:
+        if principal.startswith('userid.'):
+            return principal[len('userid.'):]
+    return None
+
+
+def _get_store(request):
+    store = request.registry.get(EXPORT_JOBS)
+    if store is None:
+        raise HTTPServiceUnavailable(explanation='Export jobs are not enabled.')
+    return store
+
+
+def _get_job(request):
+    store = _get_store(request)
+    job = store.get(request.matchdict['job_id'])
+    # Jobs are private to the user that created them.
+    if job is None or job.get('userid') != _request_userid(request):
+        raise HTTPNotFound()
+    return store, job
+
+
+def _job_json(request, job):
+    result = {
+        key: value
+        for key, value in job.items()
+        if key not in ('body', 'userid', 'claim')
+    }
+    result['@id'] = '/export_jobs/{}/'.format(job['uuid'])
+    result['@type'] = ['ExportJob']
+    if job['status'] == 'done':
+        result['href'] = '/export_jobs/{}/download'.format(job['uuid'])
+    return result
+
+
+@view_config(route_name='export_jobs', request_method='POST', permission='search')
+def export_job_create(context, request):
+    store = _get_store(request)
+    try:
+        data = request.json_body
+    except ValueError:
+        raise HTTPBadRequest(explanation='Request body must be JSON.')
+    url = data.get('url', '')
+    if urlsplit(url).path not in EXPORT_JOB_PATHS:
+        msg = 'Export jobs url must be one of {}.'.format(list(EXPORT_JOB_PATHS))
+        raise HTTPBadRequest(explanation=msg)
+    body = None
+    if data.get('elements'):
+        body = {'elements': data['elements']}
+    job = store.create(url, userid=_request_userid(request), body=body)
+    request.response.status = 201
+    request.response.location = request.route_path('export_job', job_id=job['uuid'], slash='/')
+    return _job_json(request, job)
+
+
+@view_config(route_name='export_job', request_method='GET', permission='search')
+def export_job_status(context, request):
+    _, job = _get_job(request)
+    return _job_json(request, job)
+
+
+@view_config(route_name='export_job_download', request_method=('GET', 'HEAD'), permission='search')
+def export_job_download(context, request):
+    store, job = _get_job(request)
+    if job['status'] != 'done':
+        raise HTTPConflict(explanation='Export job is {}.'.format(job['status']))
+    path = store.artifact_path(job['uuid'])
+    try:
+        f = open(path, 'rb')
+    except (IOError, OSError):
+        # Expired and cleaned up since its state was read.
+        raise HTTPNotFound()
+    stat = os.fstat(f.fileno())
+    response = Response(
+        app_iter=FileIter(f),
+        content_length=stat.st_size,
+        conditional_response=True,
+    )
+    response.headers['Content-Type'] = job.get('content_type') or 'application/octet-stream'
+    if job.get('content_disposition'):
+        response.content_disposition = job['content_disposition']
+    if job.get('content_encoding'):
+        response.content_encoding = job['content_encoding']
+    response.etag = job['uuid']
+    response.last_modified = stat.st_mtime
+    response.accept_ranges = 'bytes'
+    return response
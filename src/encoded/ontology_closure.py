@@ -0,0 +1,58 @@
+ONTOLOGY_CLOSURE = 'ontology_closure'
+
+# Relations of the ontology terms whose transitive closure is kept.
+RELATIONS = ('part_of', 'develops_from')
+
+_EMPTY = frozenset()
+
+
+def ancestors(ontology, term_id, relation='part_of'):
+    """
+    Return every term reachable from term_id through relation, not
+    including term_id unless it is on a cycle.
+    """
+    found = set()
+    pending = list(ontology.get(term_id, {}).get(relation, ()))
+    while pending:
+        parent = pending.pop()
+        if parent in found:
+            continue
+        found.add(parent)
+        pending.extend(ontology.get(parent, {}).get(relation, ()))
+    return frozenset(found)
+
+
+class OntologyClosure(object):
+    """
+    Transitive part_of and develops_from ancestors of every ontology term.
+
+    Computed once when the ontology is loaded, so audits and calculated
+    properties of many items sharing a term don't walk the ontology again.
+    Terms without ancestors share one empty set.
+    """
+
+    def __init__(self, ontology, relations=RELATIONS):
+        self._closures = {
+            relation: {
+                term_id: closure
+                for term_id, closure in (
+                    (term_id, ancestors(ontology, term_id, relation))
+                    for term_id in ontology
+                )
+                if closure
+            }
+            for relation in relations
+        }
+
+    def ancestors(self, term_id, relation='part_of'):
+        return self._closures[relation].get(term_id, _EMPTY)
+
+    def is_ancestor(self, term_id, ancestor_id, relation='part_of'):
+        return ancestor_id in self.ancestors(term_id, relation)
+
+
+def ontology_closure(registry):
+    closure = registry.get(ONTOLOGY_CLOSURE)
+    if closure is None:
+        closure = registry[ONTOLOGY_CLOSURE] = OntologyClosure(registry.get('ontology', {}))
+    return closure
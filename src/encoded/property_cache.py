@@ -0,0 +1,138 @@
+from pyramid.events import subscriber
+from pyramid.view import view_config
+from snovault import (
+    AfterModified,
+    DBSESSION,
+)
+from snovault.storage import PropertySheet
+from snovault.util import get_root_request
+from sqlalchemy import func
+from sqlalchemy.util import LRUCache
+import threading
+
+
+PROPERTY_CACHE = 'property_cache'
+
+
+def includeme(config):
+    config.add_route('_property_cache', '/_property_cache')
+    config.scan(__name__)
+    capacity = int(config.registry.settings.get('property_cache.capacity', 10000))
+    config.registry[PROPERTY_CACHE] = PropertyCache(capacity)
+
+
+class PropertyCache(object):
+    """
+    Process wide cache of single upgraded properties of items.
+
+    Used for small lookups, such as an award's viewing_group, made again and
+    again while rendering or auditing other items, so a hit never loads the
+    item. Edits made by this process drop entries through AfterModified, and
+    sync drops those of items edited by other processes since the last
+    propsheet sid it saw. The number of items is bounded by the
+    property_cache.capacity setting.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # The latest propsheet sid entries are current at.
+        self.sid = None
+        self._cache = LRUCache(capacity)
+        self._lock = threading.Lock()
+
+    def sync(self, session):
+        """Drop the entries of items edited since the last sync, return the latest sid."""
+        with self._lock:
+            sid = self.sid
+        if sid is None:
+            edited = []
+            latest = session.query(func.max(PropertySheet.sid)).scalar() or 0
+        else:
+            edited = session.query(
+                PropertySheet.rid, PropertySheet.sid).filter(PropertySheet.sid > sid).all()
+            latest = max([sid] + [edited_sid for rid, edited_sid in edited])
+        with self._lock:
+            for rid, edited_sid in edited:
+                self._pop(rid)
+            if self.sid is None or latest > self.sid:
+                self.sid = latest
+        return latest
+
+    def get(self, uuid, name, load, sid):
+        """
+        Return property name of the item with uuid, read with load() on a miss.
+
+        sid is the one returned by sync for the transaction reading it, values
+        read in a transaction older than the cache are not remembered.
+        """
+        uuid = str(uuid)
+        entry = self._cache.get(uuid)
+        if entry is not None and name in entry:
+            with self._lock:
+                self.hits += 1
+            return entry[name]
+        with self._lock:
+            self.misses += 1
+        value = load().get(name)
+        with self._lock:
+            if sid == self.sid:
+                entry = self._cache.get(uuid) or {}
+                entry[name] = value
+                self._cache[uuid] = entry
+        return value
+
+    def _pop(self, uuid):
+        if self._cache.pop(str(uuid), None) is not None:
+            self.invalidations += 1
+
+    def invalidate(self, uuid):
+        with self._lock:
+            self._pop(uuid)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'size': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+def _synced_sid(registry, cache):
+    # Other processes' edits are looked for once per request.
+    request = get_root_request()
+    sid = getattr(request, '_property_cache_sid', None)
+    if sid is None:
+        sid = cache.sync(registry[DBSESSION])
+        if request is not None:
+            request._property_cache_sid = sid
+    return sid
+
+
+def item_property(root, uuid, name):
+    """Return the upgraded property name of the item with uuid."""
+    cache = root.registry.get(PROPERTY_CACHE)
+    if cache is None:
+        return root.get_by_uuid(uuid).upgrade_properties().get(name)
+    return cache.get(
+        uuid, name, lambda: root.get_by_uuid(uuid).upgrade_properties(),
+        _synced_sid(root.registry, cache))
+
+
+@subscriber(AfterModified)
+def invalidate_property_cache(event):
+    cache = event.request.registry.get(PROPERTY_CACHE)
+    if cache is not None:
+        cache.invalidate(event.object.uuid)
+
+
+@view_config(route_name='_property_cache', request_method='GET', permission='index')
+def property_cache_stats(request):
+    return request.registry[PROPERTY_CACHE].stats()
@@ -0,0 +1,187 @@
+from pyramid.httpexceptions import HTTPBadRequest
+from pyramid.settings import asbool
+from pyramid.view import view_config
+from snovault.interfaces import CALCULATED_PROPERTIES
+from snovault.util import get_root_request
+import threading
+import time
+
+
+PROPERTY_PROFILER = 'property_profiler'
+
+
+def includeme(config):
+    config.add_route('_calculated_properties', '/_calculated_properties')
+    config.scan(__name__)
+    settings = config.registry.settings
+    if not asbool(settings.get('calculated_property_profiling', False)):
+        return
+    top = int(settings.get('calculated_property_profiling.top', 10))
+    profiler = config.registry[PROPERTY_PROFILER] = PropertyProfiler(top)
+    config.add_request_method(lambda request: {}, '_calculated_property_stats', reify=True)
+    # X-Stats is written by the stats tween once the tweens under it return.
+    config.add_tween(
+        '.property_profiler.calculated_property_stats_tween_factory',
+        under='snovault.stats.stats_tween_factory')
+    # Run after every calculated property has been registered.
+    config.action(
+        ('property_profiler',),
+        profiler.instrument,
+        (config.registry[CALCULATED_PROPERTIES],),
+        order=10,
+    )
+
+
+def _time():
+    return int(time.time() * 1e6)
+
+
+class TimedCalculatedProperty(object):
+    """Wraps a snovault CalculatedProperty to record how long it takes."""
+
+    def __init__(self, prop, profiler):
+        self.prop = prop
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.prop, name)
+
+    def __call__(self, namespace):
+        context = namespace.context
+        if context is None:
+            return self.prop(namespace)
+        type_info = getattr(context, 'type_info', None)
+        type_name = type_info.name if type_info is not None else type(context).__name__
+        stack = self.profiler.stack()
+        stack.append(0)
+        begin = _time()
+        try:
+            return self.prop(namespace)
+        finally:
+            elapsed = _time() - begin
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.profiler.record(type_name, self.prop.name, elapsed, elapsed - children)
+
+
+class PropertyProfiler(object):
+    """
+    Call counts and cumulative time of every calculated property by item type.
+
+    total_time includes the time spent in calculated properties of embedded
+    items, self_time excludes it. Times are in microseconds like the other
+    X-Stats values.
+    """
+
+    def __init__(self, top=10):
+        self.top = top
+        self.timings = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def instrument(self, calculated_properties):
+        for cls_props in calculated_properties.category_cls_props.values():
+            for props in cls_props.values():
+                for name, prop in props.items():
+                    if not isinstance(prop, TimedCalculatedProperty):
+                        props[name] = TimedCalculatedProperty(prop, self)
+
+    def stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def record(self, type_name, name, total_time, self_time):
+        key = (type_name, name)
+        with self._lock:
+            timing = self.timings.setdefault(key, [0, 0, 0])
+            timing[0] += 1
+            timing[1] += total_time
+            timing[2] += self_time
+        request = get_root_request()
+        if request is not None:
+            timing = request._calculated_property_stats.setdefault(key, [0, 0, 0])
+            timing[0] += 1
+            timing[1] += total_time
+            timing[2] += self_time
+
+    def ranking(self, timings, sort='self_time', limit=None):
+        index = {'count': 0, 'total_time': 1, 'self_time': 2}[sort]
+        ranked = sorted(timings.items(), key=lambda item: item[1][index], reverse=True)
+        return [
+            {
+                'item_type': type_name,
+                'name': name,
+                'count': count,
+                'total_time': total_time,
+                'self_time': self_time,
+            }
+            for (type_name, name), (count, total_time, self_time) in ranked[:limit]
+        ]
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(value) for key, value in self.timings.items()}
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+
+
+def add_calculated_property_stats(request):
+    profiler = request.registry.get(PROPERTY_PROFILER)
+    stats = getattr(request, '_stats', None)
+    if profiler is None or stats is None:
+        return
+    timings = request._calculated_property_stats
+    if not timings:
+        return
+    stats['calculated_count'] = sum(count for count, _, _ in timings.values())
+    stats['calculated_time'] = sum(self_time for _, _, self_time in timings.values())
+    for entry in profiler.ranking(timings, limit=profiler.top):
+        key = 'calculated.{item_type}.{name}'.format(**entry)
+        stats[key + '_count'] = entry['count']
+        stats[key + '_time'] = entry['self_time']
+
+
+def calculated_property_stats_tween_factory(handler, registry):
+
+    def calculated_property_stats_tween(request):
+        response = handler(request)
+        add_calculated_property_stats(request)
+        return response
+
+    return calculated_property_stats_tween
+
+
+@view_config(route_name='_calculated_properties', request_method='GET', permission='index')
+def calculated_properties_profile(request):
+    profiler = request.registry.get(PROPERTY_PROFILER)
+    if profiler is None:
+        return {'status': 'disabled'}
+    sort = request.params.get('sort', 'self_time')
+    if sort not in ('count', 'total_time', 'self_time'):
+        sort = 'self_time'
+    try:
+        limit = int(request.params.get('limit', 50))
+    except ValueError:
+        raise HTTPBadRequest(explanation='limit must be an integer.')
+    timings = profiler.snapshot()
+    return {
+        'status': 'enabled',
+        'sort': sort,
+        'calculated_count': sum(count for count, _, _ in timings.values()),
+        'calculated_time': sum(self_time for _, _, self_time in timings.values()),
+        '@graph': profiler.ranking(timings, sort, limit),
+    }
+
+
+@view_config(route_name='_calculated_properties', request_method='DELETE', permission='index')
+def calculated_properties_profile_reset(request):
+    profiler = request.registry.get(PROPERTY_PROFILER)
+    if profiler is not None:
+        profiler.reset()
+    return {'status': 'success'}
@@ -0,0 +1,131 @@
+from pyramid.events import subscriber
+from pyramid.view import view_config
+from snovault import (
+    AfterModified,
+    CONNECTION,
+)
+from snovault.util import quick_deepcopy
+from sqlalchemy.util import LRUCache
+from .types.item_loader import recorded_dependencies
+import threading
+
+
+REFERENCE_CACHE = 'reference_cache'
+
+# Types with few items which very many other items link to.
+REFERENCE_TYPES = frozenset([
+    'Organism',
+    'Award',
+    'Lab',
+    'Platform',
+    'Source',
+])
+
+
+def includeme(config):
+    config.add_route('_reference_cache', '/_reference_cache')
+    config.scan(__name__)
+    capacity = int(config.registry.settings.get('reference_cache.capacity', 1000))
+    config.registry[REFERENCE_CACHE] = ReferenceCache(capacity)
+
+
+class ReferenceCache(object):
+    """
+    Process wide cache of the @@object of reference items.
+
+    Reference items, such as organisms, are embedded by calculated properties
+    of tens of thousands of items, so their rendered objects are kept across
+    requests. Entries remember the tid of every item read while rendering,
+    so items edited by another process are rendered again, and edits made by
+    this process drop them through AfterModified. Items of other types are
+    never kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._cache = LRUCache(capacity)
+        self._lock = threading.Lock()
+
+    def _current(self, request, entry):
+        conn = request.registry[CONNECTION]
+        for uuid, tid in entry['dependencies'].items():
+            item = conn.get_by_uuid(uuid)
+            if item is None or item.tid != tid:
+                return False
+        return True
+
+    def embed(self, request, path):
+        entry = self._cache.get(path)
+        if entry is not None and self._current(request, entry):
+            with self._lock:
+                self.hits += 1
+            # Record the dependencies just as an embed would.
+            request._embedded_uuids.update(entry['dependencies'])
+            request._linked_uuids.update(entry['linked'])
+            return quick_deepcopy(entry['object'])
+        with self._lock:
+            self.misses += 1
+        with recorded_dependencies(request) as (embedded, linked):
+            obj = request.embed(path, '@@object')
+        if obj['@type'][0] not in REFERENCE_TYPES:
+            self._cache.pop(path, None)
+            return obj
+        conn = request.registry[CONNECTION]
+        self._cache[path] = {
+            'uuid': obj['uuid'],
+            'object': quick_deepcopy(obj),
+            'dependencies': {uuid: conn.get_by_uuid(uuid).tid for uuid in embedded},
+            'linked': frozenset(linked),
+        }
+        return obj
+
+    def invalidate(self, uuid):
+        uuid = str(uuid)
+        stale = [
+            path for path, entry in list(self._cache.items())
+            if uuid in entry['dependencies']
+        ]
+        for path in stale:
+            if self._cache.pop(path, None) is not None:
+                with self._lock:
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'size': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+def embed_reference(request, path):
+    """
+    Return the @@object of the reference item at path.
+
+    Use in place of request.embed(path, '@@object') for links to one of
+    REFERENCE_TYPES. Links to other types are simply embedded.
+    """
+    cache = request.registry.get(REFERENCE_CACHE)
+    if cache is None:
+        return request.embed(path, '@@object')
+    return cache.embed(request, path)
+
+
+@subscriber(AfterModified)
+def invalidate_reference_cache(event):
+    cache = event.request.registry.get(REFERENCE_CACHE)
+    if cache is not None:
+        cache.invalidate(event.object.uuid)
+
+
+@view_config(route_name='_reference_cache', request_method='GET', permission='index')
+def reference_cache_stats(request):
+    return request.registry[REFERENCE_CACHE].stats()
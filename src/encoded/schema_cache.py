@@ -0,0 +1,68 @@
+from pyramid.view import view_config
+from snovault.schema_utils import (
+    NoRemoteResolver,
+    SchemaValidator,
+    format_checker,
+    validate,
+)
+import threading
+
+
+SCHEMA_CACHE = 'schema_cache'
+
+
+def includeme(config):
+    config.add_route('_schema_cache', '/_schema_cache')
+    config.scan(__name__)
+    config.registry[SCHEMA_CACHE] = SchemaCache()
+
+
+class SchemaCache(object):
+    """
+    Schema validators reused across validations.
+
+    snovault's validate builds a new validator and resolver for each call.
+    Here they are built once per schema and thread, since a validator holds
+    state while serializing. Data with errors is validated again by
+    snovault's validate, which decides which errors to ignore.
+    """
+
+    def __init__(self):
+        self.validators = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def validator(self, schema):
+        validators = getattr(self._local, 'validators', None)
+        if validators is None:
+            validators = self._local.validators = {}
+        # Schemas live as long as their type, keep them to be sure an id is
+        # not reused.
+        entry = validators.get(id(schema))
+        if entry is None or entry[0] is not schema:
+            resolver = NoRemoteResolver.from_schema(schema)
+            validator = SchemaValidator(
+                schema, resolver=resolver, serialize=True, format_checker=format_checker)
+            entry = validators[id(schema)] = (schema, validator)
+            with self._lock:
+                self.validators += 1
+        return entry[1]
+
+    def validate(self, schema, data, current=None):
+        """snovault.schema_utils.validate, with a cached validator for valid data."""
+        validated, errors = self.validator(schema).serialize(data)
+        if errors:
+            return validate(schema, data, current)
+        return validated, errors
+
+    def stats(self):
+        with self._lock:
+            return {'validators': self.validators}
+
+
+@view_config(route_name='_schema_cache', request_method='GET', permission='index')
+def schema_cache_stats(request):
+    cache = request.registry.get(SCHEMA_CACHE)
+    if cache is None:
+        return {'status': 'disabled'}
+    return dict(cache.stats(), status='enabled')
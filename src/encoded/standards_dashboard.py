@@ -0,0 +1,224 @@
+from collections import defaultdict
+from pyramid.view import view_config
+from snovault import TYPES
+from snovault.elasticsearch.indexer import MAX_CLAUSES_FOR_ES
+from snovault.elasticsearch.interfaces import ELASTIC_SEARCH
+from .audit import thresholds
+from .audit.experiment import excluded_file_statuses
+from .audit.standards_data import (
+    idr_thresholds,
+    replicate_metric_thresholds,
+    spearman_thresholds,
+)
+from .audit.thresholds import (
+    LEVEL_NAMES,
+    dual_threshold_levels,
+    idr_levels,
+    spearman_levels,
+)
+
+
+def includeme(config):
+    config.add_route('_standards_dashboard', '/_standards_dashboard')
+    config.scan(__name__)
+
+
+def _dual_threshold(pipeline, limit):
+    limits = replicate_metric_thresholds[pipeline]
+
+    def levels(columns, field):
+        return dual_threshold_levels(
+            columns[field],
+            limits['upper_limit_' + limit],
+            limits['lower_limit_' + limit],
+        )
+    return levels
+
+
+# Files never embedded in the experiments audited, as for original_files.
+FILTERED_FILE_STATUSES = ['deleted', 'replaced']
+
+
+def _replicated(experiment):
+    return experiment.get('replication_type', 'unreplicated') != 'unreplicated'
+
+
+def _spearman_audited(experiment):
+    return (
+        'replication_type' in experiment and
+        experiment.get('assay_term_name') != 'single cell isolation followed by RNA-seq'
+    )
+
+
+def _any_experiment(experiment):
+    return True
+
+
+# The standards of the audits of experiment.py whose thresholds depend only
+# on the quality metric and the replication type of its experiment, as
+# (quality metric type, field, levels(columns, field), condition). Only the
+# quality metrics of experiments for which condition(experiment) is true
+# are counted, as only those are audited.
+STANDARDS = [
+    (
+        'IDRQualityMetric', 'rescue_ratio',
+        lambda columns, field: idr_levels(
+            columns['rescue_ratio'], columns['self_consistency_ratio'],
+            idr_thresholds['rescue_ratio'], idr_thresholds['self_consistency_ratio']),
+        _replicated,
+    ),
+    (
+        'MadQualityMetric', 'Spearman correlation',
+        lambda columns, field: spearman_levels(
+            columns[field], columns['replication_type'],
+            spearman_thresholds['isogenic'], spearman_thresholds['anisogenic']),
+        _spearman_audited,
+    ),
+    (
+        'MicroRnaMappingQualityMetric', 'aligned_reads',
+        _dual_threshold('microRNA-seq pipeline', 'reads_mapped'),
+        _any_experiment,
+    ),
+    (
+        'MicroRnaQuantificationQualityMetric', 'expressed_mirnas',
+        _dual_threshold('microRNA-seq pipeline', 'expressed_mirnas'),
+        _any_experiment,
+    ),
+    (
+        'LongReadRnaMappingQualityMetric', 'full_length_non_chimeric_read_count',
+        _dual_threshold('Long read RNA-seq pipeline', 'flnc'),
+        _any_experiment,
+    ),
+    (
+        'LongReadRnaMappingQualityMetric', 'mapping_rate',
+        _dual_threshold('Long read RNA-seq pipeline', 'mapping_rate'),
+        _any_experiment,
+    ),
+    (
+        'LongReadRnaQuantificationQualityMetric', 'genes_detected',
+        _dual_threshold('Long read RNA-seq pipeline', 'genes_detected'),
+        _any_experiment,
+    ),
+]
+
+# Other fields read by the levels of a standard.
+STANDARD_FIELDS = {
+    'rescue_ratio': ['self_consistency_ratio'],
+}
+
+# Fields of the experiments read by the conditions of the standards.
+EXPERIMENT_FIELDS = ['assay_term_name', 'replication_type', 'status']
+
+
+def _scan(es, index, source, query=None):
+    from elasticsearch.helpers import scan
+    query = {'query': query or {'match_all': {}}}
+    for hit in scan(es, index=index, query=query, _source=source):
+        yield hit['_source'].get('object', {})
+
+
+def _objects(es, index, paths, fields):
+    """Return {@id: object} of the items of index with those paths."""
+    paths = sorted(paths)
+    source = ['object.@id'] + ['object.' + field for field in fields]
+    result = {}
+    for start in range(0, len(paths), MAX_CLAUSES_FOR_ES):
+        query = {'terms': {'embedded.@id': paths[start:start + MAX_CLAUSES_FOR_ES]}}
+        for obj in _scan(es, index, source, query):
+            result[obj['@id']] = obj
+    return result
+
+
+def metric_experiments(es, metrics):
+    """
+    The experiment of each quality metric, or None if none of the files it
+    is a quality metric of is audited with an experiment.
+    """
+    paths = {path for metric in metrics for path in metric.get('quality_metric_of', ())}
+    files = _objects(es, 'file', paths, ['dataset', 'status'])
+    datasets = {obj.get('dataset') for obj in files.values()} - {None}
+    experiments = _objects(es, 'experiment', datasets, EXPERIMENT_FIELDS)
+    result = []
+    for metric in metrics:
+        found = None
+        for path in metric.get('quality_metric_of', ()):
+            obj = files.get(path, {})
+            experiment = experiments.get(obj.get('dataset'))
+            if experiment is None:
+                continue
+            excluded = FILTERED_FILE_STATUSES + excluded_file_statuses(experiment.get('status'))
+            if obj.get('status') not in excluded:
+                found = experiment
+                break
+        result.append(found)
+    return result
+
+
+def metric_columns(metrics, fields):
+    """Arrays of the fields of metrics, with NaN for missing values."""
+    return {
+        field: thresholds.numpy.array(
+            [metric.get(field, thresholds.numpy.nan) for metric in metrics], dtype=float)
+        for field in fields
+    }
+
+
+def evaluate_standard(metrics, field, levels, replication_type=None):
+    """Count the quality metrics of each level of one standard."""
+    columns = metric_columns(metrics, [field] + STANDARD_FIELDS.get(field, []))
+    if replication_type is not None:
+        columns['replication_type'] = thresholds.numpy.array(replication_type, dtype=object)
+    result = levels(columns, field)
+    counts = defaultdict(int)
+    for level, count in zip(*thresholds.numpy.unique(result, return_counts=True)):
+        counts[LEVEL_NAMES.get(int(level), 'COMPLIANT')] = int(count)
+    counts['total'] = len(metrics)
+    return dict(counts)
+
+
+@view_config(route_name='_standards_dashboard', request_method='GET', permission='index')
+def standards_dashboard(request):
+    """
+    Compliance of every quality metric with the data standards.
+
+    Quality metrics are read from elasticsearch and the thresholds of the
+    standards audits applied to all of them at once. As in the audits, only
+    metrics of experiment files of an audited status are counted, and each
+    standard keeps the experiments its audit looks at. Unlike the audits,
+    metrics of every assembly and genome annotation are counted, and the
+    pipelines the files come from aren't checked.
+    """
+    if thresholds.numpy is None:
+        return {'status': 'unavailable', 'detail': 'numpy is not installed.'}
+    es = request.registry[ELASTIC_SEARCH]
+    types = request.registry[TYPES]
+    graph = []
+    metrics_by_type = {}
+    for type_name, field, levels, condition in STANDARDS:
+        if type_name not in metrics_by_type:
+            fields = set()
+            for other_type, other_field, other_levels, other_condition in STANDARDS:
+                if other_type == type_name:
+                    fields.add(other_field)
+                    fields.update(STANDARD_FIELDS.get(other_field, []))
+            source = ['object.quality_metric_of'] + ['object.' + name for name in sorted(fields)]
+            metrics = list(_scan(es, types[type_name].item_type, source))
+            metrics_by_type[type_name] = list(zip(metrics, metric_experiments(es, metrics)))
+        audited = [
+            (metric, experiment)
+            for metric, experiment in metrics_by_type[type_name]
+            if experiment is not None and condition(experiment)
+        ]
+        replication_type = None
+        if type_name == 'MadQualityMetric':
+            replication_type = [experiment.get('replication_type') for _, experiment in audited]
+        graph.append(dict(
+            evaluate_standard(
+                [metric for metric, _ in audited], field, levels, replication_type),
+            quality_metric=type_name,
+            field=field,
+        ))
+    return {
+        'status': 'success',
+        '@graph': graph,
+    }
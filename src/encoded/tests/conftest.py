@@ -44,6 +44,7 @@ _app_settings = {
     'pyramid.debug_authorization': True,
     'postgresql.statement_timeout': 20,
     'tm.attempts': 3,
+    'audit_cache.capacity': 50000,
     'ontology_path': pkg_resources.resource_filename('encoded', '../../ontology.json'),
 }
 
@@ -65,6 +66,25 @@ def app(app_settings):
     return main({}, **app_settings)
 
 
+@fixture(scope='session')
+def profiling_app(app_settings):
+    '''Application with calculated property and audit profiling enabled.
+    '''
+    from encoded import main
+    settings = dict(app_settings, calculated_property_profiling=True, audit_profiling=True)
+    return main({}, **settings)
+
+
+@fixture
+def profiling_testapp(profiling_app):
+    from webtest import TestApp
+    environ = {
+        'HTTP_ACCEPT': 'application/json',
+        'REMOTE_USER': 'TEST',
+    }
+    return TestApp(profiling_app, environ)
+
+
 @pytest.mark.fixture_cost(500)
 @pytest.yield_fixture(scope='session')
 def workbook(conn, app, app_settings):
@@ -396,3 +396,16 @@ def test_is_part_of_empty_part_of_in_ontology(ontology):
 def test_is_part_of_parent(ontology):
     from encoded.audit.biosample import is_part_of
     assert is_part_of('UBERON:0002469', 'UBERON:0001043', ontology)
+
+
+def test_ontology_closure(ontology):
+    from encoded.ontology_closure import OntologyClosure
+    closure = OntologyClosure(ontology)
+    assert closure.ancestors('UBERON:0002469') == {
+        'UBERON:0001043', 'UBERON:0001096', 'UBERON:1111111', 'UBERON:0001007',
+        'UBERON:0004908', 'UBERON:1234567', 'UBERON:0006920',
+    }
+    assert closure.is_ancestor('UBERON:0004908', 'UBERON:0004908')
+    assert not closure.is_ancestor('UBERON:0001007', 'UBERON:0001043')
+    assert not closure.is_ancestor('UBERON:1231231', 'UBERON:0001043')
+    assert not closure.ancestors('UBERON:0002469', 'develops_from')
@@ -0,0 +1,168 @@
+import pytest
+
+
+calls = []
+
+
+def counting_checker(value, system):
+    from snovault.auditor import AuditFailure
+    calls.append(system['path'])
+    if not value.get('checker1'):
+        yield AuditFailure('testchecker', 'Missing checker1')
+
+
+def failing_checker(value, system):
+    from snovault.auditor import AuditFailure
+    calls.append(system['path'])
+    yield AuditFailure('testchecker', 'Before error')
+    raise ValueError('error')
+
+
+def raising_checker(value, system):
+    from snovault.auditor import AuditFailure
+    calls.append(system['path'])
+    yield AuditFailure('testchecker', 'Before raise')
+    raise AuditFailure('testchecker', 'Raised')
+
+
+def award_function(value, system, suffix):
+    from snovault.auditor import AuditFailure
+    calls.append('award' + suffix)
+    yield AuditFailure('testchecker', 'Award {}'.format(value['award']))
+
+
+def replicates_function(value, system, suffix):
+    from snovault.auditor import AuditFailure
+    calls.append('replicates' + suffix)
+    yield AuditFailure('testchecker', 'Replicates {}'.format(len(value['replicates'])))
+
+
+@pytest.fixture
+def auditor():
+    from snovault.auditor import Auditor
+    from encoded.audit_cache import AuditCache
+    del calls[:]
+    auditor = Auditor()
+    auditor.add_audit_checker(counting_checker, 'test')
+    auditor.add_audit_checker(failing_checker, 'test')
+    cache = AuditCache(capacity=10)
+    cache.instrument(auditor)
+    return auditor, cache
+
+
+@pytest.fixture
+def dummy_request(registry):
+    from pyramid.testing import DummyRequest
+    _embed = {}
+    request = DummyRequest(registry=registry, _embed=_embed, embed=lambda path: _embed[path])
+    request._embedded_uuids = set()
+    request._linked_uuids = set()
+    return request
+
+
+def test_audit_cache_reuses_failures(auditor, dummy_request):
+    auditor, cache = auditor
+    dummy_request._embed['/foo/@@embedded'] = {}
+    first = auditor.audit(request=dummy_request, path='/foo/', types='test')
+    second = auditor.audit(request=dummy_request, path='/foo/', types='test')
+    assert first == second
+    assert [error['category'] for error in first] == [
+        'testchecker', 'testchecker', 'audit script error']
+    # The failing checker is never remembered.
+    assert calls == ['/foo/', '/foo/', '/foo/']
+    assert cache.stats()['hits'] == 1
+
+
+def test_audit_cache_changed_value(auditor, dummy_request):
+    auditor, cache = auditor
+    dummy_request._embed['/foo/@@embedded'] = {}
+    assert len(auditor.audit(request=dummy_request, path='/foo/', types='test')) == 3
+    dummy_request._embed['/foo/@@embedded'] = {'checker1': True}
+    assert len(auditor.audit(request=dummy_request, path='/foo/', types='test')) == 2
+    assert cache.stats()['hits'] == 0
+
+
+def test_audit_cache_raised_failure(registry, dummy_request):
+    from snovault.auditor import Auditor
+    from encoded.audit_cache import AuditCache
+    del calls[:]
+    auditor = Auditor()
+    auditor.add_audit_checker(raising_checker, 'test')
+    AuditCache(capacity=10).instrument(auditor)
+    dummy_request._embed['/foo/@@embedded'] = {}
+    for i in range(2):
+        errors = auditor.audit(request=dummy_request, path='/foo/', types='test')
+        # Raised while iterating, an audit script error as without the cache.
+        assert [error['category'] for error in errors] == [
+            'testchecker', 'audit script error']
+    assert calls == ['/foo/', '/foo/']
+
+
+def test_audit_cache_stats_view(testapp):
+    res = testapp.get('/_audit_cache')
+    assert res.json['status'] == 'enabled'
+    testapp.delete('/_audit_cache')
+    assert testapp.get('/_audit_cache').json['size'] == 0
+
+
+@pytest.fixture
+def framed_dispatcher():
+    from encoded.audit_cache import audit_frame
+    del calls[:]
+    return {
+        'audit_replicates': replicates_function,
+        'audit_award': audit_frame(['award'])(award_function),
+    }
+
+
+def test_dispatch_framed_embeds_frame_once(
+        registry, dummy_request, framed_dispatcher, monkeypatch):
+    from encoded.audit_cache import (
+        AUDIT_CACHE,
+        dispatch_framed,
+    )
+    monkeypatch.delitem(registry, AUDIT_CACHE, raising=False)
+    dummy_request._embed['/foo/@@expand?expand=award&expand=replicates'] = {
+        'award': 'ENCODE', 'replicates': [{}, {}]}
+    system = {'request': dummy_request, 'path': '/foo/'}
+    failures = list(dispatch_framed([
+        (framed_dispatcher, lambda value: ('!',)),
+        ({'audit_award_again': award_function}, lambda value: ('?',)),
+    ], system, ['replicates', 'award']))
+    assert [failure.detail for failure in failures] == [
+        'Replicates 2', 'Award ENCODE', 'Award ENCODE']
+    assert calls == ['replicates!', 'award!', 'award?']
+
+
+def test_dispatch_framed_embeds_missing_frames(
+        registry, dummy_request, framed_dispatcher, monkeypatch):
+    from encoded.audit_cache import (
+        AUDIT_CACHE,
+        AuditCache,
+        dispatch_framed,
+    )
+    cache = AuditCache(capacity=10)
+    monkeypatch.setitem(registry, AUDIT_CACHE, cache)
+    union = '/foo/@@expand?expand=award&expand=replicates'
+    dummy_request._embed[union] = {'award': 'ENCODE', 'replicates': [{}, {}]}
+    system = {'request': dummy_request, 'path': '/foo/'}
+
+    def dispatch():
+        return [
+            failure.detail for failure in dispatch_framed(
+                [(framed_dispatcher, lambda value: ('!',))], system, ['replicates', 'award'])
+        ]
+
+    for i in range(2):
+        assert dispatch() == ['Replicates 2', 'Award ENCODE']
+    # Both groups ran on a single embed of the union of their frames.
+    assert sorted(calls) == ['award!', 'replicates!']
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['frame_bytes_saved'] == stats['frame_bytes'] > 0
+    del cache._cache[('/foo/@@expand?expand=award', ((0, 'audit_award'),))]
+    del dummy_request._embed[union]
+    dummy_request._embed['/foo/@@expand?expand=award'] = {'award': 'ENCODE'}
+    # Only the frame of the missing group is embedded.
+    assert dispatch() == ['Replicates 2', 'Award ENCODE']
+    assert sorted(calls) == ['award!', 'award!', 'replicates!']
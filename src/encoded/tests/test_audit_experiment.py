@@ -1495,6 +1495,32 @@ def test_audit_experiment_archived_files_mismatched_platforms(
                for error in collect_audit_errors(res))
 
 
+def test_audit_experiment_platforms_new_file(
+        testapp, lab, award, file_fastq, base_experiment, base_replicate,
+        base_library, platform2):
+    res = testapp.get(base_experiment['@id'] + '@@index-data')
+    assert all(error['category'] != 'inconsistent platforms'
+               for error in collect_audit_errors(res))
+    # Only the rev links of the experiment change, not its tid.
+    testapp.post_json('/file', {
+        'dataset': base_experiment['@id'],
+        'replicate': base_replicate['@id'],
+        'file_format': 'fastq',
+        'md5sum': '94be74b6e14515393547f4ebfa66d77b',
+        'output_type': 'reads',
+        'platform': platform2['@id'],
+        'read_length': 50,
+        'run_type': 'single-ended',
+        'file_size': 34,
+        'lab': lab['@id'],
+        'award': award['@id'],
+        'status': 'in progress',
+    })
+    res = testapp.get(base_experiment['@id'] + '@@index-data')
+    assert any(error['category'] == 'inconsistent platforms'
+               for error in collect_audit_errors(res))
+
+
 def test_audit_experiment_internal_tag(testapp, base_experiment,
                                        base_biosample,
                                        library_1,
@@ -3817,3 +3843,25 @@ def test_audit_experiment_chip_seq_control_target_failures(
         error['category'] != 'unexpected target of control experiment'
         for error in collect_audit_errors(res)
     )
+
+
+def test_files_structure_indexes():
+    from encoded.audit.experiment import create_files_mapping
+    fastq_1 = {'@id': '/files/F1/', 'accession': 'F1', 'status': 'released',
+               'file_format': 'fastq', 'output_type': 'reads',
+               'biological_replicates': [1], 'technical_replicates': ['1_1']}
+    fastq_2 = {'@id': '/files/F2/', 'accession': 'F2', 'status': 'deleted',
+               'file_format': 'fastq', 'output_type': 'reads',
+               'biological_replicates': [2], 'technical_replicates': ['2_1']}
+    bam = {'@id': '/files/B1/', 'accession': 'B1', 'status': 'released',
+           'file_format': 'bam', 'output_type': 'redacted alignments',
+           'derived_from': ['/files/F1/', '/files/F2/', '/files/F3/']}
+    contributing = {'@id': '/files/F3/', 'accession': 'F3', 'status': 'released',
+                    'file_format': 'fastq', 'output_type': 'reads'}
+    structure = create_files_mapping(
+        [fastq_1, fastq_2, bam], ['deleted'], [contributing])
+    assert list(structure['alignments']) == ['/files/B1/']
+    assert list(structure['fastq_files']) == ['/files/F1/']
+    assert structure.derived_from(bam, 'fastq') == [fastq_1, contributing]
+    assert structure.replicate_fastqs('technical_replicates', {'1_1', '2_1'}) == [fastq_1]
+    assert not structure.replicate_fastqs('biological_replicates', {2})
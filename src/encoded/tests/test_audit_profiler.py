@@ -0,0 +1,148 @@
+import pytest
+
+
+def raising_checker(value, system):
+    from snovault.auditor import AuditFailure
+    raise AuditFailure('testchecker', 'Missing checker1')
+
+
+def yielding_checker(value, system, excluded_types):
+    from snovault.auditor import AuditFailure
+    yield AuditFailure('testchecker', 'First')
+    yield AuditFailure('testchecker', 'Second')
+
+
+def late_raising_checker(value, system):
+    from snovault.auditor import AuditFailure
+    yield AuditFailure('testchecker', 'First')
+    raise AuditFailure('testchecker', 'Raised')
+
+
+def broken_checker(value, system):
+    raise ValueError('broken')
+    yield
+
+
+@pytest.fixture
+def profiler(registry):
+    from encoded.audit_profiler import (
+        AUDIT_PROFILER,
+        AuditProfiler,
+    )
+    profiler = AuditProfiler(top=5)
+    registry[AUDIT_PROFILER] = profiler
+    yield profiler
+    del registry[AUDIT_PROFILER]
+
+
+@pytest.fixture
+def dispatchers(monkeypatch):
+    """Copies of the function_dispatcher dictionaries, restored afterwards."""
+    import sys
+    from encoded.audit_profiler import AUDIT_PACKAGE
+    copies = {}
+    for name, module in list(sys.modules.items()):
+        if module is None or not name.startswith(AUDIT_PACKAGE + '.'):
+            continue
+        for attr, dispatcher in list(vars(module).items()):
+            if attr.startswith('function_dispatcher') and isinstance(dispatcher, dict):
+                copies[name, attr] = copy = dict(dispatcher)
+                monkeypatch.setattr(module, attr, copy)
+    return copies
+
+
+@pytest.fixture
+def system(registry):
+    from pyramid.testing import DummyRequest
+    return {'request': DummyRequest(registry=registry), 'path': '/foo/'}
+
+
+def test_timed_audit_function_failures(profiler, system):
+    from encoded.audit_profiler import TimedAuditFunction
+    function = TimedAuditFunction(yielding_checker)
+    assert function.__name__ == 'yielding_checker'
+    failures = list(function({}, system, ['deleted']))
+    assert [failure.detail for failure in failures] == ['First', 'Second']
+    count, total_time, max_time, failures, errors = profiler.snapshot()['yielding_checker']
+    assert (count, failures, errors) == (1, 2, 0)
+    assert max_time == total_time
+
+
+def test_timed_audit_function_raised_failure(profiler, system):
+    from snovault.auditor import AuditFailure
+    from encoded.audit_profiler import TimedAuditFunction
+    with pytest.raises(AuditFailure):
+        TimedAuditFunction(raising_checker)({}, system)
+    assert profiler.snapshot()['raising_checker'][3:] == [1, 0]
+
+
+def test_timed_audit_function_failure_while_iterating(profiler, system):
+    from snovault.auditor import Auditor
+    from encoded.audit_profiler import TimedAuditFunction
+    auditor = Auditor()
+    auditor.add_audit_checker(TimedAuditFunction(raising_checker), 'test', frame=None)
+    auditor.add_audit_checker(TimedAuditFunction(late_raising_checker), 'test', frame=None)
+    system['request'].embed = lambda path: {}
+    errors = auditor.audit(request=system['request'], path='/foo/', types='test')
+    # The same as without the profiler.
+    assert [error['category'] for error in errors] == [
+        'testchecker', 'testchecker', 'audit script error']
+    assert profiler.snapshot()['late_raising_checker'][3:] == [1, 1]
+
+
+def test_timed_audit_function_error(profiler, system):
+    from encoded.audit_profiler import TimedAuditFunction
+    with pytest.raises(ValueError):
+        list(TimedAuditFunction(broken_checker)({}, system))
+    assert profiler.snapshot()['broken_checker'][4] == 1
+
+
+def test_audit_profiler_ranking(profiler):
+    profiler.record('audit_experiment_standards_dispatcher', 50, failures=1)
+    profiler.record('audit_experiment_standards_dispatcher', 30)
+    profiler.record('audit_experiment_documents', 60, error=True)
+    timings = profiler.snapshot()
+    by_total = profiler.ranking(timings)
+    assert [entry['name'] for entry in by_total] == [
+        'audit_experiment_standards_dispatcher', 'audit_experiment_documents']
+    assert by_total[0] == {
+        'name': 'audit_experiment_standards_dispatcher',
+        'count': 2,
+        'total_time': 80,
+        'max_time': 50,
+        'failures': 1,
+        'errors': 0,
+    }
+    by_max = profiler.ranking(timings, 'max_time', limit=1)
+    assert by_max[0]['name'] == 'audit_experiment_documents'
+
+
+def test_audit_profiler_instrument(profiler, dispatchers):
+    from snovault.auditor import Auditor
+    from encoded.audit_profiler import TimedAuditFunction
+    from encoded.audit import experiment
+    auditor = Auditor()
+    auditor.add_audit_checker(raising_checker, 'test')
+    profiler.instrument(auditor)
+    profiler.instrument(auditor)
+    (order, checker, condition, frame), = auditor.type_checkers['test']
+    assert isinstance(checker, TimedAuditFunction)
+    assert checker.function is raising_checker
+    dispatcher = dispatchers['encoded.audit.experiment', 'function_dispatcher_with_files']
+    assert experiment.function_dispatcher_with_files is dispatcher
+    for function in dispatcher.values():
+        assert isinstance(function, TimedAuditFunction)
+        assert not isinstance(function.function, TimedAuditFunction)
+
+
+def test_audit_functions_view_disabled(testapp):
+    res = testapp.get('/_audit_functions')
+    assert res.json['status'] == 'disabled'
+
+
+def test_audit_function_stats_header(profiling_testapp, experiment):
+    from urllib.parse import parse_qsl
+    res = profiling_testapp.get(experiment['@id'] + '@@index-data')
+    stats = dict(parse_qsl(res.headers['X-Stats']))
+    assert int(stats['audit.audit_experiment_count']) == 1
+    assert 'audit.audit_experiment_max_time' in stats
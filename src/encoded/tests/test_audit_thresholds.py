@@ -0,0 +1,46 @@
+import pytest
+
+
+numpy = pytest.importorskip('numpy')
+
+
+VALUES = [0, 0.1, 0.2, 0.5, 0.6, 0.8, 0.85, 0.9, 1, 2, 2.5, 100, 3000000, 5000000, 5000001]
+
+
+def test_read_depth_levels_match_audit():
+    from encoded.audit.standards_data import pipelines_with_read_depth
+    from encoded.audit.thresholds import read_depth_level, read_depth_levels
+    marks = pipelines_with_read_depth['ChIP-seq read mapping']['narrow']
+    depths = [0, 4999999, 5000000, 9999999, 10000000, 19999999, 20000000]
+    assert list(read_depth_levels(depths, marks)) == [
+        read_depth_level(depth, marks) for depth in depths]
+    assert list(read_depth_levels(depths, marks)) == [60, 60, 50, 50, 40, 40, 0]
+
+
+def test_dual_threshold_levels_match_audit():
+    from encoded.audit.thresholds import dual_threshold_level, dual_threshold_levels
+    levels = dual_threshold_levels(VALUES + [numpy.nan], 0.85, 0.8)
+    assert list(levels) == [dual_threshold_level(value, 0.85, 0.8) for value in VALUES + [None]]
+
+
+def test_idr_levels_match_audit():
+    from encoded.audit.thresholds import idr_level, idr_levels
+    pairs = [(rescue, self) for rescue in VALUES for self in VALUES]
+    levels = idr_levels([p[0] for p in pairs], [p[1] for p in pairs], 2, 2)
+    assert list(levels) == [idr_level(rescue, self, 2, 2) for rescue, self in pairs]
+    assert list(idr_levels([3, numpy.nan], [numpy.nan, 3], 2, 2)) == [0, 0]
+
+
+@pytest.mark.parametrize('replication_type', ['isogenic', 'anisogenic', 'unreplicated'])
+def test_replicate_concordance_levels_match_audit(replication_type):
+    from encoded.audit.thresholds import (
+        mad_level,
+        mad_levels,
+        spearman_level,
+        spearman_levels,
+    )
+    types = [replication_type] * len(VALUES)
+    assert list(mad_levels(VALUES, types)) == [
+        mad_level(value, replication_type) for value in VALUES]
+    assert list(spearman_levels(VALUES, types, 0.9, 0.8)) == [
+        spearman_level(value, replication_type, 0.9, 0.8) for value in VALUES]
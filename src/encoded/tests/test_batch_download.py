@@ -19,6 +19,11 @@ from encoded.batch_download import _audit_mapping
 from encoded.batch_download import _tsv_mapping_annotation
 from encoded.batch_download import _excluded_columns
 from encoded.batch_download import get_biosample_accessions
+from encoded.batch_download import compress_app_iter
+from encoded.batch_download import iter_tsv
+from encoded.batch_download import iter_columnar
+from encoded.batch_download import compile_path
+from encoded.batch_download import compile_cell
 
 
 param_list_1 = {'files.file_type': 'fastq'}
@@ -387,6 +392,7 @@ def test_batch_download_lookup_column_value(lookup_column_value_item, lookup_col
 
 
 def test_batch_download_view(testapp, workbook):
+    import gzip
     r = testapp.get('/batch_download/?type=Experiment&status=released')
     lines = r.text.split('\n')
     assert lines[0] == (
@@ -394,6 +400,8 @@ def test_batch_download_view(testapp, workbook):
     )
     assert len(lines) >= 79
     assert 'http://localhost/files/ENCFF002MXF/@@download/ENCFF002MXF.fastq.gz' in lines
+    r = testapp.get('/batch_download/?type=Experiment&compress=gzip&status=released')
+    assert gzip.decompress(r.body).decode('utf-8').split('\n')[0] == lines[0]
 
 
 def test_batch_download_header_and_rows(testapp, workbook):
@@ -455,3 +463,171 @@ def test_metadata_tsv_fields(testapp, workbook):
     assert len(headers) == len(set(headers))
     expected_headers = set(_tsv_mapping.keys()) - set(_excluded_columns)
     assert len(expected_headers - set(headers)) == 0
+
+
+def test_iter_tsv_yields_one_chunk_per_row():
+    chunks = list(iter_tsv([['a', 'b'], ['c', 'd']], lineterminator='\n'))
+    assert chunks == [b'a\tb\n', b'c\td\n']
+
+
+def test_compress_app_iter_gzip():
+    import gzip
+    chunks = [b'col1\tcol2\n', b'val1\tval2\n'] * 100
+    target = b''.join(compress_app_iter(iter(chunks), 'gzip'))
+    assert gzip.decompress(target) == b''.join(chunks)
+
+
+def test_metadata_view_compress_param(testapp, workbook):
+    import gzip
+    plain = testapp.get('/metadata/?type=Experiment')
+    r = testapp.get('/metadata/?type=Experiment&compress=gzip')
+    assert r.headers['Content-Type'] == 'application/gzip'
+    assert r.headers['Content-Disposition'] == 'attachment;filename="metadata.tsv.gz"'
+    assert 'Content-Encoding' not in r.headers
+    assert gzip.decompress(r.body) == plain.body
+
+
+def test_metadata_view_accept_encoding(testapp, workbook):
+    import gzip
+    plain = testapp.get('/metadata/?type=Experiment')
+    assert 'Content-Encoding' not in plain.headers
+    r = testapp.get('/metadata/?type=Experiment', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in r.headers['Vary']
+    assert gzip.decompress(r.body) == plain.body
+
+
+def test_report_download_compress_param(testapp, workbook):
+    import gzip
+    r = testapp.get('/report.tsv?type=Experiment&sort=accession&compress=gzip')
+    assert r.headers['content-disposition'].endswith('.tsv.gz"')
+    lines = gzip.decompress(r.body).splitlines()
+    assert len(lines) == 50
+
+
+def test_batch_download_unknown_compression(testapp, workbook):
+    testapp.get('/batch_download/?type=Experiment&compress=lzma', status=400)
+
+
+def test_iter_columnar_parquet_row_groups(mocker):
+    import io
+    pq = pytest.importorskip('pyarrow.parquet')
+    mocker.patch('encoded.batch_download.COLUMNAR_ROW_GROUP_SIZE', 2)
+    rows = [['ID', 'Title', 'ID']] + [['/a/{}/'.format(i), None, i] for i in range(5)]
+    parquet_file = pq.ParquetFile(io.BytesIO(b''.join(iter_columnar(iter(rows), 'parquet'))))
+    assert parquet_file.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column_names == ['ID', 'Title', 'ID (2)']
+    assert table.column('Title').to_pylist() == [''] * 5
+
+
+def test_iter_columnar_arrow():
+    import io
+    ipc = pytest.importorskip('pyarrow.ipc')
+    rows = [['ID', 'Title'], ['/a/1/', 'one']]
+    table = ipc.open_file(io.BytesIO(b''.join(iter_columnar(iter(rows), 'arrow')))).read_all()
+    assert table.to_pydict() == {'ID': ['/a/1/'], 'Title': ['one']}
+
+
+def test_report_download_parquet(testapp, workbook):
+    import io
+    pq = pytest.importorskip('pyarrow.parquet')
+    res = testapp.get('/report.tsv?type=Experiment&sort=accession&format=parquet')
+    assert res.headers['content-type'] == 'application/vnd.apache.parquet'
+    assert res.headers['content-disposition'].endswith('.parquet"')
+    table = pq.read_table(io.BytesIO(res.body))
+    tsv = testapp.get('/report.tsv?type=Experiment&sort=accession')
+    assert table.num_rows == len(tsv.body.splitlines()) - 2
+    assert table.column_names[:2] == ['ID', 'Accession']
+
+
+def test_metadata_view_parquet(testapp, workbook):
+    import io
+    pq = pytest.importorskip('pyarrow.parquet')
+    res = testapp.get('/metadata/?type=Experiment&format=parquet')
+    assert res.headers['content-disposition'] == 'attachment;filename="metadata.parquet"'
+    table = pq.read_table(io.BytesIO(res.body))
+    assert 'File accession' in table.column_names
+    assert table.num_rows == len(testapp.get('/metadata/?type=Experiment').text.splitlines()) - 1
+
+
+def test_compile_path_descends_lists():
+    extract = compile_path('software_used.software.title')
+    obj = {
+        'software_used': [
+            {'software': {'title': 'bwa'}},
+            {'software': {'title': 'macs2'}},
+            {'software': {}},
+        ]
+    }
+    assert extract(obj) == ['bwa', 'macs2']
+    assert extract({}) == []
+
+
+def test_compile_cell_file_columns():
+    result_file = {
+        'derived_from': ['/files/ENCFF001AAA/', '/files/ENCFF002AAA/'],
+        'cloud_metadata': {'url': 's3://bucket/ENCFF003AAA.bed.gz'},
+        'dbxrefs': ['a', 'b', 'a'],
+        'file_size': 100,
+    }
+    assert compile_cell('Derived from', ['files.derived_from'], prefix='files.')(result_file) == 'ENCFF001AAA, ENCFF002AAA'
+    assert compile_cell('S3 URL', ['files.cloud_metadata'], prefix='files.')(result_file) == 's3://bucket/ENCFF003AAA.bed.gz'
+    assert compile_cell('dbxrefs', ['files.dbxrefs'], prefix='files.')(result_file) == 'a, b'
+    assert compile_cell('Size', ['files.file_size'], prefix='files.')(result_file) == '100'
+    assert compile_cell('Assembly', ['files.assembly'], prefix='files.')(result_file) == ''
+
+
+def test_metadata_view_annotation(testapp, workbook):
+    r = testapp.get('/metadata/?type=Annotation')
+    lines = r.text.splitlines()
+    header = lines[0].split('\t')
+    expected = [c for c in _tsv_mapping_annotation if c not in _excluded_columns] + list(_audit_mapping)
+    assert header == expected
+    for line in lines[1:]:
+        assert len(line.split('\t')) == len(header)
+
+
+def test_metadata_view_annotation_at_id(testapp, workbook):
+    def accessions(url):
+        lines = testapp.get(url).text.splitlines()
+        column = lines[0].split('\t').index('Dataset accession')
+        return [line.split('\t')[column] for line in lines[1:]]
+
+    exported = accessions('/metadata/?type=Annotation')
+    assert len(set(exported)) > 1
+    at_id = '/annotations/{}/'.format(exported[0])
+    selected = accessions('/metadata/?type=Annotation&@id={}'.format(at_id))
+    assert selected == [exported[0]] * exported.count(exported[0])
+
+
+def test_report_download_cached_filename(mocker):
+    from pyramid.response import Response
+    from pyramid.testing import DummyRequest
+    from encoded import batch_download
+    cached = Response(
+        content_disposition='attachment;filename="experiment_report_2019_1_2_3h_4m.tsv.gz"')
+    mocker.patch.object(batch_download, 'cached_export', return_value=cached)
+    request = DummyRequest(params={'type': 'Experiment', 'compress': 'gzip'})
+    response = batch_download.report_download(None, request)
+    assert response is cached
+    assert '2019_1_2_3h_4m' not in response.content_disposition
+    assert response.content_disposition.startswith('attachment;filename="experiment_report_')
+    assert response.content_disposition.endswith('m.tsv.gz"')
+
+
+def test_compress_param_not_searched(testapp, workbook, mocker):
+    from urllib.parse import quote
+    from encoded import batch_download
+    searched = mocker.patch.object(batch_download, 'quote', side_effect=quote)
+    report_search = mocker.patch.object(
+        batch_download, 'search', side_effect=batch_download.search)
+    testapp.get('/metadata/?type=Experiment&compress=gzip')
+    testapp.get('/metadata/?type=Annotation&compress=gzip')
+    testapp.get('/batch_download/?type=Experiment&compress=gzip')
+    testapp.get('/report.tsv?type=Experiment&compress=gzip')
+    paths = [args[0] for args, kwargs in searched.call_args_list]
+    assert len(paths) >= 3
+    assert not [path for path in paths if 'compress' in path]
+    (context, request), kwargs = report_search.call_args
+    assert 'compress' not in request.params
@@ -0,0 +1,127 @@
+import json
+import pytest
+
+
+EXPERIMENT = '/experiments/ENCSR000AAA/'
+REPLICATE = '/replicates/r1/'
+AWARD = '/awards/A1/'
+
+
+def documents():
+    return [
+        {
+            'item_type': 'experiment',
+            'uuid': 'e1',
+            'paths': [EXPERIMENT, '/experiments/e1/'],
+            'object': {'@id': EXPERIMENT, 'award': AWARD, 'replicates': [REPLICATE]},
+            'embedded': {'@id': EXPERIMENT, 'award': {'@id': AWARD}},
+            'audit': {
+                'ERROR': [
+                    {'category': 'missing award', 'level_name': 'ERROR',
+                     'detail': 'No award', 'path': EXPERIMENT},
+                    {'category': 'inherited', 'level_name': 'ERROR',
+                     'detail': 'Replicate error', 'path': REPLICATE},
+                ],
+            },
+        },
+        {
+            'item_type': 'replicate',
+            'uuid': 'r1',
+            'paths': [REPLICATE],
+            'object': {'@id': REPLICATE, 'award': AWARD},
+            'embedded': {'@id': REPLICATE},
+        },
+        {
+            'item_type': 'award',
+            'uuid': 'a1',
+            'paths': [AWARD],
+            'object': {'@id': AWARD, 'name': 'A1'},
+            'embedded': {'@id': AWARD, 'name': 'A1'},
+        },
+    ]
+
+
+def audit_replicates(value, system):
+    from snovault.auditor import AuditFailure
+    if not value.get('award'):
+        yield AuditFailure('missing award', 'No award', level='ERROR')
+    awards = [replicate['award']['name'] for replicate in value['replicates']]
+    yield AuditFailure('replicate awards', ', '.join(awards), level='WARNING')
+
+
+class FakeTypeInfo(object):
+    name = 'Experiment'
+    base_types = ['Dataset', 'Item']
+
+
+class FakeApp(object):
+
+    def __init__(self):
+        from snovault import (
+            AUDITOR,
+            TYPES,
+        )
+        from snovault.auditor import Auditor
+        auditor = Auditor()
+        auditor.add_audit_checker(audit_replicates, 'Experiment', frame=['replicates.award'])
+        self.registry = {
+            AUDITOR: auditor,
+            TYPES: {'experiment': FakeTypeInfo()},
+        }
+
+
+@pytest.fixture
+def snapshot():
+    from encoded.commands.bulk_audit import load_snapshot
+    return load_snapshot(documents(), ['experiment'])
+
+
+def test_snapshot_audited_types(snapshot):
+    assert list(snapshot.item_types) == [EXPERIMENT]
+    assert sorted(snapshot.objects) == [AWARD, EXPERIMENT, REPLICATE]
+
+
+def test_snapshot_embed(snapshot):
+    assert snapshot.embed('/experiments/e1/@@object')['replicates'] == [REPLICATE]
+    assert snapshot.embed('/e1/')['award'] == {'@id': AWARD}
+    with pytest.raises(KeyError):
+        snapshot.embed(EXPERIMENT + '@@audit')
+
+
+def test_snapshot_expand(snapshot):
+    value = snapshot.embed(EXPERIMENT + '@@expand?expand=award&expand=replicates.award')
+    assert value['award']['name'] == 'A1'
+    replicate, = value['replicates']
+    assert replicate['@id'] == REPLICATE
+    assert replicate['award'] == {'@id': AWARD, 'name': 'A1'}
+    # Nothing expanded is kept in the snapshot.
+    assert snapshot.embed(EXPERIMENT + '@@object')['award'] == AWARD
+
+
+def test_self_audits():
+    from encoded.commands.bulk_audit import self_audits
+    audits = documents()[0]['audit']
+    assert [audit['category'] for audit in self_audits(audits, EXPERIMENT)] == [
+        'missing award']
+    assert self_audits({'ERROR': [{'category': 'no path'}]}, EXPERIMENT) == [
+        {'category': 'no path'}]
+
+
+def test_bulk_audit_run(tmpdir):
+    from encoded.commands.bulk_audit import (
+        read_dump,
+        run,
+    )
+    dump = tmpdir.join('snapshot.jsonl')
+    dump.write('\n'.join(json.dumps(document) for document in documents()) + '\n\n')
+    result = run(FakeApp(), read_dump(str(dump)), ['experiment'], processes=1, chunksize=1)
+    assert result['items'] == 1
+    assert result['errors'] == {}
+    assert result['categories'] == {
+        'missing award': {'indexed': 1, 'audited': 0, 'added': 0, 'removed': 1},
+        'replicate awards': {'indexed': 0, 'audited': 1, 'added': 1, 'removed': 0},
+    }
+    assert result['changed_items'] == {
+        'missing award': {'added': [], 'removed': [EXPERIMENT]},
+        'replicate awards': {'added': [EXPERIMENT], 'removed': []},
+    }
@@ -73,3 +73,31 @@ def test_embedded_uuids_experiment(experiment, replicate, library, biosample, or
     assert library['uuid'] in embedded_uuids
     assert biosample['uuid'] in embedded_uuids
     assert organism['uuid'] in embedded_uuids
+
+
+def test_paths_filtered_by_status(content, dummy_request, threadlocals):
+    from encoded.types.base import paths_filtered_by_status
+    paths = ['/testing-link-sources/{}/'.format(source['uuid']) for source in sources]
+    assert paths_filtered_by_status(dummy_request, paths) == paths[:1]
+    assert paths_filtered_by_status(dummy_request, paths, include=('deleted',)) == paths[1:]
+    assert dummy_request._embedded_uuids == {source['uuid'] for source in sources}
+
+
+def test_paths_filtered_by_status_after_modified(content, dummy_request, threadlocals):
+    from snovault import AfterModified
+    from encoded.types.base import paths_filtered_by_status
+    paths = ['/testing-link-sources/{}/'.format(source['uuid']) for source in sources]
+    assert paths_filtered_by_status(dummy_request, paths) == paths[:1]
+    item = dummy_request.root.get(sources[1]['uuid'])
+    item.update(dict(item.properties, status='current'))
+    dummy_request.registry.notify(AfterModified(item, dummy_request))
+    assert paths_filtered_by_status(dummy_request, paths) == paths
+
+
+def test_item_loader_embed_objects(content, dummy_request, threadlocals):
+    from encoded.types.item_loader import item_loader
+    paths = ['/testing-link-targets/one/', '/testing-link-targets/two/']
+    objects = item_loader(dummy_request).embed_objects(dummy_request, paths + [None])
+    assert sorted(objects) == paths
+    assert [objects[path]['@id'] for path in paths] == paths
+    assert {target['uuid'] for target in targets} <= dummy_request._embedded_uuids
@@ -0,0 +1,77 @@
+import os
+import pytest
+
+
+@pytest.fixture
+def export_cache(tmpdir):
+    from encoded.export_cache import ExportCache
+    return ExportCache(str(tmpdir.join('export_cache')), max_size=100)
+
+
+def test_export_cache_miss_then_hit(export_cache):
+    assert export_cache.get('abc') is None
+    headers = {'Content-Type': 'text/tsv; charset=UTF-8'}
+    chunks = list(export_cache.store('abc', iter([b'a\tb\n', b'c\td\n']), headers))
+    assert chunks == [b'a\tb\n', b'c\td\n']
+    path, size, cached_headers = export_cache.get('abc')
+    assert size == 8
+    assert cached_headers == headers
+    with open(path, 'rb') as f:
+        assert f.read() == b'a\tb\nc\td\n'
+    stats = export_cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['stores'] == 1
+
+
+def test_export_cache_partial_body_not_stored(export_cache):
+    app_iter = export_cache.store('abc', iter([b'x' * 10, b'y' * 10]), {})
+    next(app_iter)
+    app_iter.close()
+    assert export_cache.get('abc') is None
+    assert os.listdir(export_cache.directory) == []
+
+
+def test_export_cache_evicts_least_recently_used(export_cache):
+    list(export_cache.store('first', iter([b'x' * 40]), {}))
+    list(export_cache.store('second', iter([b'x' * 40]), {}))
+    os.utime(export_cache._path('first'), (1, 1))
+    os.utime(export_cache._path('second'), (2, 2))
+    export_cache.get('first')
+    list(export_cache.store('third', iter([b'x' * 40]), {}))
+    assert export_cache.get('second') is None
+    assert export_cache.get('first') is not None
+    assert export_cache.get('third') is not None
+    assert export_cache.stats()['evictions'] == 1
+
+
+def test_export_cache_stats_view(testapp):
+    res = testapp.get('/_export_cache')
+    assert res.json['status'] == 'disabled'
+
+
+def test_cached_export_served_as_stored(export_cache):
+    from pyramid.response import Response
+    from pyramid.testing import DummyRequest
+    from encoded.export_cache import (
+        EXPORT_CACHE,
+        cached_export,
+        store_export,
+    )
+    export_cache.make_key = lambda request, variant=None: repr(variant)
+    request = DummyRequest()
+    request.registry = {EXPORT_CACHE: export_cache}
+    assert cached_export(request, ('gzip', False)) is None
+    response = Response(app_iter=iter([b'abc']), content_type='text/tsv')
+    response.content_encoding = 'gzip'
+    response.vary = ('Accept-Encoding',)
+    assert b''.join(store_export(request, response).app_iter) == b'abc'
+    request = DummyRequest()
+    request.registry = {EXPORT_CACHE: export_cache}
+    assert cached_export(request, (None, False)) is None
+    cached = cached_export(request, ('gzip', False))
+    assert cached.content_length == 3
+    assert cached.content_encoding == 'gzip'
+    assert cached.vary == ('Accept-Encoding',)
+    assert b''.join(cached.app_iter) == b'abc'
+    cached.app_iter.close()
@@ -0,0 +1,104 @@
+import pytest
+
+
+@pytest.fixture
+def export_job_store(tmpdir):
+    from encoded.export_jobs import ExportJobStore
+    return ExportJobStore(str(tmpdir.join('export_jobs')))
+
+
+@pytest.yield_fixture
+def registered_export_job_store(app, export_job_store):
+    from encoded.export_jobs import EXPORT_JOBS
+    app.registry[EXPORT_JOBS] = export_job_store
+    yield export_job_store
+    del app.registry[EXPORT_JOBS]
+
+
+def test_export_job_store_claim_once(export_job_store):
+    job = export_job_store.create('/report.tsv?type=Experiment')
+    assert export_job_store.get(job['uuid'])['status'] == 'pending'
+    claimed = export_job_store.claim_next()
+    assert claimed['uuid'] == job['uuid']
+    assert claimed['status'] == 'running'
+    assert export_job_store.claim(job) is False
+    assert export_job_store.claim_next() is None
+
+
+def test_export_job_store_rejects_bad_ids(export_job_store):
+    assert export_job_store.get('../etc/passwd') is None
+
+
+def test_export_jobs_disabled(testapp):
+    testapp.post_json('/export_jobs/', {'url': '/metadata/?type=Experiment'}, status=503)
+
+
+def test_export_jobs_rejects_other_urls(testapp, registered_export_job_store):
+    testapp.post_json('/export_jobs/', {'url': '/search/?type=Experiment'}, status=400)
+
+
+def test_export_job_run_and_range_download(testapp, app, workbook, registered_export_job_store):
+    from encoded.export_jobs import run_job
+    res = testapp.post_json('/export_jobs/', {'url': '/report.tsv?type=Experiment&sort=accession'}, status=201)
+    job_id = res.json['uuid']
+    assert res.json['status'] == 'pending'
+    testapp.get('/export_jobs/{}/download'.format(job_id), status=409)
+    job = registered_export_job_store.claim_next()
+    job = run_job(app, registered_export_job_store, job)
+    assert job['status'] == 'done'
+    res = testapp.get('/export_jobs/{}/'.format(job_id))
+    assert res.json['href'] == '/export_jobs/{}/download'.format(job_id)
+    full = testapp.get(res.json['href'])
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    assert len(full.body) == job['size']
+    partial = testapp.get(res.json['href'], headers={'Range': 'bytes=10-'}, status=206)
+    assert partial.body == full.body[10:]
+
+
+def _age(path, seconds):
+    import os
+    import time
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_export_job_store_reclaims_expired_lease(export_job_store):
+    job = export_job_store.create('/report.tsv?type=Experiment')
+    first = export_job_store.claim_next()
+    assert export_job_store.pending() == []
+    _age(export_job_store._lock_path(job['uuid']), export_job_store.lease + 1)
+    second = export_job_store.claim_next()
+    assert second['uuid'] == job['uuid']
+    assert second['attempts'] == 2
+    assert export_job_store.owns(second)
+    assert not export_job_store.owns(first)
+    assert export_job_store.renew(first) is False
+    assert export_job_store.claim_next() is None
+
+
+def test_export_job_store_gives_up_after_max_attempts(export_job_store):
+    job = export_job_store.create('/report.tsv?type=Experiment')
+    for attempt in range(export_job_store.max_attempts):
+        assert export_job_store.claim_next()['uuid'] == job['uuid']
+        _age(export_job_store._lock_path(job['uuid']), export_job_store.lease + 1)
+    assert export_job_store.claim_next() is None
+    assert export_job_store.get(job['uuid'])['status'] == 'failed'
+
+
+def test_export_job_store_cleanup(export_job_store):
+    import os
+    done = export_job_store.create('/report.tsv?type=Experiment')
+    export_job_store.claim(done)
+    export_job_store.update(done, status='done')
+    with open(export_job_store.artifact_path(done['uuid']), 'wb') as f:
+        f.write(b'data')
+    recent = export_job_store.create('/metadata/?type=Experiment')
+    with open(export_job_store.part_path(dict(done, claim='gone')), 'wb'):
+        pass
+    assert export_job_store.cleanup() == 0
+    _age(export_job_store._state_path(done['uuid']), export_job_store.expiry + 1)
+    _age(export_job_store.part_path(dict(done, claim='gone')), export_job_store.lease + 1)
+    assert export_job_store.cleanup() == 1
+    assert export_job_store.get(done['uuid']) is None
+    assert export_job_store.get(recent['uuid']) is not None
+    assert sorted(os.listdir(export_job_store.directory)) == [recent['uuid'] + '.json']
@@ -30,6 +30,9 @@ def app_settings(wsgi_server_host_port, elasticsearch_server, postgresql_server)
     settings['queue_worker_batch_size'] = 2000
     settings['visindexer'] = True
     settings['regionindexer'] = True
+    settings['auditindexer'] = True
+    settings['audit_indexer.deferred_types'] = 'TestingPostPutPatch'
+    settings['audit_indexer.processes'] = 2
     return settings
 
 
@@ -43,6 +46,8 @@ def app(app_settings):
     # Shutdown multiprocessing pool to close db conns.
     from snovault.elasticsearch import INDEXER
     app.registry[INDEXER].shutdown()
+    from encoded.audit_indexer import AUDIT_INDEXER
+    app.registry[AUDIT_INDEXER].shutdown()
 
     from snovault import DBSESSION
     DBSession = app.registry[DBSESSION]
@@ -103,6 +108,25 @@ def test_indexing_simple(testapp, indexer_testapp):
     assert res.json['total'] == 2
 
 
+def test_indexing_deferred_audits(app, testapp, indexer_testapp):
+    from snovault import TYPES
+    from snovault.elasticsearch import ELASTIC_SEARCH
+    es = app.registry[ELASTIC_SEARCH]
+    item_type = app.registry[TYPES]['TestingPostPutPatch'].item_type
+    res = testapp.post_json('/testing-post-put-patch/', {'required': ''})
+    uuid = res.json['@graph'][0]['uuid']
+    indexer_testapp.post_json('/index', {'record': True})
+    document = es.get(index=item_type, doc_type=item_type, id=uuid)
+    assert document['_source']['audit_pending']
+    res = indexer_testapp.post_json('/index_audit', {'record': True})
+    assert res.json['indexed'] == 1
+    audited = es.get(index=item_type, doc_type=item_type, id=uuid)
+    assert 'audit_pending' not in audited['_source']
+    assert audited['_version'] == document['_version']
+    res = indexer_testapp.post_json('/index_audit', {'record': True})
+    assert res.json['pending'] == 0
+
+
 @pytest.mark.slow
 def test_indexing_workbook(testapp, indexer_testapp):
     # First post a single item so that subsequent indexing is incremental
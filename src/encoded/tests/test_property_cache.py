@@ -0,0 +1,81 @@
+import pytest
+
+
+class FakeItem(object):
+    def __init__(self, properties):
+        self.properties = properties
+        self.upgrades = 0
+
+    def upgrade_properties(self):
+        self.upgrades += 1
+        return self.properties
+
+
+@pytest.fixture
+def property_cache():
+    from encoded.property_cache import PropertyCache
+    cache = PropertyCache(capacity=10)
+    cache.sid = 1
+    return cache
+
+
+def test_property_cache_hit(property_cache):
+    item = FakeItem({'rfa': 'ENCODE3'})
+    assert property_cache.get('a', 'rfa', item.upgrade_properties, 1) == 'ENCODE3'
+    assert property_cache.get('a', 'rfa', item.upgrade_properties, 1) == 'ENCODE3'
+    assert item.upgrades == 1
+    stats = property_cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+
+
+def test_property_cache_old_transaction_not_remembered(property_cache):
+    item = FakeItem({'rfa': 'ENCODE3'})
+    property_cache.get('a', 'rfa', item.upgrade_properties, 0)
+    property_cache.get('a', 'rfa', item.upgrade_properties, 0)
+    assert item.upgrades == 2
+
+
+def test_property_cache_invalidate(property_cache):
+    item = FakeItem({'rfa': 'ENCODE3'})
+    property_cache.get('a', 'rfa', item.upgrade_properties, 1)
+    property_cache.invalidate('a')
+    item.properties = {'rfa': 'ENCODE4'}
+    assert property_cache.get('a', 'rfa', item.upgrade_properties, 1) == 'ENCODE4'
+    assert property_cache.stats()['invalidations'] == 1
+
+
+def test_property_cache_bounded(property_cache):
+    for i in range(100):
+        property_cache.get(str(i), 'rfa', FakeItem({}).upgrade_properties, 1)
+    assert property_cache.stats()['size'] <= 15
+
+
+def test_item_property_hit_not_loaded(testapp, award, root, mocker):
+    from encoded.audit.conditions import _award_rfa
+    assert _award_rfa(award['uuid'], root) == award['rfa']
+    get_by_uuid = mocker.spy(root, 'get_by_uuid')
+    assert _award_rfa(award['uuid'], root) == award['rfa']
+    assert not get_by_uuid.called
+
+
+def test_property_cache_sees_edits_of_other_processes(testapp, award, root):
+    from encoded.audit.conditions import _award_rfa
+    assert _award_rfa(award['uuid'], root) == award['rfa']
+    # Written without AfterModified, like an edit made by another process.
+    item = root.get_by_uuid(award['uuid'])
+    item.update(dict(item.upgrade_properties(), rfa='GGR'))
+    assert _award_rfa(award['uuid'], root) == 'GGR'
+
+
+def test_property_cache_invalidated_on_edit(testapp, award, root):
+    from encoded.audit.conditions import _award_rfa
+    assert _award_rfa(award['uuid'], root) == award['rfa']
+    testapp.patch_json(award['@id'], {'rfa': 'GGR'})
+    assert _award_rfa(award['uuid'], root) == 'GGR'
+
+
+def test_property_cache_stats_view(testapp):
+    res = testapp.get('/_property_cache')
+    assert 'hit_rate' in res.json
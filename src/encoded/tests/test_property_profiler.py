@@ -0,0 +1,99 @@
+import pytest
+
+
+class FakeTypeInfo(object):
+    name = 'Experiment'
+
+
+class FakeContext(object):
+    type_info = FakeTypeInfo()
+
+
+class FakeNamespace(object):
+    context = FakeContext()
+
+
+class FakeProperty(object):
+    define = False
+    schema = {'type': 'string'}
+
+    def __init__(self, name, result=None, nested=None):
+        self.name = name
+        self.result = result
+        self.nested = nested
+
+    def __call__(self, namespace):
+        if self.nested is not None:
+            self.nested(namespace)
+        return self.result
+
+
+@pytest.fixture
+def profiler():
+    from encoded.property_profiler import PropertyProfiler
+    return PropertyProfiler(top=5)
+
+
+def test_timed_calculated_property(profiler):
+    from encoded.property_profiler import TimedCalculatedProperty
+    prop = TimedCalculatedProperty(FakeProperty('assay_title', 'ChIP-seq'), profiler)
+    assert prop(FakeNamespace()) == 'ChIP-seq'
+    assert prop(FakeNamespace()) == 'ChIP-seq'
+    assert prop.schema == {'type': 'string'}
+    count, total_time, self_time = profiler.snapshot()[('Experiment', 'assay_title')]
+    assert count == 2
+    assert total_time == self_time
+
+
+def test_timed_calculated_property_self_time(profiler):
+    from encoded.property_profiler import TimedCalculatedProperty
+    inner = TimedCalculatedProperty(FakeProperty('summary'), profiler)
+    outer = TimedCalculatedProperty(FakeProperty('biosample_summary', nested=inner), profiler)
+    outer(FakeNamespace())
+    timings = profiler.snapshot()
+    inner_total = timings[('Experiment', 'summary')][1]
+    count, total_time, self_time = timings[('Experiment', 'biosample_summary')]
+    assert self_time == total_time - inner_total
+    assert profiler.stack() == []
+
+
+def test_property_profiler_ranking(profiler):
+    profiler.record('Experiment', 'assay_title', 10, 10)
+    profiler.record('Experiment', 'biosample_summary', 50, 5)
+    profiler.record('Experiment', 'biosample_summary', 50, 5)
+    timings = profiler.snapshot()
+    by_self = profiler.ranking(timings, 'self_time')
+    assert [entry['name'] for entry in by_self] == ['assay_title', 'biosample_summary']
+    by_total = profiler.ranking(timings, 'total_time', limit=1)
+    assert by_total == [{
+        'item_type': 'Experiment',
+        'name': 'biosample_summary',
+        'count': 2,
+        'total_time': 100,
+        'self_time': 10,
+    }]
+
+
+def test_property_profiler_instrument(profiler):
+    from snovault.calculated import CalculatedProperties
+    from encoded.property_profiler import TimedCalculatedProperty
+    calculated_properties = CalculatedProperties()
+    calculated_properties.register_prop(lambda: None, 'title', FakeContext)
+    profiler.instrument(calculated_properties)
+    profiler.instrument(calculated_properties)
+    prop = calculated_properties.props_for(FakeContext)['title']
+    assert isinstance(prop, TimedCalculatedProperty)
+    assert not isinstance(prop.prop, TimedCalculatedProperty)
+
+
+def test_calculated_properties_view_disabled(testapp):
+    res = testapp.get('/_calculated_properties')
+    assert res.json['status'] == 'disabled'
+
+
+def test_calculated_property_stats_header(profiling_testapp, experiment):
+    from urllib.parse import parse_qsl
+    res = profiling_testapp.get(experiment['@id'])
+    stats = dict(parse_qsl(res.headers['X-Stats']))
+    assert int(stats['calculated_count']) > 0
+    assert any(key.startswith('calculated.Experiment.') for key in stats)
@@ -0,0 +1,39 @@
+def test_reference_cache_gene_title(testapp, organism):
+    item = {
+        'dbxrefs': ['HGNC:1771'],
+        'geneid': '1017',
+        'symbol': 'CDK2',
+        'ncbi_entrez_status': 'live',
+        'organism': organism['uuid'],
+    }
+    gene = testapp.post_json('/gene', item).json['@graph'][0]
+    res = testapp.get(gene['@id'] + '@@index-data')
+    assert res.json['object']['title'] == 'CDK2 ({})'.format(organism['scientific_name'])
+    assert organism['uuid'] in res.json['embedded_uuids']
+    stats = testapp.get('/_reference_cache').json
+    assert stats['size'] >= 1
+
+
+def test_reference_cache_invalidated_on_edit(testapp, organism):
+    res = testapp.get('/_reference_cache').json
+    before = res['invalidations']
+    item = {
+        'label': 'ATF4',
+        'target_organism': organism['@id'],
+        'investigated_as': ['transcription factor'],
+    }
+    target = testapp.post_json('/target', item).json['@graph'][0]
+    assert target['title'] == 'ATF4 ({})'.format(organism['scientific_name'])
+    testapp.patch_json(organism['@id'], {'scientific_name': 'Homo sapiens sapiens'})
+    assert testapp.get('/_reference_cache').json['invalidations'] > before
+    res = testapp.get(target['@id'] + '@@object')
+    assert res.json['title'] == 'ATF4 (Homo sapiens sapiens)'
+
+
+def test_reference_cache_skips_other_types(testapp, registry, dummy_request, threadlocals, lab, award, biosample):
+    from encoded.reference_cache import REFERENCE_CACHE
+    cache = registry[REFERENCE_CACHE]
+    cache.embed(dummy_request, biosample['@id'])
+    assert biosample['@id'] not in cache._cache
+    cache.embed(dummy_request, lab['@id'])
+    assert lab['@id'] in cache._cache
@@ -0,0 +1,38 @@
+import pytest
+
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string'},
+    },
+}
+
+
+@pytest.fixture
+def schema_cache():
+    from encoded.schema_cache import SchemaCache
+    return SchemaCache()
+
+
+def test_schema_cache_validator_reused(schema_cache):
+    validator = schema_cache.validator(SCHEMA)
+    assert schema_cache.validator(SCHEMA) is validator
+    assert schema_cache.validator(dict(SCHEMA)) is not validator
+    assert schema_cache.stats()['validators'] == 2
+
+
+def test_schema_cache_validate(schema_cache):
+    from snovault.schema_utils import validate
+    validated, errors = schema_cache.validate(SCHEMA, {'name': 'a'})
+    assert validated == {'name': 'a'}
+    assert not errors
+    validated, errors = schema_cache.validate(SCHEMA, {'name': 1})
+    error, = errors
+    assert list(error.path) == ['name']
+    assert [e.message for e in errors] == [e.message for e in validate(SCHEMA, {'name': 1})[1]]
+
+
+def test_schema_cache_view(testapp):
+    res = testapp.get('/_schema_cache')
+    assert res.json['status'] == 'enabled'
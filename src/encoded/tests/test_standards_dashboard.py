@@ -0,0 +1,114 @@
+import pytest
+
+
+numpy = pytest.importorskip('numpy')
+
+
+INDICES = {
+    'file': [
+        {'@id': '/files/F1/', 'dataset': '/experiments/E1/', 'status': 'released'},
+        {'@id': '/files/F2/', 'dataset': '/experiments/E1/', 'status': 'archived'},
+        {'@id': '/files/F3/', 'dataset': '/experiments/E2/', 'status': 'released'},
+        {'@id': '/files/F4/', 'dataset': '/annotations/A1/', 'status': 'released'},
+    ],
+    'experiment': [
+        {'@id': '/experiments/E1/', 'assay_term_name': 'RNA-seq',
+         'replication_type': 'isogenic', 'status': 'released'},
+        {'@id': '/experiments/E2/',
+         'assay_term_name': 'single cell isolation followed by RNA-seq',
+         'replication_type': 'isogenic', 'status': 'released'},
+    ],
+    'mad_quality_metric': [
+        {'quality_metric_of': ['/files/F1/'], 'Spearman correlation': 0.95},
+        {'quality_metric_of': ['/files/F1/'], 'Spearman correlation': 0.85},
+        # Archived file of a released experiment.
+        {'quality_metric_of': ['/files/F2/'], 'Spearman correlation': 0.5},
+        # Single cell RNA-seq.
+        {'quality_metric_of': ['/files/F3/'], 'Spearman correlation': 0.1},
+        # Not of an experiment.
+        {'quality_metric_of': ['/files/F4/'], 'Spearman correlation': 0.1},
+    ],
+    'idr_quality_metric': [
+        {'quality_metric_of': ['/files/F1/'], 'rescue_ratio': 3, 'self_consistency_ratio': 3},
+        {'quality_metric_of': ['/files/F2/', '/files/F1/'], 'rescue_ratio': 3},
+    ],
+}
+
+
+def fake_scan(es, index, source, query=None):
+    objects = INDICES.get(index, [])
+    if query is not None:
+        paths = query['terms']['embedded.@id']
+        objects = [obj for obj in objects if obj['@id'] in paths]
+    return iter(objects)
+
+
+@pytest.fixture
+def fake_es(monkeypatch, registry):
+    from snovault.elasticsearch.interfaces import ELASTIC_SEARCH
+    from encoded import standards_dashboard
+    monkeypatch.setattr(standards_dashboard, '_scan', fake_scan)
+    previous = registry.get(ELASTIC_SEARCH)
+    registry[ELASTIC_SEARCH] = es = object()
+    yield es
+    if previous is None:
+        del registry[ELASTIC_SEARCH]
+    else:
+        registry[ELASTIC_SEARCH] = previous
+
+
+def test_evaluate_standard():
+    from encoded.audit.standards_data import spearman_thresholds
+    from encoded.audit.thresholds import spearman_levels
+    from encoded.standards_dashboard import evaluate_standard
+
+    def levels(columns, field):
+        return spearman_levels(
+            columns[field], columns['replication_type'],
+            spearman_thresholds['isogenic'], spearman_thresholds['anisogenic'])
+
+    metrics = [
+        {'Spearman correlation': 0.95},
+        {'Spearman correlation': 0.85},
+        {'Spearman correlation': 0.85},
+        {},
+    ]
+    counts = evaluate_standard(
+        metrics, 'Spearman correlation', levels,
+        ['isogenic', 'isogenic', 'anisogenic', 'isogenic'])
+    assert counts == {'COMPLIANT': 3, 'WARNING': 1, 'total': 4}
+
+
+def test_metric_experiments(fake_es):
+    from encoded.standards_dashboard import metric_experiments
+    experiments = metric_experiments(fake_es, INDICES['mad_quality_metric'])
+    assert [experiment and experiment['@id'] for experiment in experiments] == [
+        '/experiments/E1/', '/experiments/E1/', None, '/experiments/E2/', None]
+    # Any audited file of the metric is enough.
+    assert [
+        experiment['@id']
+        for experiment in metric_experiments(fake_es, INDICES['idr_quality_metric'])
+    ] == ['/experiments/E1/', '/experiments/E1/']
+
+
+def test_metric_experiments_archived(fake_es, monkeypatch):
+    from encoded.standards_dashboard import metric_experiments
+    experiments = [dict(INDICES['experiment'][0], status='archived')]
+    monkeypatch.setitem(INDICES, 'experiment', experiments)
+    found = metric_experiments(fake_es, INDICES['mad_quality_metric'][:3])
+    assert [experiment['@id'] for experiment in found] == ['/experiments/E1/'] * 3
+
+
+def test_standards_dashboard_view(fake_es, dummy_request):
+    from encoded.standards_dashboard import standards_dashboard
+    result = standards_dashboard(dummy_request)
+    assert result['status'] == 'success'
+    graph = {
+        (entry.pop('quality_metric'), entry.pop('field')): entry
+        for entry in result['@graph']
+    }
+    assert graph['MadQualityMetric', 'Spearman correlation'] == {
+        'COMPLIANT': 1, 'WARNING': 1, 'total': 2}
+    assert graph['IDRQualityMetric', 'rescue_ratio'] == {
+        'COMPLIANT': 1, 'NOT_COMPLIANT': 1, 'total': 2}
+    assert graph['MicroRnaMappingQualityMetric', 'aligned_reads'] == {'total': 0}
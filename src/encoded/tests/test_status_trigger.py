@@ -661,3 +661,39 @@ def test_set_status_no_validation_error_on_content_error_details(testapp, file):
     r = testapp.get(file['@id'] + '@@raw')
     assert 'content_error_detail' in r.json
     testapp.patch_json(file['@id'] + '@@set_status?update=true&validate=false', {'status': 'uploading'}, status=200)
+
+
+class IndexedDocument(object):
+    def __init__(self, hit):
+        self.hit = hit
+
+    def get(self, **kw):
+        return self.hit
+
+
+def test_set_status_indexed_audit_current(registry, dummy_request, root, experiment):
+    from snovault.elasticsearch.interfaces import ELASTIC_SEARCH
+    from encoded.types.base import indexed_audit
+    item = root.get_by_uuid(experiment['uuid'])
+    audit = {'ERROR': [{'category': 'test', 'detail': 'Indexed'}]}
+    hit = {
+        '_version': 2 ** 62,
+        '_source': {
+            'audit': audit,
+            'embedded_uuids': [experiment['uuid']],
+            'linked_uuids': [],
+            'tid': item.tid,
+        },
+    }
+    assert indexed_audit(dummy_request, item) is None
+    registry[ELASTIC_SEARCH] = IndexedDocument(hit)
+    try:
+        assert indexed_audit(dummy_request, item) == {'audit': audit}
+        # Modified after the snapshot it was indexed from.
+        hit['_version'] = 0
+        assert indexed_audit(dummy_request, item) is None
+        hit['_version'] = 2 ** 62
+        hit['_source']['tid'] = 'stale'
+        assert indexed_audit(dummy_request, item) is None
+    finally:
+        del registry[ELASTIC_SEARCH]
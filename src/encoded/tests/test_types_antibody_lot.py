@@ -689,3 +689,43 @@ def test_encode4_tagged_ab_review_status(testapp,
         'status': 'characterized to standards with exemption',
         'targets': ['/targets/gfp-human/'],
     } in res.json['object']['lot_reviews']
+
+
+def test_lot_reviews_stored_on_characterization_change(testapp, motif_enrichment, antibody_lot):
+    res = testapp.get(antibody_lot['@id'] + '@@index-data')
+    stored = res.json['propsheets']['lot_reviews']
+    assert stored['lot_reviews'] == res.json['object']['lot_reviews']
+    char = testapp.post_json('/antibody_characterization', motif_enrichment).json['@graph'][0]
+    testapp.patch_json(char['@id'], {'status': 'not submitted for review by lab'})
+    res = testapp.get(antibody_lot['@id'] + '@@index-data')
+    stored = res.json['propsheets']['lot_reviews']
+    assert stored['lot_reviews'][0]['status'] == 'not pursued'
+    assert stored['lot_reviews'] == res.json['object']['lot_reviews']
+    assert char['uuid'] in stored['dependencies']
+    assert char['uuid'] in res.json['embedded_uuids']
+
+
+def test_lot_reviews_stored_on_characterization_post(testapp, mass_spec, antibody_lot):
+    char = testapp.post_json('/antibody_characterization', mass_spec).json['@graph'][0]
+    res = testapp.get(antibody_lot['@id'] + '@@index-data')
+    stored = res.json['propsheets']['lot_reviews']
+    assert stored['lot_reviews'] == res.json['object']['lot_reviews']
+    assert stored['inputs']['characterizations'] == [char['@id']]
+    assert char['uuid'] in stored['dependencies']
+
+
+def test_backfill_lot_reviews(testapp, registry, antibody_lot):
+    from snovault import CONNECTION
+    from encoded.commands.backfill_lot_reviews import run
+    from encoded.types.antibody_lot import LOT_REVIEWS_SHEET
+    # As for lots created before lot reviews were stored.
+    registry[CONNECTION].get_by_uuid(antibody_lot['uuid']).update(None, {LOT_REVIEWS_SHEET: {}})
+    assert run(testapp, dry_run=True) == 1
+    res = testapp.get(antibody_lot['@id'] + '@@index-data')
+    assert not res.json['propsheets'][LOT_REVIEWS_SHEET]
+    assert run(testapp) == 1
+    res = testapp.get(antibody_lot['@id'] + '@@index-data')
+    assert res.json['propsheets'][LOT_REVIEWS_SHEET]['lot_reviews'] == \
+        res.json['object']['lot_reviews']
+    assert run(testapp) == 0
+    assert run(testapp, all_lots=True, dry_run=True) == 1
@@ -159,3 +159,63 @@ def test_experiment_biosample_summary_2(testapp,
     res = testapp.get(base_experiment['@id']+'@@index-data')
     assert res.json['object']['biosample_summary'] == \
         'liver male child (10 days) not treated and treated with ethanol'
+
+
+def test_experiment_files_from_item_loader(testapp, base_experiment, experiment, lab, award):
+    item = {
+        'lab': lab['@id'],
+        'award': award['@id'],
+        'file_format': 'bigBed',
+        'file_format_type': 'narrowPeak',
+        'file_size': 345,
+        'assembly': 'GRCh38',
+        'output_type': 'replicated peaks',
+        'status': 'in progress',
+    }
+    outside = testapp.post_json('/file', dict(
+        item, dataset=experiment['@id'], md5sum='e002cd204df36d93dd070ef0712b8e01',
+    )).json['@graph'][0]
+    derived = testapp.post_json('/file', dict(
+        item, dataset=base_experiment['@id'], md5sum='e002cd204df36d93dd070ef0712b8e02',
+        derived_from=[outside['@id']],
+    )).json['@graph'][0]
+    revoked = testapp.post_json('/file', dict(
+        item, dataset=base_experiment['@id'], md5sum='e002cd204df36d93dd070ef0712b8e03',
+        assembly='hg19', status='revoked',
+    )).json['@graph'][0]
+    res = testapp.get(base_experiment['@id'] + '@@index-data')
+    properties = res.json['object']
+    assert properties['files'] == [derived['@id']]
+    assert properties['revoked_files'] == [revoked['@id']]
+    assert properties['contributing_files'] == [outside['@id']]
+    assert properties['assembly'] == ['GRCh38']
+    assert outside['uuid'] in res.json['linked_uuids']
+    assert 'item_loader_saved' in res.headers['X-Stats']
+
+
+def test_experiment_replicate_graph_dependencies(testapp, base_experiment, donor_1, biosample_1, biosample_2, library_1, library_2, replicate_1_1, replicate_2_1):
+    testapp.patch_json(biosample_1['@id'], {'donor': donor_1['@id']})
+    testapp.patch_json(biosample_2['@id'], {'donor': donor_1['@id']})
+    testapp.patch_json(library_1['@id'], {'biosample': biosample_1['@id']})
+    testapp.patch_json(library_2['@id'], {'biosample': biosample_2['@id']})
+    testapp.patch_json(replicate_1_1['@id'], {'library': library_1['@id']})
+    testapp.patch_json(replicate_2_1['@id'], {'library': library_2['@id']})
+    res = testapp.get(base_experiment['@id'] + '@@index-data')
+    assert res.json['object']['replication_type'] == 'isogenic'
+    embedded_uuids = set(res.json['embedded_uuids'])
+    for item in (library_1, library_2, biosample_1, biosample_2):
+        assert item['uuid'] in embedded_uuids
+
+
+def test_replicate_libraries_per_biological_replicate(testapp, library_1, library_2, replicate_1_1, replicate_1_2, antibody_lot):
+    testapp.patch_json(replicate_1_1['@id'], {'library': library_1['@id'], 'antibody': antibody_lot['@id']})
+    testapp.patch_json(replicate_1_2['@id'], {'library': library_2['@id']})
+    res = testapp.get(replicate_1_1['@id'] + '@@object')
+    assert sorted(res.json['libraries']) == sorted([library_1['uuid'], library_2['uuid']])
+    res = testapp.get(replicate_1_2['@id'] + '@@object')
+    assert res.json['libraries'] == []
+    res = testapp.get(library_1['@id'] + '@@object')
+    assert res.json['antibodies'] == [antibody_lot['@id']]
+    testapp.patch_json(replicate_1_1['@id'], {'status': 'deleted'})
+    res = testapp.get(replicate_1_2['@id'] + '@@object')
+    assert res.json['libraries'] == [library_2['uuid']]
@@ -333,3 +333,30 @@ def test_file_reset_file_upload_bucket_on_upload_credentials(testapp, root, dumm
     external = file_item._get_external_sheet()
     assert external.get('bucket') == 'test_file_bucket'
     assert res.json['@graph'][0]['upload_credentials']['upload_url'] == 's3://test_file_bucket/xyz.bed'
+
+
+def test_file_replicates_from_derived_from_closure(testapp, lab, award, experiment, fastq_file, replicate, library):
+    item = {
+        'dataset': experiment['@id'],
+        'file_format': 'bam',
+        'assembly': 'GRCh38',
+        'output_type': 'alignments',
+        'lab': lab['@id'],
+        'award': award['@id'],
+        'file_size': 34,
+        'status': 'in progress',
+    }
+    bam = testapp.post_json('/file', dict(
+        item, md5sum='91be74b6e11515393507f4ebfa66d701', derived_from=[fastq_file['@id']],
+    )).json['@graph'][0]
+    bed = testapp.post_json('/file', dict(
+        item, md5sum='91be74b6e11515393507f4ebfa66d702', derived_from=[bam['@id']],
+        file_format='bed', file_format_type='narrowPeak', output_type='peaks',
+    )).json['@graph'][0]
+    res = testapp.get(bed['@id'] + '@@index-data')
+    properties = res.json['object']
+    assert properties['biological_replicates'] == [1]
+    assert properties['technical_replicates'] == ['1_1']
+    assert properties['replicate_libraries'] == [library['@id']]
+    # Editing an ancestor must reindex the file.
+    assert fastq_file['uuid'] in res.json['embedded_uuids']
@@ -11,12 +11,17 @@ from .base import (
     ALLOW_CURRENT,
     DELETED,
 )
+from .item_loader import (
+    ItemLoader,
+    item_loader,
+)
 
 
 def includeme(config):
     config.scan()
     config.add_request_method(lambda request: set(), '_set_status_changed_paths', reify=True)
     config.add_request_method(lambda request: set(), '_set_status_considered_paths', reify=True)
+    config.add_request_method(ItemLoader, '_item_loader', reify=True)
 
 
 @collection(
@@ -214,9 +219,11 @@ class Library(Item):
         }
     })
     def antibodies(self, request, replicates):
+        # The replicates were all loaded when filtering them by status.
+        loader = item_loader(request)
         antibodies = []
         for rep_id in replicates:
-            rep = request.embed(rep_id, '@@object?skip_calculated=true')
+            rep = loader.get(request, rep_id)
             if 'antibody' in rep:
                 antibodies.append(rep['antibody'])
         return antibodies or None
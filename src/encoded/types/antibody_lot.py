@@ -1,12 +1,22 @@
+from pyramid.events import subscriber
 from snovault import (
+    AfterModified,
+    CONNECTION,
+    Created,
     calculated_property,
     collection,
     load_schema,
 )
+from snovault.resource_views import item_links
 from .base import (
     SharedItem,
     paths_filtered_by_status,
 )
+from .item_loader import (
+    item_loader,
+    recorded_dependencies,
+)
+from ..reference_cache import embed_reference
 
 from .ab_lot_status_data import (
     ab_states,
@@ -171,6 +181,111 @@ class AntibodyLot(SharedItem):
     },
 })
 def lot_reviews(
+    context,
+    request,
+    characterizations,
+    award,
+    control_type=None,
+    targets=[],
+    used_by_biosample_characterizations=[]
+):
+    inputs = {
+        'characterizations': characterizations,
+        'award': award,
+        'control_type': control_type,
+        'targets': targets,
+        'used_by_biosample_characterizations': used_by_biosample_characterizations,
+    }
+    stored = stored_lot_reviews(context, request, inputs)
+    if stored is not None:
+        return stored
+    return calculate_lot_reviews(request, **inputs)
+
+
+LOT_REVIEWS_SHEET = 'lot_reviews'
+
+# Items whose edits change the lot reviews of the antibody lot they link to.
+LOT_REVIEWS_SOURCES = {
+    'AntibodyLot': None,
+    'AntibodyCharacterization': 'characterizes',
+    'BiosampleCharacterization': 'antibody',
+}
+
+
+def stored_lot_reviews(context, request, inputs):
+    """
+    Return the lot reviews stored on the antibody lot if they are current.
+
+    They are current when they were calculated from the same inputs and
+    none of the items read to calculate them has changed since.
+    """
+    stored = context.propsheets.get(LOT_REVIEWS_SHEET)
+    if not stored or stored['inputs'] != inputs:
+        return None
+    dependencies = stored['dependencies']
+    if item_loader(request).tids(request, dependencies) != dependencies:
+        return None
+    # Record the dependencies just as calculating would.
+    request._embedded_uuids.update(dependencies)
+    request._linked_uuids.update(stored['linked'])
+    return stored['lot_reviews']
+
+
+def materialize_lot_reviews(request, lot):
+    """
+    Calculate the lot reviews of lot and store them with what they depend on.
+    """
+    conn = request.registry[CONNECTION]
+    with recorded_dependencies(request) as (embedded, linked):
+        properties = item_links(lot, request)
+        rev_paths = {
+            name: paths_filtered_by_status(request, [
+                request.resource_path(conn.get_by_uuid(uuid))
+                for uuid in lot.get_rev_links(name)
+            ])
+            for name in lot.rev
+        }
+        inputs = {
+            'characterizations': rev_paths['characterizations'],
+            'award': properties['award'],
+            'control_type': properties.get('control_type'),
+            'targets': properties.get('targets', []),
+            'used_by_biosample_characterizations': rev_paths['used_by_biosample_characterizations'],
+        }
+        value = calculate_lot_reviews(request, **inputs)
+    dependencies = embedded - {str(lot.uuid)}
+    stored = {
+        'lot_reviews': value,
+        'inputs': inputs,
+        'dependencies': item_loader(request).tids(request, sorted(dependencies)),
+        'linked': sorted(linked),
+    }
+    # Every write adds to the history of the sheet.
+    if lot.propsheets.get(LOT_REVIEWS_SHEET) != stored:
+        lot.update(None, {LOT_REVIEWS_SHEET: stored})
+
+
+@subscriber(Created)
+@subscriber(AfterModified)
+def update_lot_reviews(event):
+    item = event.object
+    type_name = item.type_info.name
+    if type_name not in LOT_REVIEWS_SOURCES:
+        return
+    request = event.request
+    item_loader(request).invalidate(item.uuid)
+    propname = LOT_REVIEWS_SOURCES[type_name]
+    if propname is None:
+        lot = item
+    else:
+        lot_uuid = item.upgrade_properties().get(propname)
+        if lot_uuid is None:
+            return
+        lot = request.registry[CONNECTION].get_by_uuid(lot_uuid)
+    materialize_lot_reviews(request, lot)
+
+
+def calculate_lot_reviews(
     request,
     characterizations,
     award,
@@ -227,7 +342,7 @@ def lot_reviews(
         'deleted': 2
     }
 
-    if is_tag and request.embed(award, '@@object?skip_calculated=true')['rfa'] == 'ENCODE4':
+    if is_tag and embed_reference(request, award)['rfa'] == 'ENCODE4':
         # ENCD-4608 standards for ENCODE4 tag antibody needs different
         # configurations to start with
         encode4_tag_ab_states = {
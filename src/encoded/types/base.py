@@ -1,7 +1,11 @@
 import itertools
 from datetime import datetime
-from functools import lru_cache
 import logging
+from elasticsearch.exceptions import (
+    ConnectionError,
+    NotFoundError,
+    TransportError,
+)
 from pyramid.security import (
     ALL_PERMISSIONS,
     Allow,
@@ -12,7 +16,6 @@ from pyramid.security import (
 )
 from pyramid.traversal import (
     find_root,
-    traverse,
     resource_path
 )
 from pyramid.view import (
@@ -25,14 +28,74 @@ from snovault.schema_utils import validate_request
 from snovault.auditor import traversed_path_ids
 from snovault import (
     AfterModified,
-    BeforeModified
+    BeforeModified,
+    DBSESSION,
+)
+from snovault.elasticsearch.interfaces import ELASTIC_SEARCH
+from snovault.storage import (
+    CurrentPropertySheet,
+    Link,
+    PropertySheet,
+    TransactionRecord,
 )
+from .item_loader import item_loader
+from ..property_cache import item_property
 
 
-@lru_cache()
 def _award_viewing_group(award_uuid, root):
-    award = root.get_by_uuid(award_uuid)
-    return award.upgrade_properties().get('viewing_group')
+    return item_property(root, award_uuid, 'viewing_group')
+
+
+def _modified_since(session, uuids, xmin):
+    """
+    Whether any of uuids, or an item linking to one of them, has been
+    modified by a transaction not visible to a snapshot at xmin.
+    """
+    modified = session.query(CurrentPropertySheet.rid).join(
+        PropertySheet, CurrentPropertySheet.sid == PropertySheet.sid,
+    ).join(
+        TransactionRecord, PropertySheet.tid == TransactionRecord.tid,
+    ).filter(TransactionRecord.xid >= xmin)
+    edited = modified.filter(CurrentPropertySheet.rid.in_(uuids))
+    linking = modified.join(
+        Link, Link.source_rid == CurrentPropertySheet.rid,
+    ).filter(Link.target_rid.in_(uuids))
+    return (
+        session.query(edited.exists()).scalar() or
+        session.query(linking.exists()).scalar()
+    )
+
+
+def indexed_audit(request, item):
+    """
+    Return the audit of item from elasticsearch, or None unless it is current.
+
+    The indexed audit is current when the document was indexed from the
+    present tid of item and nothing it embedded or linked to, nor any item
+    linking to those, has been modified since the snapshot it was indexed
+    from.
+    """
+    es = request.registry.get(ELASTIC_SEARCH)
+    if es is None:
+        return None
+    try:
+        hit = es.get(
+            index=item.item_type, doc_type=item.item_type, id=str(item.uuid),
+            _source=['audit', 'audit_pending', 'embedded_uuids', 'linked_uuids', 'tid'],
+        )
+    except NotFoundError:
+        return None
+    except (ConnectionError, TransportError):
+        logging.warning('Could not read indexed audit of %s', item.uuid, exc_info=True)
+        return None
+    source = hit['_source']
+    # Audits deferred to the audit indexer are those of an earlier tid.
+    if source.get('tid') != item.tid or source.get('audit_pending'):
+        return None
+    uuids = set(source['embedded_uuids']) | set(source['linked_uuids'])
+    if _modified_since(request.registry[DBSESSION], uuids, hit['_version']):
+        return None
+    return {'audit': source['audit']}
 
 
 # Item acls
@@ -115,15 +178,17 @@ STATUS_HIERARCHY = {
 
 
 def paths_filtered_by_status(request, paths, exclude=('deleted', 'replaced'), include=None):
+    paths = list(paths)
+    statuses = item_loader(request).statuses(request, paths)
     if include is not None:
         return [
             path for path in paths
-            if traverse(request.root, path)['context'].__json__(request).get('status') in include
+            if statuses[path] in include
         ]
     else:
         return [
             path for path in paths
-            if traverse(request.root, path)['context'].__json__(request).get('status') not in exclude
+            if statuses[path] not in exclude
         ]
 
 
@@ -300,13 +365,16 @@ class Item(snovault.Item):
                 related_objects.add(child_id)
         return related_objects
 
-    @staticmethod
-    def _block_on_audits(item_id, force_audit, request, parent, new_status):
+    def _block_on_audits(self, item_id, force_audit, request, parent, new_status):
         if new_status not in ['released', 'submitted']:
             return
         if not parent or force_audit:
             return
-        audits = request.embed(item_id, '@@audit')
+        audits = None
+        if asbool(request.registry.settings.get('set_status.indexed_audits', False)):
+            audits = indexed_audit(request, self)
+        if audits is None:
+            audits = request.embed(item_id, '@@audit')
         errors = audits.get('audit', {}).get('ERROR', [])
         not_compliants = audits.get('audit', {}).get('NOT_COMPLIANT', [])
         details = {
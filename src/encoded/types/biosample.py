@@ -7,6 +7,8 @@ from .base import (
     Item,
     paths_filtered_by_status,
 )
+from .item_loader import item_loader
+from ..reference_cache import embed_reference
 import re
 
 
@@ -119,7 +121,7 @@ class Biosample(Item):
     def sex(self, request, donor=None, model_organism_sex=None, organism=None):
         humanFlag = False
         if organism is not None:
-            organismObject = request.embed(organism, '@@object')
+            organismObject = embed_reference(request, organism)
             if organismObject['scientific_name'] == 'Homo sapiens':
                 humanFlag = True
 
@@ -144,7 +146,7 @@ class Biosample(Item):
     def age(self, request, donor=None, model_organism_age=None, organism=None):
         humanFlag = False
         if organism is not None:
-            organismObject = request.embed(organism, '@@object')
+            organismObject = embed_reference(request, organism)
             if organismObject['scientific_name'] == 'Homo sapiens':
                 humanFlag = True
 
@@ -169,7 +171,7 @@ class Biosample(Item):
     def age_units(self, request, donor=None, model_organism_age_units=None, organism=None):
         humanFlag = False
         if organism is not None:
-            organismObject = request.embed(organism, '@@object')
+            organismObject = embed_reference(request, organism)
             if organismObject['scientific_name'] == 'Homo sapiens':
                 humanFlag = True
 
@@ -191,7 +193,7 @@ class Biosample(Item):
     def health_status(self, request, donor=None, model_organism_health_status=None, organism=None):
         humanFlag = False
         if organism is not None:
-            organismObject = request.embed(organism, '@@object')
+            organismObject = embed_reference(request, organism)
             if organismObject['scientific_name'] == 'Homo sapiens':
                 humanFlag = True
 
@@ -213,7 +215,7 @@ class Biosample(Item):
                    worm_life_stage=None, organism=None):
         humanFlag = False
         if organism is not None:
-            organismObject = request.embed(organism, '@@object')
+            organismObject = embed_reference(request, organism)
             if organismObject['scientific_name'] == 'Homo sapiens':
                 humanFlag = True
 
@@ -429,55 +431,62 @@ class Biosample(Item):
             'phase',
             'fractionated'
         ]
+        applied_modifications = get_applied_modifications(
+            genetic_modifications, model_organism_donor_modifications)
+        objects = load_summary_objects(request, [{
+            'biosample_ontology': biosample_ontology,
+            'organism': organism,
+            'donor': donor,
+            'part_of': part_of,
+            'originated_from': originated_from,
+            'treatments': treatments,
+            'applied_modifications': applied_modifications,
+        }])
+
         organismObject = None
         donorObject = None
         if organism is not None:
-            organismObject = request.embed(organism, '@@object')
+            organismObject = objects[organism]
         if donor is not None:
-            donorObject = request.embed(donor, '@@object')
+            donorObject = objects[donor]
 
         treatment_objects_list = None
         if treatments is not None and len(treatments) > 0:
             treatment_objects_list = []
             for t in treatments:
-                treatment_objects_list.append(request.embed(t, '@@object'))
+                treatment_objects_list.append(objects[t])
 
         part_of_object = None
         if part_of is not None:
-            part_of_object = request.embed(part_of, '@@object')
+            part_of_object = objects[part_of]
 
         originated_from_object = None
         if originated_from is not None:
-            originated_from_object = request.embed(originated_from, '@@object')
+            originated_from_object = objects[originated_from]
 
         modifications_list = None
 
-        applied_modifications = get_applied_modifications(
-            genetic_modifications, model_organism_donor_modifications)
-
         if applied_modifications:
             modifications_list = []
             for gm in applied_modifications:
-                gm_object = request.embed(gm, '@@object')
+                gm_object = objects[gm]
                 modification_dict = {'category': gm_object.get('category')}
                 if gm_object.get('modified_site_by_target_id'):
-                    modification_dict['target'] = request.embed(
-                        gm_object.get('modified_site_by_target_id'),
-                                      '@@object').get('label')
+                    modification_dict['target'] = objects[
+                        gm_object.get('modified_site_by_target_id')].get('label')
                 if gm_object.get('introduced_tags'):
                     modification_dict['tags'] = []
                     for tag in gm_object.get('introduced_tags'):
                         tag_dict = {'location': tag['location'], 'name': tag['name']}
                         if tag.get('promoter_used'):
-                            tag_dict['promoter'] = request.embed(
-                                tag.get('promoter_used'),
-                                        '@@object').get('label')
+                            tag_dict['promoter'] = objects[
+                                tag.get('promoter_used')].get('label')
                         modification_dict['tags'].append(tag_dict)
 
                 modifications_list.append((gm_object['method'], modification_dict))
 
         if biosample_ontology:
-            biosample_type_object = request.embed(biosample_ontology, '@@object')
+            biosample_type_object = objects[biosample_ontology]
             biosample_term_name = biosample_type_object['term_name']
             biosample_type = biosample_type_object['classification']
         else:
@@ -533,6 +542,34 @@ class Biosample(Item):
         )
 
 
+def load_summary_objects(request, biosamples):
+    """
+    Return the objects needed to summarize biosamples, keyed by path.
+
+    The objects linked from all biosamples are embedded together and then the
+    targets and promoters of their genetic modifications, one batch per level.
+    """
+    loader = item_loader(request)
+    linked = []
+    modifications = []
+    for biosample in biosamples:
+        linked.extend(
+            biosample.get(name)
+            for name in ('biosample_ontology', 'organism', 'donor', 'part_of', 'originated_from')
+        )
+        linked.extend(biosample.get('treatments') or [])
+        modifications.extend(biosample.get('applied_modifications') or [])
+    objects = loader.embed_objects(request, linked + modifications)
+    linked = []
+    for gm in modifications:
+        gm_object = objects[gm]
+        linked.append(gm_object.get('modified_site_by_target_id'))
+        for tag in gm_object.get('introduced_tags_array', []) + gm_object.get('introduced_tags', []):
+            linked.append(tag.get('promoter_used'))
+    objects.update(loader.embed_objects(request, linked))
+    return objects
+
+
 def generate_summary_dictionary(
         request,
         organismObject=None,
@@ -8,6 +8,7 @@ from .base import (
     Item,
     paths_filtered_by_status,
 )
+from .item_loader import item_loader
 
 from urllib.parse import quote_plus
 from urllib.parse import urljoin
@@ -27,15 +28,15 @@ import datetime
 
 
 def item_is_revoked(request, path):
-    return request.embed(path, '@@object?skip_calculated=true').get('status') == 'revoked'
+    return item_loader(request).get(request, path).get('status') == 'revoked'
 
 
 def calculate_assembly(request, files_list, status):
     assembly = set()
     viewable_file_status = ['released','in progress']
-
+    loader = item_loader(request)
     for path in files_list:
-        properties = request.embed(path, '@@object?skip_calculated=true')
+        properties = loader.get(request, path)
         if properties['status'] in viewable_file_status:
             if 'assembly' in properties:
                 assembly.add(properties['assembly'])
@@ -90,6 +91,14 @@ class Dataset(Item):
         'original_files': ('File', 'dataset'),
     }
 
+    def file_uuids(self):
+        return self.get_rev_links('original_files')
+
+    def prefetch_files(self, request):
+        loader = item_loader(request)
+        loader.prefetch(request, self.file_uuids())
+        return loader
+
     @calculated_property(schema={
         "title": "Original files",
         "type": "array",
@@ -111,9 +120,10 @@ class Dataset(Item):
         },
     })
     def contributing_files(self, request, original_files, status):
+        loader = self.prefetch_files(request)
         derived_from = set()
         for path in original_files:
-            properties = request.embed(path, '@@object?skip_calculated=true')
+            properties = loader.get(request, path)
             derived_from.update(
                 paths_filtered_by_status(request, properties.get('derived_from', []))
             )
@@ -158,6 +168,7 @@ class Dataset(Item):
         },
     })
     def revoked_files(self, request, original_files):
+        self.prefetch_files(request)
         return [
             path for path in original_files
             if item_is_revoked(request, path)
@@ -171,6 +182,7 @@ class Dataset(Item):
         },
     })
     def assembly(self, request, original_files, status):
+        self.prefetch_files(request)
         return calculate_assembly(request, original_files, status)
 
     @calculated_property(condition='assembly', schema={
@@ -194,6 +206,9 @@ class FileSet(Dataset):
     schema = load_schema('encoded:schemas/file_set.json')
     embedded = Dataset.embedded
 
+    def file_uuids(self):
+        return self.get_rev_links('original_files') + self.properties.get('related_files', [])
+
     @calculated_property(schema={
         "title": "Contributing files",
         "type": "array",
@@ -203,10 +218,11 @@ class FileSet(Dataset):
         },
     })
     def contributing_files(self, request, original_files, related_files, status):
+        loader = self.prefetch_files(request)
         files = set(original_files + related_files)
         derived_from = set()
         for path in files:
-            properties = request.embed(path, '@@object?skip_calculated=true')
+            properties = loader.get(request, path)
             derived_from.update(
                 paths_filtered_by_status(request, properties.get('derived_from', []))
             )
@@ -251,6 +267,7 @@ class FileSet(Dataset):
         },
     })
     def revoked_files(self, request, original_files, related_files):
+        self.prefetch_files(request)
         return [
             path for path in chain(original_files, related_files)
             if item_is_revoked(request, path)
@@ -264,6 +281,7 @@ class FileSet(Dataset):
         },
     })
     def assembly(self, request, original_files, related_files, status):
+        self.prefetch_files(request)
         return calculate_assembly(request, list(chain(original_files, related_files))[:101], status)
 
 
@@ -549,6 +567,7 @@ class Series(Dataset, CalculatedSeriesAssay, CalculatedSeriesBiosample, Calculat
         },
     })
     def assembly(self, request, original_files, related_datasets, status):
+        self.prefetch_files(request)
         combined_assembly = set()
         for assembly_from_original_files in calculate_assembly(request, original_files, status):
             combined_assembly.add(assembly_from_original_files)
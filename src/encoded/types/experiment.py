@@ -11,6 +11,7 @@ from .base import (
     SharedItem
 )
 from .dataset import Dataset
+from .item_loader import item_loader
 from .shared_calculated_properties import (
     CalculatedAssaySynonyms,
     CalculatedAssayTermID,
@@ -284,7 +285,7 @@ class Replicate(Item):
             "linkTo": "Library"
         }
     })
-    def libraries(self, status, biological_replicate_number,
+    def libraries(self, request, status, biological_replicate_number,
                   technical_replicate_number):
         if status == 'deleted':
             return []
@@ -294,21 +295,38 @@ class Replicate(Item):
         properties = self.upgrade_properties()
         root = find_root(self)
         experiment = root.get_by_uuid(properties['experiment'])
-        libraries = set()
-        for rep_uuid in experiment.get_rev_links('replicates'):
-            rep_props = root.get_by_uuid(rep_uuid).upgrade_properties()
-            # Only care (check and add to the list) about non-deleted technical
-            # replicates of this replicate, meaning belonging to the same
-            # biological replicate.
-            if (rep_props['biological_replicate_number'] != biological_replicate_number
-                or rep_props['status'] == 'deleted'):
-                continue
-            if rep_props['technical_replicate_number'] < technical_replicate_number:
-                # Found smaller technical replicate, libraries will be
-                # calculated there rather than here.
-                return []
-            if 'library' in rep_props:
-                libraries.add(rep_props['library'])
-        # This is the "first" techinical replicate within the isogenic
-        # replciate. Therefore, libraries should be calculated.
-        return list(libraries)
+        loader = item_loader(request)
+        biological_replicates = loader.derived(
+            ('biological_replicates', str(experiment.uuid)),
+            lambda: biological_replicate_libraries(
+                loader.rev_properties(request, experiment, 'replicates').values()
+            ),
+        )
+        # Only the "first" technical replicate within the isogenic replicate
+        # lists the libraries.
+        first, libraries = biological_replicates.get(
+            biological_replicate_number, (technical_replicate_number, ()))
+        if technical_replicate_number > first:
+            return []
+        return sorted(libraries)
+
+
+def biological_replicate_libraries(replicates):
+    """
+    Return the smallest technical replicate number and the libraries of the
+    non-deleted replicates of each biological replicate number.
+    """
+    result = {}
+    for rep_props in replicates:
+        if rep_props['status'] == 'deleted':
+            continue
+        first, libraries = result.setdefault(
+            rep_props['biological_replicate_number'],
+            (rep_props['technical_replicate_number'], set()),
+        )
+        if rep_props['technical_replicate_number'] < first:
+            first = rep_props['technical_replicate_number']
+            result[rep_props['biological_replicate_number']] = first, libraries
+        if 'library' in rep_props:
+            libraries.add(rep_props['library'])
+    return result
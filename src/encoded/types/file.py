@@ -14,6 +14,7 @@ from .base import (
     Item,
     paths_filtered_by_status
 )
+from .item_loader import item_loader
 from pyramid.httpexceptions import (
     HTTPForbidden,
     HTTPTemporaryRedirect,
@@ -52,18 +53,7 @@ def show_cloud_metadata(status=None, md5sum=None, file_size=None, restricted=Non
 
 
 def property_closure(request, propname, root_uuid):
-    # Must avoid cycles
-    conn = request.registry[CONNECTION]
-    seen = set()
-    remaining = {str(root_uuid)}
-    while remaining:
-        seen.update(remaining)
-        next_remaining = set()
-        for uuid in remaining:
-            obj = conn.get_by_uuid(uuid)
-            next_remaining.update(obj.__json__(request).get(propname, ()))
-        remaining = next_remaining - seen
-    return seen
+    return item_loader(request).closure(request, propname, root_uuid)
 
 
 ENCODE_PROCESSING_PIPELINE_UUID = 'a558111b-4c50-4b2e-9de8-73fd8fd3a67d'
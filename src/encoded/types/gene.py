@@ -7,6 +7,7 @@ from .base import (
     SharedItem,
     paths_filtered_by_status,
 )
+from ..reference_cache import embed_reference
 
 
 @collection(
@@ -30,7 +31,7 @@ class Gene(SharedItem):
         "type": "string",
     })
     def title(self, request, organism, symbol):
-        organism_props = request.embed(organism, '@@object')
+        organism_props = embed_reference(request, organism)
         return u'{} ({})'.format(symbol, organism_props['scientific_name'])
 
     @calculated_property(schema={
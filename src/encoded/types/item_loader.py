@@ -0,0 +1,396 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from pyramid.events import subscriber
+from pyramid.traversal import (
+    resource_path,
+    traverse,
+)
+from snovault import (
+    AfterModified,
+    COLLECTIONS,
+    CONNECTION,
+    Created,
+)
+from snovault.resource_views import uuid_to_path
+from snovault.storage import (
+    Key,
+    Resource,
+)
+from snovault.util import simple_path_ids
+from sqlalchemy.util import LRUCache
+from uuid import UUID
+
+
+def item_loader(request):
+    """
+    Return the ItemLoader shared by request and all of its subrequests.
+
+    Items are rendered through embed subrequests, so the loader lives on the
+    root request to be shared between every item rendered while serving or
+    indexing.
+    """
+    while request.__parent__ is not None:
+        request = request.__parent__
+    return request._item_loader
+
+
+@contextmanager
+def recorded_dependencies(request):
+    """
+    Collect the uuids embedded and linked by request within the block.
+
+    Yields fresh (embedded, linked) sets, which are also added to those of
+    request on leaving, so a result computed within the block can be reused
+    later by recording the same dependencies again.
+    """
+    embedded, linked = request._embedded_uuids, request._linked_uuids
+    request._embedded_uuids, request._linked_uuids = set(), set()
+    try:
+        yield request._embedded_uuids, request._linked_uuids
+    finally:
+        embedded.update(request._embedded_uuids)
+        linked.update(request._linked_uuids)
+        request._embedded_uuids, request._linked_uuids = embedded, linked
+
+
+class ItemLoader(object):
+    """
+    Request scoped loader of the stored properties of linked items.
+
+    Calculated properties which look at many linked items, such as every file
+    of a dataset, prefetch them all by uuid with a single query and then read
+    their @@object?skip_calculated=true properties by path. Properties are
+    shared between all calculated properties of the request and must not be
+    modified.
+
+    An indexing request renders a whole batch of items, so the number of
+    loaded items is bounded by the item_loader.capacity setting.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        capacity = int(request.registry.settings.get('item_loader.capacity', 5000))
+        self._items = LRUCache(capacity)
+        self._paths = LRUCache(capacity)
+        self._properties = LRUCache(capacity)
+        self._closures = LRUCache(capacity)
+        self._statuses = LRUCache(capacity)
+        self._graphs = LRUCache(capacity)
+        self._derived = LRUCache(capacity)
+
+    def invalidate(self, uuid):
+        """Forget what is known about an item modified during the request."""
+        uuid = str(uuid)
+        self._properties.pop(uuid, None)
+        self._statuses.pop(uuid, None)
+        # Any closure, graph or derived value may pass through the item.
+        self._closures.clear()
+        self._graphs.clear()
+        self._derived.clear()
+
+    def _count(self, name, value=1):
+        stats = getattr(self.request, '_stats', None)
+        if stats is not None:
+            stats[name] = stats.get(name, 0) + value
+
+    def _batched(self, request):
+        # Reads from elasticsearch don't go through the session so there is
+        # nothing to batch.
+        return getattr(request, 'datastore', 'database') == 'database'
+
+    def _fetch(self, request, uuids):
+        conn = request.registry[CONNECTION]
+        uuids = [uuid for uuid in uuids if uuid not in self._items]
+        if not uuids:
+            return []
+        # Load all rows at once into the session, the per item lookups below
+        # are then answered from its identity map.
+        rows = []
+        if self._batched(request):
+            uncached = [uuid for uuid in uuids if conn.item_cache.get(uuid) is None]
+            if uncached:
+                session = conn.storage.write.DBSession()
+                rows = session.query(Resource).filter(Resource.rid.in_(uncached)).all()
+                self._count('item_loader_queries')
+        items = []
+        for uuid in uuids:
+            item = conn.get_by_uuid(uuid)
+            if item is None:
+                continue
+            self._items[uuid] = item
+            self._paths[resource_path(item) + '/'] = uuid
+            items.append(item)
+        del rows
+        self._count('item_loader_count', len(items))
+        return items
+
+    def prefetch(self, request, uuids):
+        """Load the items with uuids and the items they link to."""
+        items = self._fetch(request, [str(uuid) for uuid in uuids])
+        linked = set()
+        for item in items:
+            for path in item.type_info.schema_links:
+                linked.update(simple_path_ids(item.properties, path))
+        self._fetch(request, sorted(linked))
+
+    def tids(self, request, uuids):
+        """
+        Return the current tid of each of uuids, keyed by uuid.
+
+        Items which no longer exist are left out.
+        """
+        conn = request.registry[CONNECTION]
+        uuids = [str(uuid) for uuid in uuids]
+        self._fetch(request, uuids)
+        result = {}
+        for uuid in uuids:
+            item = self._items.get(uuid) or conn.get_by_uuid(uuid)
+            if item is not None:
+                result[uuid] = item.tid
+        return result
+
+    def rev_properties(self, request, item, name):
+        """
+        Return the upgraded properties of the items of the rev link name of
+        item, keyed by uuid.
+
+        The linking items are fetched together, and are only fetched once
+        however many of them ask for their siblings.
+        """
+        conn = request.registry[CONNECTION]
+        uuids = [str(uuid) for uuid in item.get_rev_links(name)]
+        self._fetch(request, uuids)
+        result = {}
+        for uuid in uuids:
+            linking = self._items.get(uuid) or conn.get_by_uuid(uuid)
+            result[uuid] = linking.upgrade_properties()
+        return result
+
+    def derived(self, key, compute):
+        """
+        Return compute() remembered under key for the rest of the request.
+
+        For values derived from a group of items, such as the replicates of
+        an experiment, which every item of the group needs. They are
+        forgotten as soon as any item is modified.
+        """
+        try:
+            value = self._derived[key]
+        except KeyError:
+            value = self._derived[key] = compute()
+        else:
+            self._count('item_loader_saved')
+        return value
+
+    def _load(self, request, uuid):
+        item = self._items[uuid]
+        properties = item.__json__(request)
+        linked = set()
+        for path in item.type_info.schema_links:
+            linked.update(simple_path_ids(properties, path))
+            uuid_to_path(request, properties, path)
+        self._properties[uuid] = properties, linked
+        return properties, linked
+
+    def _resolve(self, request, paths):
+        """
+        Load the items of canonical /collection/name/ paths.
+
+        Names are looked up with one query per unique key rather than by
+        traversing each path. Paths which don't resolve here are left to
+        traversal by the caller.
+        """
+        collections = request.registry[COLLECTIONS]
+        uuids = set()
+        names = defaultdict(set)
+        for path in paths:
+            parts = path.strip('/').split('/')
+            if len(parts) == 1:
+                # Bare uuids, as returned by some calculated links.
+                try:
+                    uuids.add(str(UUID(parts[0])))
+                except ValueError:
+                    pass
+                continue
+            if len(parts) != 2:
+                continue
+            collection = collections.get(parts[0])
+            if collection is None:
+                continue
+            try:
+                uuids.add(str(UUID(parts[1])))
+            except ValueError:
+                if collection.unique_key is not None:
+                    names[collection.unique_key].add(parts[1])
+        if self._batched(request) and names:
+            session = request.registry[CONNECTION].storage.write.DBSession()
+            for unique_key, values in names.items():
+                keys = session.query(Key.rid).filter(
+                    Key.name == unique_key, Key.value.in_(sorted(values)))
+                uuids.update(str(rid) for rid, in keys)
+            self._count('item_loader_queries', len(names))
+        self._fetch(request, sorted(uuids))
+
+    def statuses(self, request, paths):
+        """
+        Return a mapping of each of paths to the status of its item.
+
+        The whole list is resolved at once and statuses are remembered for
+        the rest of the request.
+        """
+        conn = request.registry[CONNECTION]
+        paths = list(paths)
+        unresolved = [path for path in paths if path not in self._paths]
+        if unresolved:
+            self._resolve(request, unresolved)
+        result = {}
+        for path in paths:
+            uuid = self._paths.get(path)
+            if uuid is None:
+                # Aliases and other non canonical paths.
+                self._count('item_loader_miss')
+                context = traverse(request.root, path)['context']
+                result[path] = context.__json__(request).get('status')
+                continue
+            try:
+                result[path] = self._statuses[uuid]
+            except KeyError:
+                item = self._items.get(uuid) or conn.get_by_uuid(uuid)
+                result[path] = self._statuses[uuid] = item.__json__(request).get('status')
+            else:
+                request._embedded_uuids.add(uuid)
+                self._count('item_loader_saved')
+        return result
+
+    def _path_uuid(self, path):
+        uuid = self._paths.get(path)
+        if uuid is None:
+            try:
+                uuid = str(UUID(path.strip('/')))
+            except ValueError:
+                return None
+        return uuid if uuid in self._items else None
+
+    def embed_objects(self, request, paths):
+        """
+        Return the @@object of each of paths, keyed by path.
+
+        The items of all paths are loaded together and then embedded by uuid,
+        so the embeds don't look each of them up again by unique key. This
+        lets callers walking a graph of objects fetch a whole level at once.
+        """
+        paths = {path for path in paths if path}
+        unresolved = [path for path in paths if self._path_uuid(path) is None]
+        if unresolved:
+            self._resolve(request, unresolved)
+        result = {}
+        for path in paths:
+            uuid = self._path_uuid(path)
+            if uuid is None:
+                self._count('item_loader_miss')
+                result[path] = request.embed(path, '@@object')
+                continue
+            self._count('item_loader_saved')
+            result[path] = request.embed('/' + uuid, '@@object')
+        return result
+
+    def replicate_graph(self, request, replicates):
+        """
+        Return the @@object of replicates and of the items they lead to.
+
+        Libraries, through library and libraries, of replicates which aren't
+        deleted, their biosamples and their biosample types are embedded one
+        level at a time. Results are keyed by path as linked from the level
+        above and are shared between the calculated properties of a dataset,
+        so they must not be modified.
+        """
+        key = tuple(replicates)
+        entry = self._graphs.get(key)
+        if entry is not None:
+            self._count('item_loader_saved')
+            request._embedded_uuids.update(entry[1])
+            request._linked_uuids.update(entry[2])
+            return entry[0]
+        with recorded_dependencies(request) as (embedded, linked):
+            objects = self.embed_objects(request, replicates)
+            libraries = set()
+            for rep in objects.values():
+                if rep['status'] == 'deleted':
+                    continue
+                if 'library' in rep:
+                    libraries.add(rep['library'])
+                libraries.update(rep.get('libraries', []))
+            libraries = self.embed_objects(request, libraries)
+            objects.update(libraries)
+            biosamples = self.embed_objects(request, [
+                lib.get('biosample') for lib in libraries.values()
+            ])
+            objects.update(biosamples)
+            objects.update(self.embed_objects(request, [
+                biosample.get('biosample_ontology') for biosample in biosamples.values()
+            ]))
+        self._graphs[key] = objects, embedded, linked
+        return objects
+
+    def closure(self, request, propname, root_uuid):
+        """
+        Return the uuids of the items reachable from root_uuid through propname.
+
+        Every level of the graph is fetched with a single query and closures
+        are remembered, so items which share ancestors, like the files of a
+        pipeline, stop walking as soon as they reach an already known item.
+        """
+        conn = request.registry[CONNECTION]
+        root_uuid = str(root_uuid)
+        seen = self._closures.get((propname, root_uuid))
+        if seen is None:
+            # Must avoid cycles
+            seen = set()
+            remaining = {root_uuid}
+            while remaining:
+                seen.update(remaining)
+                self._fetch(request, sorted(remaining))
+                next_remaining = set()
+                for uuid in remaining:
+                    known = self._closures.get((propname, uuid))
+                    if known is not None:
+                        seen.update(known)
+                        continue
+                    obj = self._items.get(uuid) or conn.get_by_uuid(uuid)
+                    next_remaining.update(obj.__json__(request).get(propname, ()))
+                remaining = next_remaining - seen
+            seen = frozenset(seen)
+            self._closures[(propname, root_uuid)] = seen
+        else:
+            self._count('item_loader_saved')
+        # Every item of the closure was looked at, record them as an
+        # embed would.
+        request._embedded_uuids.update(seen)
+        return seen
+
+    def get(self, request, path):
+        """
+        Return the @@object?skip_calculated=true properties of path.
+
+        Paths which were not prefetched fall back to an embed.
+        """
+        uuid = self._paths.get(path)
+        if uuid is None or (uuid not in self._properties and uuid not in self._items):
+            self._count('item_loader_miss')
+            return request.embed(path, '@@object?skip_calculated=true')
+        try:
+            properties, linked = self._properties[uuid]
+        except KeyError:
+            properties, linked = self._load(request, uuid)
+        else:
+            # Record the dependencies just as an embed would.
+            request._embedded_uuids.add(uuid)
+            request._linked_uuids.update(linked)
+        self._count('item_loader_saved')
+        return properties
+
+
+@subscriber(Created)
+@subscriber(AfterModified)
+def invalidate_item_loader(event):
+    item_loader(event.request).invalidate(event.object.uuid)
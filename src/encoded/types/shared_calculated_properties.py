@@ -8,11 +8,13 @@ from ..vis_defines import (
     )
 from .biosample import (
     construct_biosample_summary,
-    generate_summary_dictionary
+    generate_summary_dictionary,
+    load_summary_objects,
 )
 from .base import (
     paths_filtered_by_status
 )
+from .item_loader import item_loader
 
 
 class CalculatedAssaySynonyms:
@@ -222,72 +224,78 @@ class CalculatedBiosampleSummary:
         dictionaries_of_phrases = []
         biosample_accessions = set()
         if replicates is not None:
+            # The replicate -> library -> biosample chain is loaded once for
+            # all calculated properties of the dataset, then everything the
+            # biosamples link to.
+            objects = dict(item_loader(request).replicate_graph(request, replicates))
+            biosamples = []
             for rep in replicates:
-                replicateObject = request.embed(rep, '@@object')
+                if objects[rep]['status'] == 'deleted' or 'library' not in objects[rep]:
+                    continue
+                library = objects[objects[rep]['library']]
+                if library['status'] == 'deleted' or 'biosample' not in library:
+                    continue
+                if objects[library['biosample']]['status'] != 'deleted':
+                    biosamples.append(objects[library['biosample']])
+            objects.update(load_summary_objects(request, biosamples))
+            for rep in replicates:
+                replicateObject = objects[rep]
                 if replicateObject['status'] == 'deleted':
                     continue
                 if 'library' in replicateObject:
-                    libraryObject = request.embed(replicateObject['library'], '@@object')
+                    libraryObject = objects[replicateObject['library']]
                     if libraryObject['status'] == 'deleted':
                         continue
                     if 'biosample' in libraryObject:
-                        biosampleObject = request.embed(libraryObject['biosample'], '@@object')
+                        biosampleObject = objects[libraryObject['biosample']]
                         if biosampleObject['status'] == 'deleted':
                             continue
                         if biosampleObject['accession'] not in biosample_accessions:
                             biosample_accessions.add(biosampleObject['accession'])
 
-                            biosampleTypeObject = request.embed(
-                                biosampleObject['biosample_ontology'],
-                                '@@object'
-                            )
+                            biosampleTypeObject = objects[biosampleObject['biosample_ontology']]
                             if biosampleTypeObject.get('classification') in [
                                     'in vitro differentiated cells']:
                                 drop_age_sex_flag = True
 
                             organismObject = None
                             if 'organism' in biosampleObject:
-                                organismObject = request.embed(biosampleObject['organism'],
-                                                               '@@object')
+                                organismObject = objects[biosampleObject['organism']]
                             donorObject = None
                             if 'donor' in biosampleObject:
-                                donorObject = request.embed(biosampleObject['donor'], '@@object')
+                                donorObject = objects[biosampleObject['donor']]
 
                             treatment_objects_list = None
                             treatments = biosampleObject.get('treatments')
                             if treatments is not None and len(treatments) > 0:
                                 treatment_objects_list = []
                                 for t in treatments:
-                                    treatment_objects_list.append(request.embed(t, '@@object'))
+                                    treatment_objects_list.append(objects[t])
 
                             part_of_object = None
                             if 'part_of' in biosampleObject:
-                                part_of_object = request.embed(biosampleObject['part_of'],
-                                                               '@@object')
+                                part_of_object = objects[biosampleObject['part_of']]
                             originated_from_object = None
                             if 'originated_from' in biosampleObject:
-                                originated_from_object = request.embed(biosampleObject['originated_from'],
-                                                                       '@@object')
+                                originated_from_object = objects[biosampleObject['originated_from']]
 
                             modifications_list = None
                             genetic_modifications = biosampleObject.get('applied_modifications')
                             if genetic_modifications:
                                 modifications_list = []
                                 for gm in genetic_modifications:
-                                    gm_object = request.embed(gm, '@@object')
+                                    gm_object = objects[gm]
                                     modification_dict = {'category': gm_object.get('category')}
                                     if gm_object.get('modified_site_by_target_id'):
-                                        modification_dict['target'] = request.embed(
-                                            gm_object.get('modified_site_by_target_id'),
-                                                          '@@object')['label']
+                                        modification_dict['target'] = objects[
+                                            gm_object.get('modified_site_by_target_id')]['label']
                                     if gm_object.get('introduced_tags_array'):
                                         modification_dict['tags'] = []
                                         for tag in gm_object.get('introduced_tags_array'):
                                             tag_dict = {'location': tag['location']}
                                             if tag.get('promoter_used'):
-                                                tag_dict['promoter'] = request.embed(
-                                                    tag.get('promoter_used'),
-                                                            '@@object').get['label']
+                                                tag_dict['promoter'] = objects[
+                                                    tag.get('promoter_used')].get('label')
                                             modification_dict['tags'].append(tag_dict)
 
                                     modifications_list.append((gm_object['method'], modification_dict))
@@ -392,14 +400,15 @@ class CalculatedAssayTitle:
             preferred_name = registry['ontology'][assay_term_id].get('preferred_name',
                                                                      assay_term_name)
             if preferred_name == 'RNA-seq' and replicates is not None:
+                objects = item_loader(request).replicate_graph(request, replicates)
                 for rep in replicates:
-                    replicate_object = request.embed(rep, '@@object')
+                    replicate_object = objects[rep]
                     if replicate_object['status'] == 'deleted':
                         continue
                     if 'libraries' in replicate_object:
                         preferred_name = 'total RNA-seq'
                         for lib in replicate_object['libraries']:
-                            library_object = request.embed(lib, '@@object')
+                            library_object = objects[lib]
                             if 'size_range' in library_object and \
                             library_object['size_range'] == '<200':
                                 preferred_name = 'small RNA-seq'
@@ -489,8 +498,9 @@ class CalculatedReplicationType:
         # possible technical replicates belong to the biological replicate.
         # TODO: change this once we remove technical_replicate_number.
         bio_rep_dict = {}
+        objects = item_loader(request).replicate_graph(request, replicates)
         for rep in replicates:
-            replicate_object = request.embed(rep, '@@object')
+            replicate_object = objects[rep]
             if replicate_object['status'] == 'deleted':
                 continue
             bio_rep_num = replicate_object['biological_replicate_number']
@@ -508,12 +518,14 @@ class CalculatedReplicationType:
 
         for replicate_object in bio_rep_dict.values():
             if 'libraries' in replicate_object and replicate_object['libraries']:
-                biosamples = request.select_distinct_values(
-                    'biosample', *replicate_object['libraries']
-                )
+                biosamples = {
+                    objects[lib]['biosample']
+                    for lib in replicate_object['libraries']
+                    if 'biosample' in objects[lib]
+                }
                 if biosamples:
                     for b in biosamples:
-                        biosample_object = request.embed(b, '@@object')
+                        biosample_object = objects[b]
                         biosample_donor_list.append(
                             biosample_object.get('donor')
                         )
@@ -521,10 +533,9 @@ class CalculatedReplicationType:
                             replicate_object.get('biological_replicate_number')
                         )
                         biosample_species = biosample_object.get('organism')
-                        biosample_type_object = request.embed(
-                            biosample_object['biosample_ontology'],
-                            '@@object'
-                        )
+                        biosample_type_object = objects[
+                            biosample_object['biosample_ontology']
+                        ]
                         biosample_type = biosample_type_object.get('classification')
                 else:
                     # special treatment for "RNA Bind-n-Seq" they will be called unreplicated
@@ -6,6 +6,7 @@ from snovault import (
 from .base import (
     SharedItem,
 )
+from ..reference_cache import embed_reference
 from pyramid.traversal import (
     find_root,
     resource_path
@@ -76,7 +77,7 @@ class Target(SharedItem):
             # ENCD-4250 investigated_as must be just ['synthetic tag']
             source = investigated_as[0].capitalize()
         else:
-            source = request.embed(organism, '@@object')['scientific_name']
+            source = embed_reference(request, organism)['scientific_name']
         return u'{} ({})'.format(label, source)
 
     @property